@@ -9,7 +9,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 # Import your models
 from app.core.database import Base
-from app.models import Restaurant, Wine, Sale, Dish
+from app.models import Restaurant, Wine, Sale, Dish, DailyWineSales, ImportJob
 
 # this is the Alembic Config object
 config = context.config
@@ -0,0 +1,58 @@
+"""Daily wine sales rollup table
+
+Revision ID: 002
+Revises: 001
+Create Date: 2025-02-03 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create daily_wine_sales rollup table
+    op.create_table(
+        'daily_wine_sales',
+        sa.Column('restaurant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('restaurants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('sale_date', sa.Date(), nullable=False),
+        sa.Column('wine_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('wines.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('bottles_sold', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('revenue', sa.Numeric(12, 2), nullable=False, server_default='0'),
+        sa.Column('profit', sa.Numeric(12, 2), nullable=True),
+        sa.Column('transaction_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('restaurant_id', 'sale_date', 'wine_id'),
+    )
+    op.create_index('ix_daily_wine_sales_wine_id', 'daily_wine_sales', ['wine_id'])
+    
+    # Backfill from existing sales
+    op.execute(
+        """
+        INSERT INTO daily_wine_sales (
+            restaurant_id, sale_date, wine_id,
+            bottles_sold, revenue, profit, transaction_count, updated_at
+        )
+        SELECT
+            restaurant_id, sale_date, wine_id,
+            SUM(quantity),
+            SUM(total_amount),
+            SUM(quantity * (unit_price - unit_cost)),
+            COUNT(*),
+            NOW()
+        FROM sales
+        GROUP BY restaurant_id, sale_date, wine_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_daily_wine_sales_wine_id', table_name='daily_wine_sales')
+    op.drop_table('daily_wine_sales')
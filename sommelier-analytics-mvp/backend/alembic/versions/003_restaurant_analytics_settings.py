@@ -0,0 +1,31 @@
+"""Per-restaurant analytics settings
+
+Revision ID: 003
+Revises: 002
+Create Date: 2025-02-10 10:30:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Dashboard window and reorder/overstock thresholds (previously hard-coded)
+    op.add_column('restaurants', sa.Column('summary_window_days', sa.Integer(), nullable=False, server_default='30'))
+    op.add_column('restaurants', sa.Column('reorder_stock_threshold', sa.Integer(), nullable=False, server_default='5'))
+    op.add_column('restaurants', sa.Column('overstock_stock_threshold', sa.Integer(), nullable=False, server_default='20'))
+    op.add_column('restaurants', sa.Column('overstock_sales_threshold', sa.Integer(), nullable=False, server_default='5'))
+
+
+def downgrade() -> None:
+    op.drop_column('restaurants', 'overstock_sales_threshold')
+    op.drop_column('restaurants', 'overstock_stock_threshold')
+    op.drop_column('restaurants', 'reorder_stock_threshold')
+    op.drop_column('restaurants', 'summary_window_days')
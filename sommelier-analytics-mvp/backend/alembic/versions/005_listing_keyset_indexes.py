@@ -0,0 +1,27 @@
+"""Indexes for keyset pagination of sales and wine listings
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-02-24 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Match the listing sort keys so each page is one index range scan
+    # (scanned backwards for sales, which are listed newest first)
+    op.create_index('ix_sales_restaurant_listing', 'sales', ['restaurant_id', 'sale_date', 'created_at', 'id'])
+    op.create_index('ix_wines_restaurant_name', 'wines', ['restaurant_id', 'name', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_wines_restaurant_name', table_name='wines')
+    op.drop_index('ix_sales_restaurant_listing', table_name='sales')
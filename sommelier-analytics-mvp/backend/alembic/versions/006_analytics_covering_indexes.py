@@ -0,0 +1,51 @@
+"""Covering and composite indexes for the analytics query shapes
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-03-03 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Every analytics endpoint reads one restaurant's rollup rows over a date
+    # range and aggregates per wine: cover those columns so the read is an
+    # index-only scan instead of a bitmap heap scan
+    op.create_index(
+        'ix_daily_wine_sales_restaurant_date_covering',
+        'daily_wine_sales',
+        ['restaurant_id', 'sale_date'],
+        postgresql_include=['wine_id', 'bottles_sold', 'revenue', 'profit', 'transaction_count'],
+    )
+    
+    # Per-wine history ("last sold", sales of one wine in a date range, FK
+    # cascades) - replaces the single-column wine_id indexes
+    op.create_index('ix_daily_wine_sales_wine_date', 'daily_wine_sales', ['wine_id', 'sale_date'])
+    op.drop_index('ix_daily_wine_sales_wine_id', table_name='daily_wine_sales')
+    op.create_index('ix_sales_wine_date', 'sales', ['wine_id', 'sale_date'])
+    op.drop_index('ix_sales_wine_id', table_name='sales')
+    
+    # Redundant with the listing indexes from 005 (same leading column), or
+    # unused since analytics moved to the rollup; each one slows every insert
+    op.drop_index('ix_sales_restaurant_id', table_name='sales')
+    op.drop_index('ix_sales_sale_date', table_name='sales')
+    op.drop_index('ix_wines_restaurant_id', table_name='wines')
+
+
+def downgrade() -> None:
+    op.create_index('ix_wines_restaurant_id', 'wines', ['restaurant_id'])
+    op.create_index('ix_sales_sale_date', 'sales', ['sale_date'])
+    op.create_index('ix_sales_restaurant_id', 'sales', ['restaurant_id'])
+    op.create_index('ix_sales_wine_id', 'sales', ['wine_id'])
+    op.drop_index('ix_sales_wine_date', table_name='sales')
+    op.create_index('ix_daily_wine_sales_wine_id', 'daily_wine_sales', ['wine_id'])
+    op.drop_index('ix_daily_wine_sales_wine_date', table_name='daily_wine_sales')
+    op.drop_index('ix_daily_wine_sales_restaurant_date_covering', table_name='daily_wine_sales')
@@ -0,0 +1,28 @@
+"""Restaurant group (owner) for multi-location analytics
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-03-10 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Locations sharing a group_id are reported together by /analytics/group/*
+    op.add_column('restaurants', sa.Column('group_id', postgresql.UUID(as_uuid=True), nullable=True))
+    op.create_index('ix_restaurants_group_id', 'restaurants', ['group_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_restaurants_group_id', table_name='restaurants')
+    op.drop_column('restaurants', 'group_id')
@@ -0,0 +1,79 @@
+"""Precomputed analytics summaries (90-day wine rankings, YTD profit)
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-03-24 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # When each restaurant's summaries were last rebuilt (the as-of time of materialized reads)
+    op.create_table(
+        'analytics_summary_state',
+        sa.Column('restaurant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('restaurants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+        sa.Column('duration_ms', sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint('restaurant_id'),
+    )
+    
+    # Every wine ranked over the trailing 90 days, once per ranking metric
+    op.create_table(
+        'wine_ranking_summaries',
+        sa.Column('restaurant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('restaurants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('rank_by', sa.String(10), nullable=False),
+        sa.Column('wine_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('wines.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('window_start', sa.Date(), nullable=False),
+        sa.Column('window_end', sa.Date(), nullable=False),
+        sa.Column('top_rank', sa.Integer(), nullable=False),
+        sa.Column('bottom_rank', sa.Integer(), nullable=False),
+        sa.Column('wine_name', sa.String(255), nullable=False),
+        sa.Column('producer', sa.String(255), nullable=True),
+        sa.Column('vintage', sa.Integer(), nullable=True),
+        sa.Column('total_bottles_sold', sa.Integer(), nullable=False),
+        sa.Column('total_revenue', sa.Numeric(12, 2), nullable=False),
+        sa.Column('total_profit', sa.Numeric(12, 2), nullable=True),
+        sa.Column('avg_price', sa.Numeric(12, 2), nullable=False),
+        sa.Column('profit_margin', sa.Float(), nullable=True),
+        sa.Column('last_sale_date', sa.Date(), nullable=True),
+        sa.PrimaryKeyConstraint('restaurant_id', 'rank_by', 'wine_id'),
+    )
+    # Top-N and bottom-N reads are two short index range scans
+    op.create_index('ix_wine_ranking_summaries_top', 'wine_ranking_summaries', ['restaurant_id', 'rank_by', 'top_rank'])
+    op.create_index('ix_wine_ranking_summaries_bottom', 'wine_ranking_summaries', ['restaurant_id', 'rank_by', 'bottom_rank'])
+    op.create_index('ix_wine_ranking_summaries_wine_id', 'wine_ranking_summaries', ['wine_id'])
+    
+    # Year-to-date realised profit of every wine with cost data
+    op.create_table(
+        'wine_profit_summaries',
+        sa.Column('restaurant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('restaurants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('wine_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('wines.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('period_end', sa.Date(), nullable=False),
+        sa.Column('wine_name', sa.String(255), nullable=False),
+        sa.Column('cost', sa.Numeric(10, 2), nullable=False),
+        sa.Column('price', sa.Numeric(10, 2), nullable=False),
+        sa.Column('total_profit', sa.Numeric(12, 2), nullable=False),
+        sa.PrimaryKeyConstraint('restaurant_id', 'wine_id'),
+    )
+    op.create_index('ix_wine_profit_summaries_wine_id', 'wine_profit_summaries', ['wine_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_wine_profit_summaries_wine_id', table_name='wine_profit_summaries')
+    op.drop_table('wine_profit_summaries')
+    op.drop_index('ix_wine_ranking_summaries_wine_id', table_name='wine_ranking_summaries')
+    op.drop_index('ix_wine_ranking_summaries_bottom', table_name='wine_ranking_summaries')
+    op.drop_index('ix_wine_ranking_summaries_top', table_name='wine_ranking_summaries')
+    op.drop_table('wine_ranking_summaries')
+    op.drop_table('analytics_summary_state')
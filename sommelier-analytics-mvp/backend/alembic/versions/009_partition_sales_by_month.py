@@ -0,0 +1,102 @@
+"""Partition sales by month on sale_date
+
+Revision ID: 009
+Revises: 008
+Create Date: 2025-03-31 09:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Kept in step with app.services.partitions (not imported: migrations must
+# not change when the app does)
+MONTHS_AHEAD = 3
+
+SALES_COLUMNS = """
+    id uuid NOT NULL,
+    restaurant_id uuid NOT NULL REFERENCES restaurants (id),
+    wine_id uuid NOT NULL REFERENCES wines (id),
+    sale_date date NOT NULL,
+    quantity integer NOT NULL,
+    unit_price numeric(10, 2) NOT NULL,
+    total_amount numeric(10, 2) NOT NULL,
+    unit_cost numeric(10, 2),
+    server_name varchar(100),
+    table_number varchar(20),
+    notes varchar(500),
+    pos_transaction_id varchar(100),
+    created_at timestamp without time zone NOT NULL
+"""
+
+COLUMN_NAMES = (
+    "id, restaurant_id, wine_id, sale_date, quantity, unit_price, total_amount, unit_cost, "
+    "server_name, table_number, notes, pos_transaction_id, created_at"
+)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _take_over_sales(table: str) -> None:
+    """Replace `sales` with `table`, keeping the original constraint and index names"""
+    op.drop_table('sales')
+    op.rename_table(table, 'sales')
+    for suffix in ('pkey', 'pos_transaction_id_key', 'restaurant_id_fkey', 'wine_id_fkey'):
+        op.execute(f"ALTER TABLE sales RENAME CONSTRAINT {table}_{suffix} TO sales_{suffix}")
+    op.create_index('ix_sales_restaurant_listing', 'sales', ['restaurant_id', 'sale_date', 'created_at', 'id'])
+    op.create_index('ix_sales_wine_date', 'sales', ['wine_id', 'sale_date'])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    
+    # Primary key and unique constraints on a partitioned table must include
+    # the partition key, so both gain sale_date
+    op.execute(f"""
+        CREATE TABLE sales_partitioned (
+            {SALES_COLUMNS},
+            CONSTRAINT sales_partitioned_pkey PRIMARY KEY (id, sale_date),
+            CONSTRAINT sales_partitioned_pos_transaction_id_key UNIQUE (pos_transaction_id, sale_date)
+        ) PARTITION BY RANGE (sale_date)
+    """)
+    
+    # One partition per month from the first sale to a few months ahead
+    this_month = date.today().replace(day=1)
+    first_sale = bind.execute(sa.text("SELECT min(sale_date) FROM sales")).scalar()
+    month = min(first_sale.replace(day=1), this_month) if first_sale else this_month
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+        end = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE sales_y{month.year:04d}m{month.month:02d} PARTITION OF sales_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        month = end
+    op.execute("CREATE TABLE sales_default PARTITION OF sales_partitioned DEFAULT")
+    
+    # Move the data, then build the indexes once over the filled partitions
+    op.execute(f"INSERT INTO sales_partitioned ({COLUMN_NAMES}) SELECT {COLUMN_NAMES} FROM sales")
+    _take_over_sales('sales_partitioned')
+    op.execute("ANALYZE sales")
+
+
+def downgrade() -> None:
+    # Partitions already archived into sales_archive are left where they are
+    op.execute(f"""
+        CREATE TABLE sales_unpartitioned (
+            {SALES_COLUMNS},
+            CONSTRAINT sales_unpartitioned_pkey PRIMARY KEY (id),
+            CONSTRAINT sales_unpartitioned_pos_transaction_id_key UNIQUE (pos_transaction_id)
+        )
+    """)
+    op.execute(f"INSERT INTO sales_unpartitioned ({COLUMN_NAMES}) SELECT {COLUMN_NAMES} FROM sales")
+    _take_over_sales('sales_unpartitioned')
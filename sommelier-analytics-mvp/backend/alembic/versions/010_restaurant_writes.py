@@ -0,0 +1,34 @@
+"""Latest write per restaurant, for read-your-writes replica routing
+
+Revision ID: 010
+Revises: 009
+Create Date: 2025-04-07 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # One row per restaurant, upserted after each write (primary clock)
+    op.create_table(
+        'restaurant_writes',
+        sa.Column('restaurant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('restaurants.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('written_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('restaurant_id'),
+    )
+    # Latest write to any restaurant (group reads)
+    op.create_index('ix_restaurant_writes_written_at', 'restaurant_writes', ['written_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_restaurant_writes_written_at', table_name='restaurant_writes')
+    op.drop_table('restaurant_writes')
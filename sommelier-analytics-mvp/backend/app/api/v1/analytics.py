@@ -2,392 +2,1027 @@
 Analytics API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, and_
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import (
+    Date, DateTime, Numeric, and_, case, cast, desc, exists, func,
+    literal, literal_column, select, true,
+)
 from datetime import datetime, date, timedelta
+from dateutil.relativedelta import relativedelta
+from decimal import Decimal
 from typing import Optional
 from uuid import UUID
 
-from app.core.database import get_db
-from app.models import Wine, Sale, Restaurant
+from app.core.cache import cached_analytics
+from app.core.database import get_read_db
+from app.core.export import (
+    EXPORT_FORMAT_PATTERN, ExportColumn, dict_values, export_response, model_columns, model_values,
+)
+from app.core.responses import FastJSONResponse
+from app.models import (
+    Wine, Restaurant, DailyWineSales, AnalyticsSummaryState, WineProfitSummary, WineRankingSummary,
+)
 from app.schemas.analytics import (
     TopBottomWines,
     WineSalesMetric,
     SalesTrendResponse,
     SalesTrend,
     InventoryHealth,
+    ReorderForecast,
     ProfitAnalysis,
     DashboardSummary,
+    LocationDashboardSummary,
+    GroupDashboardTotals,
+    GroupDashboardSummary,
+    GroupWineSalesMetric,
+    LocationTopBottomWines,
+    GroupTopBottomWines,
+    LocationSalesTrends,
+    GroupSalesTrendResponse,
 )
+from app.services import forecast
+from app.services.analytics_queries import profit_analysis_query, ranked_wines_query
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 
-@router.get("/dashboard/{restaurant_id}", response_model=DashboardSummary)
-async def get_dashboard_summary(
-    restaurant_id: UUID,
-    db: Session = Depends(get_db)
-):
+# Most locations a group endpoint reports on in one request
+MAX_GROUP_LOCATIONS = 100
+
+# fresh: computed from the rollup on every request; materialized: read from
+# the summaries rebuilt by app.services.summaries, as of their last refresh
+SOURCE_PATTERN = "^(fresh|materialized)$"
+
+
+def _date_bucket(column, granularity: str):
+    """First day of the day/week/month bucket containing `column`"""
+    if granularity == "day":
+        # Dates are already day buckets; skip date_trunc on every rollup row
+        return column
+    # The unit is inlined (validated by the endpoint) so the expression is
+    # textually identical in SELECT and GROUP BY
+    return cast(
+        func.date_trunc(literal_column(f"'{granularity}'"), cast(column, DateTime)),
+        Date
+    )
+
+
+def _profit_margin(profit: Optional[Decimal], revenue: Optional[Decimal]) -> Optional[float]:
+    """Profit as a percentage of revenue (None when either is unknown/zero)"""
+    if profit and revenue and revenue > 0:
+        return (float(profit) / float(revenue)) * 100
+    return None
+
+
+def _sum_known(values) -> Optional[Decimal]:
+    """Sum of the non-None values; None if every value is None"""
+    known = [value for value in values if value is not None]
+    return sum(known, Decimal(0)) if known else None
+
+
+async def _require_restaurant(db: AsyncSession, restaurant_id: UUID) -> None:
+    """404 unless the restaurant exists (exports check before streaming starts)"""
+    if not await db.get(Restaurant, restaurant_id):
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+
+
+async def get_group_restaurant_ids(
+    restaurant_ids: Optional[list[UUID]] = Query(None),
+    group_id: Optional[UUID] = Query(None),
+    db: AsyncSession = Depends(get_read_db)
+) -> list[UUID]:
     """
-    Get overall dashboard summary for a restaurant
+    Restaurants a group endpoint reports on, ordered by name
+    
+    Either an explicit list (`?restaurant_ids=...&restaurant_ids=...`) or
+    every location sharing `group_id`.
     """
-    # Verify restaurant exists
-    restaurant = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
-    if not restaurant:
-        raise HTTPException(status_code=404, detail="Restaurant not found")
+    if (restaurant_ids is None) == (group_id is None):
+        raise HTTPException(status_code=400, detail="Pass either restaurant_ids or group_id")
     
-    # Date range for "last 30 days"
-    end_date = date.today()
-    start_date = end_date - timedelta(days=30)
-    
-    # Total wines
-    total_wines = db.query(func.count(Wine.id)).filter(
-        Wine.restaurant_id == restaurant_id
-    ).scalar()
-    
-    # Total inventory
-    total_bottles = db.query(func.sum(Wine.inventory_count)).filter(
-        Wine.restaurant_id == restaurant_id
-    ).scalar() or 0
-    
-    # Sales last 30 days
-    sales_query = db.query(
-        func.sum(Sale.quantity).label('total_sales'),
-        func.sum(Sale.total_amount).label('total_revenue'),
-        func.sum(Sale.quantity * (Sale.unit_price - Sale.unit_cost)).label('total_profit')
-    ).filter(
-        and_(
-            Sale.restaurant_id == restaurant_id,
-            Sale.sale_date >= start_date,
-            Sale.sale_date <= end_date
-        )
-    ).first()
+    query = select(Restaurant.id).order_by(Restaurant.name, Restaurant.id)
+    if group_id is not None:
+        query = query.where(Restaurant.group_id == group_id)
+    else:
+        requested = set(restaurant_ids)
+        if len(requested) > MAX_GROUP_LOCATIONS:
+            raise HTTPException(
+                status_code=400, detail=f"At most {MAX_GROUP_LOCATIONS} restaurants per request"
+            )
+        query = query.where(Restaurant.id.in_(requested))
+    
+    ids = list((await db.execute(query.limit(MAX_GROUP_LOCATIONS + 1))).scalars().all())
+    if group_id is not None:
+        if not ids:
+            raise HTTPException(status_code=404, detail="Restaurant group not found")
+        if len(ids) > MAX_GROUP_LOCATIONS:
+            raise HTTPException(
+                status_code=400, detail=f"Group has more than {MAX_GROUP_LOCATIONS} restaurants"
+            )
+    elif len(ids) != len(requested):
+        missing = sorted(str(restaurant_id) for restaurant_id in requested - set(ids))
+        raise HTTPException(status_code=404, detail=f"Restaurant not found: {', '.join(missing)}")
+    return ids
+
+
+def _dashboard_summary_query(restaurant_ids: list[UUID], today: date):
+    """
+    Build the single-statement dashboard query (one row per restaurant)
     
-    total_sales = sales_query.total_sales or 0
-    revenue = sales_query.total_revenue or 0
-    profit = sales_query.total_profit
+    Each summary figure is a CTE grouped by restaurant, so every restaurant's
+    own window and thresholds drive its calculation and a missing restaurant
+    simply yields no row.
+    """
+    restaurant = select(
+        Restaurant.id,
+        Restaurant.name,
+        Restaurant.summary_window_days,
+        Restaurant.reorder_stock_threshold,
+        Restaurant.overstock_stock_threshold,
+        Restaurant.overstock_sales_threshold,
+    ).where(Restaurant.id.in_(restaurant_ids)).cte('restaurant')
     
-    # Average profit margin
-    if profit and revenue and revenue > 0:
-        avg_profit_margin = (float(profit) / float(revenue)) * 100
-    else:
-        avg_profit_margin = None
+    window_start = literal(today, Date) - restaurant.c.summary_window_days
     
-    # Top wine this month
-    top_wine_row = db.query(
-        Wine.name,
-        func.sum(Sale.quantity).label('sales_count')
-    ).join(Sale).filter(
+    # Inventory-side figures (the outer join keeps restaurants without wines)
+    wine_stats = select(
+        restaurant.c.id.label('restaurant_id'),
+        func.count(Wine.id).label('total_wines'),
+        func.coalesce(func.sum(Wine.inventory_count), 0).label('total_bottles'),
+        func.count(Wine.id).filter(
+            and_(
+                Wine.inventory_count < restaurant.c.reorder_stock_threshold,
+                Wine.times_sold > 0
+            )
+        ).label('wines_needing_reorder'),
+        func.count(Wine.id).filter(
+            and_(
+                Wine.inventory_count > restaurant.c.overstock_stock_threshold,
+                Wine.times_sold < restaurant.c.overstock_sales_threshold
+            )
+        ).label('overstocked_wines'),
+    ).select_from(restaurant).outerjoin(
+        Wine, Wine.restaurant_id == restaurant.c.id
+    ).group_by(
+        restaurant.c.id,
+        restaurant.c.reorder_stock_threshold,
+        restaurant.c.overstock_stock_threshold,
+        restaurant.c.overstock_sales_threshold
+    ).cte('wine_stats')
+    
+    # Per-wine sales inside each restaurant's summary window
+    window_sales = select(
+        DailyWineSales.restaurant_id,
+        DailyWineSales.wine_id,
+        func.sum(DailyWineSales.bottles_sold).label('bottles_sold'),
+        func.sum(DailyWineSales.revenue).label('revenue'),
+        func.sum(DailyWineSales.profit).label('profit'),
+    ).join(
+        restaurant, DailyWineSales.restaurant_id == restaurant.c.id
+    ).where(
         and_(
-            Sale.restaurant_id == restaurant_id,
-            Sale.sale_date >= start_date
+            DailyWineSales.sale_date >= window_start,
+            DailyWineSales.sale_date <= today
         )
-    ).group_by(Wine.id, Wine.name).order_by(desc('sales_count')).first()
+    ).group_by(DailyWineSales.restaurant_id, DailyWineSales.wine_id).cte('window_sales')
     
-    top_wine = top_wine_row[0] if top_wine_row else None
+    sales_totals = select(
+        window_sales.c.restaurant_id,
+        func.sum(window_sales.c.bottles_sold).label('total_sales'),
+        func.sum(window_sales.c.revenue).label('total_revenue'),
+        func.sum(window_sales.c.profit).label('total_profit'),
+    ).group_by(window_sales.c.restaurant_id).cte('sales_totals')
+    
+    # Best seller of each restaurant (ties go to the first name, so a
+    # location reads the same alone as in a group)
+    top_wine = select(
+        window_sales.c.restaurant_id,
+        Wine.name,
+    ).join(Wine, window_sales.c.wine_id == Wine.id)\
+        .distinct(window_sales.c.restaurant_id)\
+        .order_by(window_sales.c.restaurant_id, desc(window_sales.c.bottles_sold), Wine.name, Wine.id)\
+        .cte('top_wine')
     
-    # Slowest wine (hasn't sold in 30+ days)
-    slowest_wine_row = db.query(Wine.name, func.max(Sale.sale_date).label('last_sale'))\
-        .outerjoin(Sale)\
-        .filter(Wine.restaurant_id == restaurant_id)\
-        .group_by(Wine.id, Wine.name)\
-        .having(
-            func.coalesce(func.max(Sale.sale_date), date(1900, 1, 1)) < start_date
+    # Slowest wine: no sales since the window started
+    slowest_wine = select(Wine.name)\
+        .where(
+            and_(
+                Wine.restaurant_id == restaurant.c.id,
+                ~exists().where(
+                    and_(
+                        DailyWineSales.restaurant_id == restaurant.c.id,
+                        DailyWineSales.wine_id == Wine.id,
+                        DailyWineSales.sale_date >= window_start
+                    )
+                ).correlate_except(DailyWineSales)
+            )
         )\
-        .first()
+        .order_by(Wine.name, Wine.id)\
+        .limit(1)\
+        .scalar_subquery()
     
-    slowest_wine = slowest_wine_row[0] if slowest_wine_row else None
+    return select(
+        restaurant.c.id.label('restaurant_id'),
+        restaurant.c.name.label('restaurant_name'),
+        restaurant.c.summary_window_days,
+        wine_stats.c.total_wines,
+        wine_stats.c.total_bottles,
+        wine_stats.c.wines_needing_reorder,
+        wine_stats.c.overstocked_wines,
+        func.coalesce(sales_totals.c.total_sales, 0).label('total_sales'),
+        func.coalesce(sales_totals.c.total_revenue, 0).label('total_revenue'),
+        sales_totals.c.total_profit,
+        top_wine.c.name.label('top_wine'),
+        slowest_wine.label('slowest_wine'),
+    ).select_from(restaurant)\
+        .join(wine_stats, wine_stats.c.restaurant_id == restaurant.c.id)\
+        .outerjoin(sales_totals, sales_totals.c.restaurant_id == restaurant.c.id)\
+        .outerjoin(top_wine, top_wine.c.restaurant_id == restaurant.c.id)\
+        .order_by(restaurant.c.name, restaurant.c.id)
+
+
+def _dashboard_summary(row, model=DashboardSummary, **extra):
+    """Dashboard response for one row of the dashboard query"""
+    return model(
+        total_wines=row.total_wines,
+        total_bottles_in_stock=int(row.total_bottles),
+        total_sales_last_30_days=int(row.total_sales),
+        revenue_last_30_days=row.total_revenue,
+        profit_last_30_days=row.total_profit,
+        avg_profit_margin=_profit_margin(row.total_profit, row.total_revenue),
+        top_wine_this_month=row.top_wine,
+        slowest_wine=row.slowest_wine,
+        wines_needing_reorder=row.wines_needing_reorder,
+        overstocked_wines=row.overstocked_wines,
+        window_days=row.summary_window_days,
+        **extra
+    )
+
+
+@router.get("/dashboard/{restaurant_id}", response_model=DashboardSummary)
+@cached_analytics
+async def get_dashboard_summary(
+    restaurant_id: UUID,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get overall dashboard summary for a restaurant
     
-    # Wines needing reorder (inventory < 5 and selling)
-    wines_low_stock = db.query(func.count(Wine.id)).filter(
-        and_(
-            Wine.restaurant_id == restaurant_id,
-            Wine.inventory_count < 5,
-            Wine.times_sold > 0
-        )
-    ).scalar() or 0
+    All figures come from one round trip; the summary window and the
+    reorder/overstock thresholds are read from the restaurant's settings.
+    """
+    summary = (await db.execute(_dashboard_summary_query([restaurant_id], date.today()))).first()
+    if not summary:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
     
-    # Overstocked wines (inventory > 20 and not selling much)
-    wines_overstocked = db.query(func.count(Wine.id)).filter(
-        and_(
-            Wine.restaurant_id == restaurant_id,
-            Wine.inventory_count > 20,
-            Wine.times_sold < 5
+    return _dashboard_summary(summary)
+
+
+@router.get("/group/dashboard", response_model=GroupDashboardSummary)
+@cached_analytics
+async def get_group_dashboard_summary(
+    restaurant_ids: list[UUID] = Depends(get_group_restaurant_ids),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get the dashboard summary of several locations, plus group totals
+    
+    Every location's figures come from the same grouped query as the
+    single-restaurant dashboard, so the cost is one round trip however many
+    locations there are. Each location keeps its own window and thresholds.
+    """
+    rows = (await db.execute(_dashboard_summary_query(restaurant_ids, date.today()))).all()
+    locations = [
+        _dashboard_summary(
+            row,
+            model=LocationDashboardSummary,
+            restaurant_id=row.restaurant_id,
+            restaurant_name=row.restaurant_name
         )
-    ).scalar() or 0
+        for row in rows
+    ]
     
-    return DashboardSummary(
-        total_wines=total_wines,
-        total_bottles_in_stock=int(total_bottles),
-        total_sales_last_30_days=int(total_sales),
+    revenue = sum((location.revenue_last_30_days for location in locations), Decimal(0))
+    profit = _sum_known(location.profit_last_30_days for location in locations)
+    totals = GroupDashboardTotals(
+        restaurant_count=len(locations),
+        total_wines=sum(location.total_wines for location in locations),
+        total_bottles_in_stock=sum(location.total_bottles_in_stock for location in locations),
+        total_sales_last_30_days=sum(location.total_sales_last_30_days for location in locations),
         revenue_last_30_days=revenue,
         profit_last_30_days=profit,
-        avg_profit_margin=avg_profit_margin,
-        top_wine_this_month=top_wine,
-        slowest_wine=slowest_wine,
-        wines_needing_reorder=wines_low_stock,
-        overstocked_wines=wines_overstocked
+        avg_profit_margin=_profit_margin(profit, revenue),
+        wines_needing_reorder=sum(location.wines_needing_reorder for location in locations),
+        overstocked_wines=sum(location.overstocked_wines for location in locations)
+    )
+    return GroupDashboardSummary(locations=locations, totals=totals)
+
+
+async def _summary_as_of(db: AsyncSession, restaurant_id: UUID) -> Optional[datetime]:
+    """When the restaurant's summaries were last rebuilt (None if never)"""
+    return (await db.execute(
+        select(AnalyticsSummaryState.refreshed_at)
+        .where(AnalyticsSummaryState.restaurant_id == restaurant_id)
+    )).scalar()
+
+
+async def _summary_cache_key(db: AsyncSession, restaurant_id: UUID, source: str, **_) -> Optional[str]:
+    """Materialized reads change when the summaries are rebuilt, not on writes"""
+    if source != "materialized":
+        return None
+    as_of = await _summary_as_of(db, restaurant_id)
+    return as_of.isoformat() if as_of else None
+
+
+def _as_of_headers(as_of: datetime) -> dict:
+    return {"X-Data-As-Of": as_of.isoformat()}
+
+
+def _wine_sales_metric(row, end_date: date, model=WineSalesMetric, **extra):
+    """Wine metrics for one row of the top/bottom query"""
+    return model(
+        wine_id=row.wine_id,
+        wine_name=row.wine_name,
+        producer=row.producer,
+        vintage=row.vintage,
+        total_bottles_sold=row.total_bottles_sold,
+        total_revenue=row.total_revenue,
+        total_profit=row.total_profit,
+        avg_price=row.avg_price,
+        profit_margin=row.profit_margin,
+        last_sale_date=row.last_sale_date,
+        days_since_last_sale=(end_date - row.last_sale_date).days if row.last_sale_date else None,
+        **extra
     )
 
 
 @router.get("/top-bottom-wines/{restaurant_id}", response_model=TopBottomWines)
+@cached_analytics(key_extra=_summary_cache_key)
 async def get_top_bottom_wines(
     restaurant_id: UUID,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
     limit: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db)
+    rank_by: str = Query("bottles", pattern="^(bottles|revenue|profit|margin)$"),
+    source: str = Query("fresh", pattern=SOURCE_PATTERN),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Get top and bottom performing wines by sales volume
+    Get top and bottom performing wines
+    
+    Wines are ranked by bottles sold (default), revenue, profit or profit
+    margin. Every wine on the list is ranked, so wines with no sales in the
+    window show up as slow movers. Ranking happens in SQL and only the
+    returned rows are fetched.
+    
+    `source=materialized` reads the precomputed 90-day rankings instead
+    (default window only) and reports their refresh time as `as_of`; until
+    the first refresh it falls back to a fresh read.
     """
+    if source == "materialized":
+        if start_date or end_date:
+            raise HTTPException(
+                status_code=400,
+                detail="Materialized rankings cover the last 90 days; omit start_date/end_date"
+            )
+        as_of = await _summary_as_of(db, restaurant_id)
+        if as_of is not None:
+            return await _materialized_top_bottom_wines(db, restaurant_id, limit, rank_by, as_of)
+    
     # Default to last 90 days if not specified
     if not end_date:
         end_date = date.today()
     if not start_date:
         start_date = end_date - timedelta(days=90)
     
-    # Query for wine sales metrics
-    wine_metrics = db.query(
-        Wine.id,
-        Wine.name,
-        Wine.producer,
-        Wine.vintage,
-        func.sum(Sale.quantity).label('total_bottles_sold'),
-        func.sum(Sale.total_amount).label('total_revenue'),
-        func.sum(Sale.quantity * (Sale.unit_price - Sale.unit_cost)).label('total_profit'),
-        func.avg(Sale.unit_price).label('avg_price'),
-        func.max(Sale.sale_date).label('last_sale_date')
-    ).join(Sale).filter(
-        and_(
-            Wine.restaurant_id == restaurant_id,
-            Sale.sale_date >= start_date,
-            Sale.sale_date <= end_date
-        )
-    ).group_by(Wine.id, Wine.name, Wine.producer, Wine.vintage).all()
-    
-    # Convert to WineSalesMetric objects
-    metrics = []
-    for metric in wine_metrics:
-        profit_margin = None
-        if metric.total_profit and metric.total_revenue and metric.total_revenue > 0:
-            profit_margin = (float(metric.total_profit) / float(metric.total_revenue)) * 100
-        
-        days_since_sale = None
-        if metric.last_sale_date:
-            days_since_sale = (end_date - metric.last_sale_date).days
-        
-        metrics.append(WineSalesMetric(
-            wine_id=metric.id,
-            wine_name=metric.name,
-            producer=metric.producer,
-            vintage=metric.vintage,
-            total_bottles_sold=metric.total_bottles_sold,
-            total_revenue=metric.total_revenue,
-            total_profit=metric.total_profit,
-            avg_price=metric.avg_price,
-            profit_margin=profit_margin,
-            last_sale_date=metric.last_sale_date,
-            days_since_last_sale=days_since_sale
-        ))
+    rows = (await db.execute(
+        ranked_wines_query([restaurant_id], start_date, end_date, rank_by, limit)
+    )).all()
     
-    # Sort by bottles sold
-    metrics.sort(key=lambda x: x.total_bottles_sold, reverse=True)
+    # A wine already among the top sellers is never repeated as a slow mover
+    top_sellers = []
+    slow_movers = []
+    for row in rows:
+        metric_row = _wine_sales_metric(row, end_date)
+        if row.top_rank <= limit:
+            top_sellers.append(metric_row)
+        else:
+            slow_movers.append(metric_row)
     
     return TopBottomWines(
-        top_sellers=metrics[:limit],
-        slow_movers=metrics[-limit:] if len(metrics) > limit else []
+        top_sellers=top_sellers,
+        slow_movers=slow_movers,
+        rank_by=rank_by
     )
 
 
-@router.get("/sales-trends/{restaurant_id}", response_model=SalesTrendResponse)
-async def get_sales_trends(
+async def _materialized_top_bottom_wines(
+    db: AsyncSession,
+    restaurant_id: UUID,
+    limit: int,
+    rank_by: str,
+    as_of: datetime,
+) -> FastJSONResponse:
+    """Top/bottom wines from `wine_ranking_summaries`"""
+    summary = WineRankingSummary
+    rows = (await db.execute(
+        select(summary).where(
+            summary.restaurant_id == restaurant_id,
+            summary.rank_by == rank_by,
+            (summary.top_rank <= limit) | (summary.bottom_rank <= limit)
+        ).order_by(summary.top_rank)
+    )).scalars().all()
+    
+    top_sellers = []
+    slow_movers = []
+    for row in rows:
+        metric_row = _wine_sales_metric(row, row.window_end)
+        if row.top_rank <= limit:
+            top_sellers.append(metric_row)
+        else:
+            slow_movers.append(metric_row)
+    
+    return FastJSONResponse(
+        TopBottomWines(top_sellers=top_sellers, slow_movers=slow_movers, rank_by=rank_by, as_of=as_of),
+        headers=_as_of_headers(as_of)
+    )
+
+
+@router.get("/top-bottom-wines/{restaurant_id}/export")
+async def export_wine_rankings(
     restaurant_id: UUID,
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db)
+    rank_by: str = Query("bottles", pattern="^(bottles|revenue|profit|margin)$"),
+    export_format: str = Query("csv", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Download the full wine ranking behind top/bottom wines, best first"""
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=90)
+    await _require_restaurant(db, restaurant_id)
+    return export_response(
+        ranked_wines_query([restaurant_id], start_date, end_date, rank_by, limit=None),
+        [ExportColumn('rank', int), *model_columns(WineSalesMetric)],
+        export_format,
+        filename=f"wine-rankings-{restaurant_id}-{start_date}-{end_date}",
+        convert=lambda row: (row.top_rank, *model_values(_wine_sales_metric(row, end_date))),
+        bind=db.bind
+    )
+
+
+@router.get("/group/top-bottom-wines", response_model=GroupTopBottomWines)
+@cached_analytics
+async def get_group_top_bottom_wines(
+    restaurant_ids: list[UUID] = Depends(get_group_restaurant_ids),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    limit: int = Query(10, ge=1, le=50),
+    rank_by: str = Query("bottles", pattern="^(bottles|revenue|profit|margin)$"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Get sales trends over time (daily aggregation)
+    Get top and bottom performing wines of several locations
+    
+    Each location's wines are ranked among themselves, and every wine is
+    also ranked across the whole group, all in one query.
     """
-    # Default to last 30 days
     if not end_date:
         end_date = date.today()
     if not start_date:
-        start_date = end_date - timedelta(days=30)
+        start_date = end_date - timedelta(days=90)
+    
+    rows = (await db.execute(
+        ranked_wines_query(restaurant_ids, start_date, end_date, rank_by, limit, across_group=True)
+    )).all()
     
-    # Query daily sales
-    daily_sales = db.query(
-        Sale.sale_date,
-        func.sum(Sale.quantity).label('total_sales'),
-        func.sum(Sale.total_amount).label('total_revenue'),
-        func.sum(Sale.quantity * (Sale.unit_price - Sale.unit_cost)).label('total_profit'),
-        func.count(func.distinct(Sale.wine_id)).label('unique_wines_sold')
-    ).filter(
+    locations = {}
+    group_top = []
+    group_bottom = []
+    for row in rows:
+        location = locations.setdefault(row.restaurant_id, LocationTopBottomWines(
+            restaurant_id=row.restaurant_id,
+            restaurant_name=row.restaurant_name,
+            top_sellers=[],
+            slow_movers=[]
+        ))
+        if row.top_rank <= limit:
+            location.top_sellers.append(_wine_sales_metric(row, end_date))
+        elif row.bottom_rank <= limit:
+            location.slow_movers.append(_wine_sales_metric(row, end_date))
+        
+        if row.group_top_rank <= limit:
+            group_top.append((row.group_top_rank, row))
+        elif row.group_bottom_rank <= limit:
+            group_bottom.append((row.group_top_rank, row))
+    
+    # Locations without any wines have no rows
+    missing = [restaurant_id for restaurant_id in restaurant_ids if restaurant_id not in locations]
+    if missing:
+        names = dict((await db.execute(
+            select(Restaurant.id, Restaurant.name).where(Restaurant.id.in_(missing))
+        )).all())
+        for restaurant_id in missing:
+            locations[restaurant_id] = LocationTopBottomWines(
+                restaurant_id=restaurant_id,
+                restaurant_name=names[restaurant_id],
+                top_sellers=[],
+                slow_movers=[]
+            )
+    
+    def group_metrics(ranked_rows):
+        return [
+            _wine_sales_metric(row, end_date, model=GroupWineSalesMetric, restaurant_id=row.restaurant_id)
+            for _, row in sorted(ranked_rows, key=lambda item: item[0])
+        ]
+    
+    return GroupTopBottomWines(
+        rank_by=rank_by,
+        locations=[locations[restaurant_id] for restaurant_id in restaurant_ids],
+        top_sellers=group_metrics(group_top),
+        slow_movers=group_metrics(group_bottom)
+    )
+
+
+def _sales_trends_query(restaurant_ids: list[UUID], start_date: date, end_date: date, granularity: str):
+    """
+    Build the trends query: one zero-filled row per restaurant and bucket,
+    with each restaurant's period totals riding along on its rows
+    """
+    # Per-bucket totals from the rollup
+    bucket = _date_bucket(DailyWineSales.sale_date, granularity)
+    # One rollup row per wine per day, so only wider buckets need DISTINCT
+    wines_sold = DailyWineSales.wine_id if granularity == "day" else DailyWineSales.wine_id.distinct()
+    bucket_sales = select(
+        DailyWineSales.restaurant_id,
+        bucket.label('bucket'),
+        func.sum(DailyWineSales.bottles_sold).label('total_sales'),
+        func.sum(DailyWineSales.revenue).label('total_revenue'),
+        func.sum(DailyWineSales.profit).label('total_profit'),
+        func.count(wines_sold).label('unique_wines_sold')
+    ).where(
         and_(
-            Sale.restaurant_id == restaurant_id,
-            Sale.sale_date >= start_date,
-            Sale.sale_date <= end_date
+            DailyWineSales.restaurant_id.in_(restaurant_ids),
+            DailyWineSales.sale_date >= start_date,
+            DailyWineSales.sale_date <= end_date
         )
-    ).group_by(Sale.sale_date).order_by(Sale.sale_date).all()
+    ).group_by(DailyWineSales.restaurant_id, bucket).subquery('bucket_sales')
     
-    # Convert to SalesTrend objects
-    trends = [
-        SalesTrend(
-            date=row.sale_date,
-            total_sales=row.total_sales,
-            total_revenue=row.total_revenue,
-            total_profit=row.total_profit,
-            unique_wines_sold=row.unique_wines_sold
+    # Every bucket in the range, for every restaurant
+    buckets = select(
+        cast(func.generate_series(
+            _date_bucket(literal(start_date, Date), granularity),
+            _date_bucket(literal(end_date, Date), granularity),
+            literal_column(f"interval '1 {granularity}'")
+        ), Date).label('bucket')
+    ).subquery('buckets')
+    locations = select(Restaurant.id, Restaurant.name)\
+        .where(Restaurant.id.in_(restaurant_ids))\
+        .subquery('locations')
+    
+    total_sales = func.coalesce(bucket_sales.c.total_sales, 0)
+    total_revenue = func.coalesce(bucket_sales.c.total_revenue, 0)
+    # Empty buckets made no profit; buckets whose sales lack costs stay unknown
+    total_profit = case(
+        (bucket_sales.c.bucket.is_(None), literal(0, Numeric)),
+        else_=bucket_sales.c.total_profit
+    )
+    return select(
+        locations.c.id.label('restaurant_id'),
+        locations.c.name.label('restaurant_name'),
+        buckets.c.bucket,
+        total_sales.label('total_sales'),
+        total_revenue.label('total_revenue'),
+        total_profit.label('total_profit'),
+        func.coalesce(bucket_sales.c.unique_wines_sold, 0).label('unique_wines_sold'),
+        func.sum(total_sales).over(partition_by=locations.c.id).label('period_sales'),
+        func.sum(total_revenue).over(partition_by=locations.c.id).label('period_revenue'),
+        func.sum(bucket_sales.c.total_profit).over(partition_by=locations.c.id).label('period_profit')
+    ).select_from(locations).join(buckets, true()).outerjoin(
+        bucket_sales,
+        and_(
+            bucket_sales.c.restaurant_id == locations.c.id,
+            bucket_sales.c.bucket == buckets.c.bucket
         )
-        for row in daily_sales
-    ]
+    ).order_by(locations.c.name, locations.c.id, buckets.c.bucket)
+
+
+def _trend_point(row) -> SalesTrend:
+    """One bucket of the trends query"""
+    return SalesTrend(
+        date=row.bucket,
+        total_sales=row.total_sales,
+        total_revenue=row.total_revenue,
+        total_profit=row.total_profit,
+        unique_wines_sold=row.unique_wines_sold
+    )
+
+
+def _trends_period(start_date: Optional[date], end_date: Optional[date]) -> tuple[date, date]:
+    """Requested trends period, defaulting to the last 30 days"""
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=30)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    return start_date, end_date
+
+
+@router.get("/sales-trends/{restaurant_id}", response_model=SalesTrendResponse)
+@cached_analytics
+async def get_sales_trends(
+    restaurant_id: UUID,
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get sales trends over time, bucketed by day, week or month
+    
+    Every bucket in the range is returned (zero when nothing sold), labelled
+    with its first day; weeks start on Monday. Series and totals come from
+    one query.
+    """
+    start_date, end_date = _trends_period(start_date, end_date)
     
-    # Calculate totals
-    total_sales = sum(t.total_sales for t in trends)
-    total_revenue = sum(t.total_revenue for t in trends)
+    rows = (await db.execute(
+        _sales_trends_query([restaurant_id], start_date, end_date, granularity)
+    )).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
     
     # Calculate average daily sales
     num_days = (end_date - start_date).days + 1
-    avg_daily_sales = total_sales / num_days if num_days > 0 else 0
     
     return SalesTrendResponse(
         period_start=start_date,
         period_end=end_date,
-        trends=trends,
-        total_sales=total_sales,
-        total_revenue=total_revenue,
-        avg_daily_sales=avg_daily_sales
+        granularity=granularity,
+        trends=[_trend_point(row) for row in rows],
+        total_sales=rows[0].period_sales,
+        total_revenue=rows[0].period_revenue,
+        total_profit=rows[0].period_profit,
+        avg_daily_sales=rows[0].period_sales / num_days
     )
 
 
-@router.get("/inventory-health/{restaurant_id}", response_model=list[InventoryHealth])
-async def get_inventory_health(
+@router.get("/sales-trends/{restaurant_id}/export")
+async def export_sales_trends(
     restaurant_id: UUID,
-    db: Session = Depends(get_db)
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    export_format: str = Query("csv", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Download the sales trend series, one row per bucket"""
+    start_date, end_date = _trends_period(start_date, end_date)
+    await _require_restaurant(db, restaurant_id)
+    return export_response(
+        _sales_trends_query([restaurant_id], start_date, end_date, granularity),
+        model_columns(SalesTrend),
+        export_format,
+        filename=f"sales-trends-{restaurant_id}-{start_date}-{end_date}",
+        convert=lambda row: model_values(_trend_point(row)),
+        bind=db.bind
+    )
+
+
+@router.get("/group/sales-trends", response_model=GroupSalesTrendResponse)
+@cached_analytics
+async def get_group_sales_trends(
+    restaurant_ids: list[UUID] = Depends(get_group_restaurant_ids),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
-    Analyze inventory health and recommend actions
-    """
-    # Get wines with their sales velocity
-    wines = db.query(Wine).filter(Wine.restaurant_id == restaurant_id).all()
+    Get sales trends of several locations, plus the group series
     
-    # Calculate sales velocity (last 30 days)
-    end_date = date.today()
-    start_date = end_date - timedelta(days=30)
+    Every location's series comes from one grouped query; the group series
+    sums the locations bucket by bucket (wines belong to a single location,
+    so unique wines add up too).
+    """
+    start_date, end_date = _trends_period(start_date, end_date)
+    num_days = (end_date - start_date).days + 1
     
-    health_metrics = []
+    rows = (await db.execute(
+        _sales_trends_query(restaurant_ids, start_date, end_date, granularity)
+    )).all()
     
-    for wine in wines:
-        # Get sales count for last 30 days
-        sales_count = db.query(func.sum(Sale.quantity)).filter(
-            and_(
-                Sale.wine_id == wine.id,
-                Sale.sale_date >= start_date,
-                Sale.sale_date <= end_date
+    locations = {}
+    by_bucket = {}
+    for row in rows:
+        if row.restaurant_id not in locations:
+            locations[row.restaurant_id] = LocationSalesTrends(
+                restaurant_id=row.restaurant_id,
+                restaurant_name=row.restaurant_name,
+                trends=[],
+                total_sales=row.period_sales,
+                total_revenue=row.period_revenue,
+                total_profit=row.period_profit,
+                avg_daily_sales=row.period_sales / num_days
             )
-        ).scalar() or 0
-        
-        avg_daily_sales = float(sales_count) / 30.0
-        
-        # Calculate days until stockout
-        days_until_stockout = None
-        if avg_daily_sales > 0:
-            days_until_stockout = int(wine.inventory_count / avg_daily_sales)
-        
-        # Determine if reorder needed (< 7 days of inventory)
-        reorder_recommended = (
-            days_until_stockout is not None and 
-            days_until_stockout < 7 and 
-            avg_daily_sales > 0
+        locations[row.restaurant_id].trends.append(_trend_point(row))
+        by_bucket.setdefault(row.bucket, []).append(row)
+    
+    trends = [
+        SalesTrend(
+            date=bucket,
+            total_sales=sum(row.total_sales for row in bucket_rows),
+            total_revenue=sum((row.total_revenue for row in bucket_rows), Decimal(0)),
+            total_profit=_sum_known(row.total_profit for row in bucket_rows),
+            unique_wines_sold=sum(row.unique_wines_sold for row in bucket_rows)
         )
-        
-        # Determine if overstocked (> 90 days of inventory or no sales)
-        overstocked = (
-            wine.inventory_count > 20 and 
-            (avg_daily_sales == 0 or (days_until_stockout is not None and days_until_stockout > 90))
+        for bucket, bucket_rows in sorted(by_bucket.items())
+    ]
+    
+    total_sales = sum(location.total_sales for location in locations.values())
+    return GroupSalesTrendResponse(
+        period_start=start_date,
+        period_end=end_date,
+        granularity=granularity,
+        locations=[locations[restaurant_id] for restaurant_id in restaurant_ids],
+        trends=trends,
+        total_sales=total_sales,
+        total_revenue=sum((location.total_revenue for location in locations.values()), Decimal(0)),
+        total_profit=_sum_known(location.total_profit for location in locations.values()),
+        avg_daily_sales=total_sales / num_days
+    )
+
+
+def _inventory_health_query(restaurant_id: UUID, velocity_days: int, today: date):
+    """Build the inventory query: every wine with its sales in the velocity window"""
+    start_date = today - timedelta(days=velocity_days)
+    
+    # Bottles sold per wine within the velocity window
+    window_sales = select(
+        DailyWineSales.wine_id.label('wine_id'),
+        func.sum(DailyWineSales.bottles_sold).label('bottles_sold')
+    ).where(
+        and_(
+            DailyWineSales.restaurant_id == restaurant_id,
+            DailyWineSales.sale_date >= start_date,
+            DailyWineSales.sale_date <= today
         )
-        
-        health_metrics.append(InventoryHealth(
-            wine_id=wine.id,
-            wine_name=wine.name,
-            current_inventory=wine.inventory_count,
-            avg_daily_sales=round(avg_daily_sales, 2),
-            days_until_stockout=days_until_stockout,
-            reorder_recommended=reorder_recommended,
-            overstocked=overstocked
-        ))
+    ).group_by(DailyWineSales.wine_id).subquery()
+    
+    # Join the aggregate back onto the wine list (wines without sales get 0)
+    return select(
+        Wine.id,
+        Wine.name,
+        func.coalesce(Wine.inventory_count, 0).label('inventory_count'),
+        func.coalesce(window_sales.c.bottles_sold, 0).label('bottles_sold')
+    ).outerjoin(
+        window_sales, window_sales.c.wine_id == Wine.id
+    ).where(Wine.restaurant_id == restaurant_id)
+
+
+def _inventory_health(wine, velocity_days: int) -> dict:
+    """
+    Health metrics and recommendations for one row of the inventory query
+    
+    Returned as a dict of `InventoryHealth` fields: the report is unbounded,
+    so it is encoded straight from these rather than through the model.
+    """
+    avg_daily_sales = float(wine.bottles_sold) / float(velocity_days)
+    
+    # Calculate days until stockout
+    days_until_stockout = None
+    if avg_daily_sales > 0:
+        days_until_stockout = int(wine.inventory_count / avg_daily_sales)
+    
+    # Determine if reorder needed (< 7 days of inventory)
+    reorder_recommended = (
+        days_until_stockout is not None and 
+        days_until_stockout < 7 and 
+        avg_daily_sales > 0
+    )
+    
+    # Determine if overstocked (> 90 days of inventory or no sales)
+    overstocked = (
+        wine.inventory_count > 20 and 
+        (avg_daily_sales == 0 or (days_until_stockout is not None and days_until_stockout > 90))
+    )
+    
+    return {
+        'wine_id': wine.id,
+        'wine_name': wine.name,
+        'current_inventory': wine.inventory_count,
+        'avg_daily_sales': round(avg_daily_sales, 2),
+        'days_until_stockout': days_until_stockout,
+        'reorder_recommended': reorder_recommended,
+        'overstocked': overstocked,
+    }
+
+
+@router.get("/inventory-health/{restaurant_id}", response_model=list[InventoryHealth])
+@cached_analytics
+async def get_inventory_health(
+    restaurant_id: UUID,
+    velocity_days: int = Query(30, ge=1, le=365),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Analyze inventory health and recommend actions
+    
+    Sales velocity is measured over the last `velocity_days` days and is
+    aggregated for every wine in a single grouped query.
+    """
+    wines = (await db.execute(_inventory_health_query(restaurant_id, velocity_days, date.today()))).all()
+    health_metrics = [_inventory_health(wine, velocity_days) for wine in wines]
     
     # Sort by urgency (reorder recommended first, then by days until stockout)
     health_metrics.sort(
         key=lambda x: (
-            not x.reorder_recommended,
-            x.days_until_stockout if x.days_until_stockout is not None else 999
+            not x['reorder_recommended'],
+            x['days_until_stockout'] if x['days_until_stockout'] is not None else 999
         )
     )
     
-    return health_metrics
+    return FastJSONResponse(health_metrics)
+
+
+@router.get("/inventory-health/{restaurant_id}/export")
+async def export_inventory_health(
+    restaurant_id: UUID,
+    velocity_days: int = Query(30, ge=1, le=365),
+    export_format: str = Query("csv", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Download the inventory health report (wines in name order)"""
+    await _require_restaurant(db, restaurant_id)
+    query = _inventory_health_query(restaurant_id, velocity_days, date.today())\
+        .order_by(Wine.name, Wine.id)
+    return export_response(
+        query,
+        model_columns(InventoryHealth),
+        export_format,
+        filename=f"inventory-health-{restaurant_id}-{date.today()}",
+        convert=lambda row: dict_values(InventoryHealth, _inventory_health(row, velocity_days)),
+        bind=db.bind
+    )
+
+
+@router.get("/reorder-forecast/{restaurant_id}", response_model=list[ReorderForecast])
+@cached_analytics
+async def get_reorder_forecast(
+    restaurant_id: UUID,
+    history_days: int = Query(112, ge=28, le=730),
+    lead_time_days: int = Query(7, ge=1, le=90),
+    cover_days: int = Query(14, ge=1, le=180),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Forecast each wine's demand and recommend when and how much to reorder
+    
+    Unlike inventory-health's flat 30-day average, the forecast follows
+    each wine's weekday pattern and recent trend (see app.services.forecast).
+    The whole restaurant's daily sales over `history_days` come back in one
+    query and are forecast together.
+    """
+    today = date.today()
+    start = today - timedelta(days=history_days)
+    row = (await db.execute(forecast.sales_matrix_query(restaurant_id, start, today))).one()
+    if not row.wine_ids:
+        await _require_restaurant(db, restaurant_id)
+        return FastJSONResponse([])
+    
+    # CPU-bound numpy work; keep the event loop free
+    forecasts = await run_in_threadpool(
+        lambda: forecast.forecast_reorders(
+            forecast.sales_matrix(row, start, history_days), today, lead_time_days, cover_days
+        )
+    )
+    return FastJSONResponse(forecasts)
+
+
+def _profit_period(period: str, start_date: Optional[date], end_date: Optional[date]) -> tuple[date, date]:
+    """Resolve the profit reporting period"""
+    today = date.today()
+    if period == "custom":
+        if not start_date:
+            raise HTTPException(status_code=400, detail="start_date is required for a custom period")
+        period_start = start_date
+        period_end = end_date or today
+    elif period == "ttm":
+        period_end = today
+        period_start = today - relativedelta(months=12)
+    else:
+        period_end = today
+        period_start = date(today.year, 1, 1)
+    
+    if period_start > period_end:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    return period_start, period_end
+
+
+def _profit_analysis(wine, period_start: date, period_end: date) -> dict:
+    """Margins and pricing recommendation for one row of the profit query (`ProfitAnalysis` fields)"""
+    # Calculate profit per bottle
+    profit_per_bottle = wine.price - wine.cost
+    profit_margin = ((wine.price - wine.cost) / wine.price) * 100
+    markup_percentage = ((wine.price - wine.cost) / wine.cost) * 100
+    
+    # Simple pricing recommendation (aim for 60-70% margin)
+    recommended_price = None
+    if profit_margin < 60:
+        # Recommend increasing price to hit 65% margin
+        recommended_price = wine.cost / Decimal("0.35")  # 35% COGS = 65% margin
+    
+    return {
+        'wine_id': wine.id,
+        'wine_name': wine.name,
+        'cost': wine.cost,
+        'price': wine.price,
+        'profit_per_bottle': profit_per_bottle,
+        'profit_margin': float(round(profit_margin, 2)),
+        'markup_percentage': float(round(markup_percentage, 2)),
+        'total_profit_ytd': wine.total_profit,
+        'period_start': period_start,
+        'period_end': period_end,
+        'recommended_price': round(recommended_price, 2) if recommended_price else None,
+    }
 
 
 @router.get("/profit-analysis/{restaurant_id}", response_model=list[ProfitAnalysis])
+@cached_analytics(key_extra=_summary_cache_key)
 async def get_profit_analysis(
     restaurant_id: UUID,
-    db: Session = Depends(get_db)
+    period: str = Query("ytd", pattern="^(ytd|ttm|custom)$"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    source: str = Query("fresh", pattern=SOURCE_PATTERN),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Analyze profit margins and provide pricing recommendations
-    """
-    # Get all wines with cost data
-    wines = db.query(Wine).filter(
-        and_(
-            Wine.restaurant_id == restaurant_id,
-            Wine.cost.isnot(None),
-            Wine.cost > 0
-        )
-    ).all()
     
-    # Calculate YTD profit for each wine
-    year_start = date(date.today().year, 1, 1)
+    Realised profit is computed over `period`: year to date (default),
+    trailing twelve months, or a custom `start_date`/`end_date` range.
     
-    profit_analyses = []
+    `source=materialized` reads the precomputed year-to-date figures
+    instead (period=ytd only), with their refresh time in the
+    `X-Data-As-Of` header; until the first refresh it falls back to a fresh
+    read.
+    """
+    if source == "materialized":
+        if period != "ytd" or start_date or end_date:
+            raise HTTPException(status_code=400, detail="Materialized profit analysis is year to date only")
+        as_of = await _summary_as_of(db, restaurant_id)
+        if as_of is not None:
+            summary = WineProfitSummary
+            wines = (await db.execute(
+                select(
+                    summary.wine_id.label('id'),
+                    summary.wine_name.label('name'),
+                    summary.cost,
+                    summary.price,
+                    summary.total_profit,
+                    summary.period_start,
+                    summary.period_end,
+                ).where(summary.restaurant_id == restaurant_id)
+            )).all()
+            profit_analyses = [_profit_analysis(wine, wine.period_start, wine.period_end) for wine in wines]
+            profit_analyses.sort(key=lambda x: x['profit_margin'])
+            return FastJSONResponse(profit_analyses, headers=_as_of_headers(as_of))
     
-    for wine in wines:
-        # Calculate profit per bottle
-        profit_per_bottle = wine.price - wine.cost
-        profit_margin = ((wine.price - wine.cost) / wine.price) * 100
-        markup_percentage = ((wine.price - wine.cost) / wine.cost) * 100
-        
-        # Get YTD profit
-        ytd_profit_query = db.query(
-            func.sum(Sale.quantity * (Sale.unit_price - Sale.unit_cost)).label('total_profit')
-        ).filter(
-            and_(
-                Sale.wine_id == wine.id,
-                Sale.sale_date >= year_start
-            )
-        ).first()
-        
-        total_profit_ytd = ytd_profit_query.total_profit or 0
-        
-        # Simple pricing recommendation (aim for 60-70% margin)
-        recommended_price = None
-        if profit_margin < 60:
-            # Recommend increasing price to hit 65% margin
-            recommended_price = wine.cost / 0.35  # 35% COGS = 65% margin
-        
-        profit_analyses.append(ProfitAnalysis(
-            wine_id=wine.id,
-            wine_name=wine.name,
-            cost=wine.cost,
-            price=wine.price,
-            profit_per_bottle=profit_per_bottle,
-            profit_margin=round(profit_margin, 2),
-            markup_percentage=round(markup_percentage, 2),
-            total_profit_ytd=total_profit_ytd,
-            recommended_price=round(recommended_price, 2) if recommended_price else None
-        ))
+    period_start, period_end = _profit_period(period, start_date, end_date)
+    
+    wines = (await db.execute(profit_analysis_query(restaurant_id, period_start, period_end))).all()
+    profit_analyses = [_profit_analysis(wine, period_start, period_end) for wine in wines]
     
     # Sort by profit margin (lowest first - need attention)
-    profit_analyses.sort(key=lambda x: x.profit_margin)
+    profit_analyses.sort(key=lambda x: x['profit_margin'])
     
-    return profit_analyses
+    return FastJSONResponse(profit_analyses)
+
+
+@router.get("/profit-analysis/{restaurant_id}/export")
+async def export_profit_analysis(
+    restaurant_id: UUID,
+    period: str = Query("ytd", pattern="^(ytd|ttm|custom)$"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    export_format: str = Query("csv", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Download the profit analysis report (wines in name order)"""
+    period_start, period_end = _profit_period(period, start_date, end_date)
+    await _require_restaurant(db, restaurant_id)
+    query = profit_analysis_query(restaurant_id, period_start, period_end)\
+        .order_by(Wine.name, Wine.id)
+    return export_response(
+        query,
+        model_columns(ProfitAnalysis),
+        export_format,
+        filename=f"profit-analysis-{restaurant_id}-{period_start}-{period_end}",
+        convert=lambda row: dict_values(ProfitAnalysis, _profit_analysis(row, period_start, period_end)),
+        bind=db.bind
+    )
@@ -0,0 +1,95 @@
+"""
+Background CSV import endpoints
+
+Uploads return a job immediately; poll GET /imports/{job_id} for progress.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from typing import Optional
+from uuid import UUID
+
+from app.core.database import get_db, get_async_db
+from app.models import ImportJob, ImportKind, Restaurant
+from app.schemas.import_job import ImportJobResponse
+from app.services.import_jobs import create_job, import_worker
+
+router = APIRouter()
+
+
+def _queue_import(
+    kind: ImportKind,
+    restaurant_id: UUID,
+    file: UploadFile,
+    db: Session,
+) -> ImportJob:
+    # Verify restaurant exists
+    restaurant = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
+    if not restaurant:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    
+    # Check file type
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="File must be a CSV")
+    
+    # Copying the upload to storage is blocking file IO
+    job = create_job(db, restaurant_id, kind, file.file, file.filename)
+    import_worker.notify()
+    return job
+
+
+@router.post("/wines", response_model=ImportJobResponse, status_code=202)
+def import_wines(
+    restaurant_id: UUID,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a wine inventory CSV import
+    
+    Same CSV format as POST /wines/bulk-upload.
+    """
+    return _queue_import(ImportKind.WINES, restaurant_id, file, db)
+
+
+@router.post("/sales", response_model=ImportJobResponse, status_code=202)
+def import_sales(
+    restaurant_id: UUID,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a sales CSV import
+    
+    Same CSV format as POST /sales/bulk-upload.
+    """
+    return _queue_import(ImportKind.SALES, restaurant_id, file, db)
+
+
+@router.get("/", response_model=list[ImportJobResponse])
+async def list_imports(
+    restaurant_id: UUID,
+    status: Optional[str] = Query(None, pattern="^(queued|running|succeeded|failed)$"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List a restaurant's import jobs, newest first"""
+    query = select(ImportJob).where(ImportJob.restaurant_id == restaurant_id)
+    if status:
+        query = query.where(ImportJob.status == status)
+    
+    result = await db.execute(query.order_by(ImportJob.created_at.desc()).limit(limit))
+    return result.scalars().all()
+
+
+@router.get("/{job_id}", response_model=ImportJobResponse)
+async def get_import(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Progress (rows processed, rows/sec, errors so far) or final result of an import"""
+    job = await db.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
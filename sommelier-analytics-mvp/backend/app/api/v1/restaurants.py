@@ -2,12 +2,15 @@
 Restaurant CRUD API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import UUID
 
-from app.core.database import get_db
+from app.core.cache import analytics_cache
+from app.core.database import get_db, get_read_db, record_write
 from app.models import Restaurant
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 router = APIRouter()
 
@@ -21,6 +24,29 @@ class RestaurantCreate(BaseModel):
     city: str | None = None
     state: str | None = None
     zip_code: str | None = None
+    group_id: UUID | None = None  # Shared by locations with the same owner
+    
+    # Analytics settings
+    summary_window_days: int = Field(30, ge=1, le=365)
+    reorder_stock_threshold: int = Field(5, ge=0)
+    overstock_stock_threshold: int = Field(20, ge=0)
+    overstock_sales_threshold: int = Field(5, ge=0)
+
+
+class RestaurantUpdate(BaseModel):
+    """Schema for updating a restaurant (all fields optional)"""
+    name: str | None = None
+    phone: str | None = None
+    address: str | None = None
+    city: str | None = None
+    state: str | None = None
+    zip_code: str | None = None
+    group_id: UUID | None = None
+    
+    summary_window_days: int | None = Field(None, ge=1, le=365)
+    reorder_stock_threshold: int | None = Field(None, ge=0)
+    overstock_stock_threshold: int | None = Field(None, ge=0)
+    overstock_sales_threshold: int | None = Field(None, ge=0)
 
 
 class RestaurantResponse(BaseModel):
@@ -35,13 +61,18 @@ class RestaurantResponse(BaseModel):
     zip_code: str | None
     is_active: bool
     subscription_tier: str
+    group_id: UUID | None
+    summary_window_days: int
+    reorder_stock_threshold: int
+    overstock_stock_threshold: int
+    overstock_sales_threshold: int
     
     class Config:
         from_attributes = True
 
 
 @router.post("/", response_model=RestaurantResponse, status_code=201)
-async def create_restaurant(
+def create_restaurant(
     restaurant: RestaurantCreate,
     db: Session = Depends(get_db)
 ):
@@ -53,14 +84,17 @@ async def create_restaurant(
     
     db_restaurant = Restaurant(**restaurant.model_dump())
     db.add(db_restaurant)
+    db.flush()  # Assigns the id
+    record_write(db, db_restaurant.id)
     db.commit()
     db.refresh(db_restaurant)
+    analytics_cache.invalidate_restaurant(db_restaurant.id)
     
     return db_restaurant
 
 
 @router.get("/{restaurant_id}", response_model=RestaurantResponse)
-async def get_restaurant(
+def get_restaurant(
     restaurant_id: UUID,
     db: Session = Depends(get_db)
 ):
@@ -71,9 +105,33 @@ async def get_restaurant(
     return restaurant
 
 
+@router.put("/{restaurant_id}", response_model=RestaurantResponse)
+def update_restaurant(
+    restaurant_id: UUID,
+    restaurant_update: RestaurantUpdate,
+    db: Session = Depends(get_db)
+):
+    """Update a restaurant (including its analytics settings)"""
+    db_restaurant = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
+    if not db_restaurant:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    
+    # Update only provided fields
+    update_data = restaurant_update.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(db_restaurant, field, value)
+    
+    record_write(db, restaurant_id)
+    db.commit()
+    db.refresh(db_restaurant)
+    analytics_cache.invalidate_restaurant(restaurant_id)
+    
+    return db_restaurant
+
+
 @router.get("/", response_model=list[RestaurantResponse])
 async def list_restaurants(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """List all restaurants (admin endpoint)"""
-    return db.query(Restaurant).all()
+    return (await db.execute(select(Restaurant))).scalars().all()
@@ -2,23 +2,32 @@
 Sales CRUD API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select
 from typing import Optional
-from datetime import date
+from datetime import date, datetime
 from uuid import UUID
-import csv
-import io
 
-from app.core.database import get_db
+from app.core.cache import analytics_cache
+from app.core.database import get_db, get_read_db, record_write
+from app.core.export import EXPORT_FORMAT_PATTERN, export_response, query_columns
+from app.core.pagination import count_rows, decode_cursor, encode_cursor, keyset_page
+from app.core.responses import FastJSONResponse
 from app.models import Sale, Wine, Restaurant
 from app.schemas.sale import SaleCreate, SaleResponse, SaleListResponse
+from app.services import rollup
+from app.services.sales_ingest import SalesIngestor
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
+
+# Listing order (newest first); unique, so it doubles as the keyset cursor
+SALE_SORT_KEY = (Sale.sale_date, Sale.created_at, Sale.id)
+SALE_CURSOR_PARSERS = (date.fromisoformat, datetime.fromisoformat, UUID)
 
 
 @router.post("/", response_model=SaleResponse, status_code=201)
-async def create_sale(
+def create_sale(
     sale: SaleCreate,
     db: Session = Depends(get_db)
 ):
@@ -48,6 +57,9 @@ async def create_sale(
     )
     db.add(db_sale)
     
+    # Keep the daily rollup in step
+    rollup.record_sale(db, db_sale)
+    
     # Update wine's times_sold counter
     wine.times_sold += sale.quantity
     
@@ -55,14 +67,67 @@ async def create_sale(
     if wine.inventory_count >= sale.quantity:
         wine.inventory_count -= sale.quantity
     
+    record_write(db, db_sale.restaurant_id)
     db.commit()
     db.refresh(db_sale)
+    analytics_cache.invalidate_restaurant(db_sale.restaurant_id)
     
     return db_sale
 
 
+@router.get("/export")
+async def export_sales(
+    restaurant_id: UUID,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    wine_id: Optional[UUID] = None,
+    export_format: str = Query("csv", alias="format", pattern=EXPORT_FORMAT_PATTERN),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Download a restaurant's sales as CSV, NDJSON or Parquet
+    
+    Rows stream from a server-side cursor in (sale_date, created_at, id)
+    order, oldest first, so exports of any size run in constant memory.
+    """
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    if not await db.get(Restaurant, restaurant_id):
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    
+    query = select(
+        Sale.id.label('sale_id'),
+        Sale.sale_date,
+        Sale.wine_id,
+        Wine.name.label('wine_name'),
+        Sale.quantity,
+        Sale.unit_price,
+        Sale.total_amount,
+        Sale.unit_cost,
+        Sale.server_name,
+        Sale.table_number,
+        Sale.pos_transaction_id,
+        Sale.created_at,
+    ).join(Wine, Wine.id == Sale.wine_id).where(Sale.restaurant_id == restaurant_id)
+    if start_date:
+        query = query.where(Sale.sale_date >= start_date)
+    if end_date:
+        query = query.where(Sale.sale_date <= end_date)
+    if wine_id:
+        query = query.where(Sale.wine_id == wine_id)
+    query = query.order_by(*SALE_SORT_KEY)
+    
+    return export_response(
+        query,
+        query_columns(query),
+        export_format,
+        filename=f"sales-{restaurant_id}-{start_date or 'start'}-{end_date or 'end'}",
+        bind=db.bind
+    )
+
+
 @router.get("/{sale_id}", response_model=SaleResponse)
-async def get_sale(
+def get_sale(
     sale_id: UUID,
     db: Session = Depends(get_db)
 ):
@@ -81,48 +146,82 @@ async def list_sales(
     wine_id: Optional[UUID] = None,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    count: Optional[str] = Query(None, pattern="^(exact|estimate|none)$"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     List sales for a restaurant with filtering and pagination
+    
+    Offset pagination (`page`) by default. Passing `cursor` (empty for the
+    first page, then the previous response's `next_cursor`) switches to
+    keyset pagination on (sale_date, created_at, id), newest first, which
+    costs the same however deep the client scrolls. `count` picks how the
+    total is computed: exact (default for pages), estimate, or none
+    (default for cursors).
     """
     # Base query
-    query = db.query(Sale).filter(Sale.restaurant_id == restaurant_id)
+    query = select(Sale).where(Sale.restaurant_id == restaurant_id)
     
     # Date filters
     if start_date:
-        query = query.filter(Sale.sale_date >= start_date)
+        query = query.where(Sale.sale_date >= start_date)
     if end_date:
-        query = query.filter(Sale.sale_date <= end_date)
+        query = query.where(Sale.sale_date <= end_date)
     
     # Wine filter
     if wine_id:
-        query = query.filter(Sale.wine_id == wine_id)
+        query = query.where(Sale.wine_id == wine_id)
     
-    # Order by most recent first
-    query = query.order_by(Sale.sale_date.desc(), Sale.created_at.desc())
+    if cursor is not None:
+        # Keyset mode
+        after = decode_cursor("sales", cursor, SALE_CURSOR_PARSERS) if cursor else None
+        count = count or "none"
+        total = await count_rows(db, query, count)
+        
+        page_query = keyset_page(query, SALE_SORT_KEY, after, page_size, descending=True)
+        sales = (await db.execute(page_query)).scalars().all()
+        
+        next_cursor = None
+        if len(sales) > page_size:
+            sales = sales[:page_size]
+            last = sales[-1]
+            next_cursor = encode_cursor("sales", (last.sale_date, last.created_at, last.id))
+        
+        return FastJSONResponse(SaleListResponse(
+            sales=sales,
+            total=total,
+            total_estimated=count == "estimate",
+            page_size=page_size,
+            next_cursor=next_cursor
+        ))
     
     # Get total count
-    total = query.count()
+    count = count or "exact"
+    total = await count_rows(db, query, count)
+    
+    # Order by most recent first
+    query = query.order_by(*[column.desc() for column in SALE_SORT_KEY])
     
     # Paginate
     offset = (page - 1) * page_size
-    sales = query.offset(offset).limit(page_size).all()
+    sales = (await db.execute(query.offset(offset).limit(page_size))).scalars().all()
     
     # Calculate total pages
-    total_pages = (total + page_size - 1) // page_size
+    total_pages = (total + page_size - 1) // page_size if total is not None else None
     
-    return SaleListResponse(
+    return FastJSONResponse(SaleListResponse(
         sales=sales,
         total=total,
+        total_estimated=count == "estimate",
         page=page,
         page_size=page_size,
         total_pages=total_pages
-    )
+    ))
 
 
 @router.delete("/{sale_id}", status_code=204)
-async def delete_sale(
+def delete_sale(
     sale_id: UUID,
     db: Session = Depends(get_db)
 ):
@@ -139,14 +238,20 @@ async def delete_sale(
         # Restore inventory
         wine.inventory_count += db_sale.quantity
     
+    # Reverse the sale in the daily rollup
+    rollup.record_sale(db, db_sale, sign=-1)
+    
+    restaurant_id = db_sale.restaurant_id
     db.delete(db_sale)
+    record_write(db, restaurant_id)
     db.commit()
+    analytics_cache.invalidate_restaurant(restaurant_id)
     
     return None
 
 
 @router.post("/bulk-upload", status_code=201)
-async def bulk_upload_sales(
+def bulk_upload_sales(
     restaurant_id: UUID,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
@@ -158,6 +263,10 @@ async def bulk_upload_sales(
     wine_name,sale_date,quantity,unit_price,unit_cost,server_name,table_number
     
     Note: wine_name must match exactly with a wine in the inventory
+    
+    The file is streamed in batches and loaded with COPY; the upload is
+    committed as a single transaction. Large files should go through
+    POST /imports/sales instead, which returns immediately.
     """
     # Verify restaurant exists
     restaurant = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
@@ -168,72 +277,22 @@ async def bulk_upload_sales(
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
     
-    # Get all wines for this restaurant (for lookup)
-    wines = db.query(Wine).filter(Wine.restaurant_id == restaurant_id).all()
-    wine_lookup = {wine.name.lower(): wine for wine in wines}
-    
-    # Read and parse CSV
-    contents = await file.read()
-    csv_reader = csv.DictReader(io.StringIO(contents.decode('utf-8')))
-    
-    sales_created = 0
-    errors = []
-    
-    for row_num, row in enumerate(csv_reader, start=2):  # Start at 2 (after header)
-        try:
-            # Look up wine by name
-            wine_name = row.get('wine_name', '').strip()
-            wine = wine_lookup.get(wine_name.lower())
-            
-            if not wine:
-                errors.append(f"Row {row_num}: Wine '{wine_name}' not found in inventory")
-                continue
-            
-            # Parse date
-            from datetime import datetime
-            sale_date = datetime.strptime(row['sale_date'], '%Y-%m-%d').date()
-            
-            # Parse numeric fields
-            quantity = int(row['quantity'])
-            unit_price = float(row['unit_price'])
-            unit_cost = float(row['unit_cost']) if row.get('unit_cost') else None
-            
-            # Calculate total
-            total_amount = unit_price * quantity
-            
-            # Create sale
-            db_sale = Sale(
-                restaurant_id=restaurant_id,
-                wine_id=wine.id,
-                sale_date=sale_date,
-                quantity=quantity,
-                unit_price=unit_price,
-                unit_cost=unit_cost,
-                total_amount=total_amount,
-                server_name=row.get('server_name') or None,
-                table_number=row.get('table_number') or None
-            )
-            db.add(db_sale)
-            
-            # Update wine stats
-            wine.times_sold += quantity
-            if wine.inventory_count >= quantity:
-                wine.inventory_count -= quantity
-            
-            sales_created += 1
-            
-        except Exception as e:
-            errors.append(f"Row {row_num}: {str(e)}")
-    
-    # Commit all sales
+    # Plain `def`: FastAPI runs the whole handler (restaurant check, parse,
+    # load and commit) in the threadpool, off the event loop
+    ingestor = SalesIngestor(db, restaurant_id)
     try:
+        result = ingestor.ingest(file.file)
+        record_write(db, restaurant_id)
         db.commit()
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Database error: {str(e)}")
     
+    analytics_cache.invalidate_restaurant(restaurant_id)
+    
     return {
-        "message": f"Successfully uploaded {sales_created} sales",
-        "sales_created": sales_created,
-        "errors": errors if errors else None
+        "message": f"Successfully uploaded {result.rows_loaded} sales",
+        "sales_created": result.rows_loaded,
+        "rows_per_second": round(result.rows_per_second, 1),
+        "errors": result.error_summary()
     }
@@ -2,22 +2,29 @@
 Wine CRUD API endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, select
 from typing import Optional
 from uuid import UUID
-import csv
-import io
 
-from app.core.database import get_db
+from app.core.cache import analytics_cache
+from app.core.database import get_db, get_read_db, record_write
+from app.core.pagination import count_rows, decode_cursor, encode_cursor, keyset_page
+from app.core.responses import FastJSONResponse
 from app.models import Wine, Restaurant
 from app.schemas.wine import WineCreate, WineUpdate, WineResponse, WineListResponse
+from app.services.wine_ingest import WineIngestor
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
+
+# Listing order; unique, so it doubles as the keyset cursor
+WINE_SORT_KEY = (Wine.name, Wine.id)
+WINE_CURSOR_PARSERS = (str, UUID)
 
 
 @router.post("/", response_model=WineResponse, status_code=201)
-async def create_wine(
+def create_wine(
     wine: WineCreate,
     db: Session = Depends(get_db)
 ):
@@ -30,14 +37,16 @@ async def create_wine(
     # Create wine
     db_wine = Wine(**wine.model_dump())
     db.add(db_wine)
+    record_write(db, db_wine.restaurant_id)
     db.commit()
     db.refresh(db_wine)
+    analytics_cache.invalidate_restaurant(db_wine.restaurant_id)
     
     return db_wine
 
 
 @router.get("/{wine_id}", response_model=WineResponse)
-async def get_wine(
+def get_wine(
     wine_id: UUID,
     db: Session = Depends(get_db)
 ):
@@ -55,18 +64,25 @@ async def list_wines(
     page_size: int = Query(50, ge=1, le=100),
     search: Optional[str] = None,
     wine_type: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    count: Optional[str] = Query(None, pattern="^(exact|estimate|none)$"),
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     List wines for a restaurant with pagination and filtering
+    
+    Wines are listed by name. Passing `cursor` (empty for the first page,
+    then the previous response's `next_cursor`) switches from offset to
+    keyset pagination on (name, id). `count` is exact (default for pages),
+    estimate, or none (default for cursors).
     """
     # Base query
-    query = db.query(Wine).filter(Wine.restaurant_id == restaurant_id)
+    query = select(Wine).where(Wine.restaurant_id == restaurant_id)
     
     # Search filter
     if search:
         search_pattern = f"%{search}%"
-        query = query.filter(
+        query = query.where(
             or_(
                 Wine.name.ilike(search_pattern),
                 Wine.producer.ilike(search_pattern),
@@ -77,29 +93,55 @@ async def list_wines(
     
     # Type filter
     if wine_type:
-        query = query.filter(Wine.wine_type == wine_type)
+        query = query.where(Wine.wine_type == wine_type)
+    
+    if cursor is not None:
+        # Keyset mode
+        after = decode_cursor("wines", cursor, WINE_CURSOR_PARSERS) if cursor else None
+        count = count or "none"
+        total = await count_rows(db, query, count)
+        
+        page_query = keyset_page(query, WINE_SORT_KEY, after, page_size)
+        wines = (await db.execute(page_query)).scalars().all()
+        
+        next_cursor = None
+        if len(wines) > page_size:
+            wines = wines[:page_size]
+            last = wines[-1]
+            next_cursor = encode_cursor("wines", (last.name, last.id))
+        
+        return FastJSONResponse(WineListResponse(
+            wines=wines,
+            total=total,
+            total_estimated=count == "estimate",
+            page_size=page_size,
+            next_cursor=next_cursor
+        ))
     
     # Get total count
-    total = query.count()
+    count = count or "exact"
+    total = await count_rows(db, query, count)
     
-    # Paginate
+    # Paginate (alphabetical, same order as cursor mode)
     offset = (page - 1) * page_size
-    wines = query.offset(offset).limit(page_size).all()
+    query = query.order_by(*WINE_SORT_KEY)
+    wines = (await db.execute(query.offset(offset).limit(page_size))).scalars().all()
     
     # Calculate total pages
-    total_pages = (total + page_size - 1) // page_size
+    total_pages = (total + page_size - 1) // page_size if total is not None else None
     
-    return WineListResponse(
+    return FastJSONResponse(WineListResponse(
         wines=wines,
         total=total,
+        total_estimated=count == "estimate",
         page=page,
         page_size=page_size,
         total_pages=total_pages
-    )
+    ))
 
 
 @router.put("/{wine_id}", response_model=WineResponse)
-async def update_wine(
+def update_wine(
     wine_id: UUID,
     wine_update: WineUpdate,
     db: Session = Depends(get_db)
@@ -114,14 +156,16 @@ async def update_wine(
     for field, value in update_data.items():
         setattr(db_wine, field, value)
     
+    record_write(db, db_wine.restaurant_id)
     db.commit()
     db.refresh(db_wine)
+    analytics_cache.invalidate_restaurant(db_wine.restaurant_id)
     
     return db_wine
 
 
 @router.delete("/{wine_id}", status_code=204)
-async def delete_wine(
+def delete_wine(
     wine_id: UUID,
     db: Session = Depends(get_db)
 ):
@@ -130,14 +174,17 @@ async def delete_wine(
     if not db_wine:
         raise HTTPException(status_code=404, detail="Wine not found")
     
+    restaurant_id = db_wine.restaurant_id
     db.delete(db_wine)
+    record_write(db, restaurant_id)
     db.commit()
+    analytics_cache.invalidate_restaurant(restaurant_id)
     
     return None
 
 
 @router.post("/bulk-upload", status_code=201)
-async def bulk_upload_wines(
+def bulk_upload_wines(
     restaurant_id: UUID,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
@@ -147,6 +194,9 @@ async def bulk_upload_wines(
     
     Expected CSV format:
     name,producer,vintage,varietal,region,country,wine_type,body,price,cost,inventory_count
+    
+    Large files should go through POST /imports/wines instead, which
+    returns immediately.
     """
     # Verify restaurant exists
     restaurant = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
@@ -157,47 +207,21 @@ async def bulk_upload_wines(
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
     
-    # Read and parse CSV
-    contents = await file.read()
-    csv_reader = csv.DictReader(io.StringIO(contents.decode('utf-8')))
-    
-    wines_created = 0
-    errors = []
-    
-    for row_num, row in enumerate(csv_reader, start=2):  # Start at 2 (after header)
-        try:
-            # Create wine from row
-            wine_data = {
-                'restaurant_id': restaurant_id,
-                'name': row.get('name'),
-                'producer': row.get('producer') or None,
-                'vintage': int(row['vintage']) if row.get('vintage') else None,
-                'varietal': row.get('varietal') or None,
-                'region': row.get('region') or None,
-                'country': row.get('country') or None,
-                'wine_type': row.get('wine_type') or None,
-                'body': row.get('body') or None,
-                'price': float(row['price']),
-                'cost': float(row['cost']) if row.get('cost') else None,
-                'inventory_count': int(row.get('inventory_count', 0)),
-            }
-            
-            db_wine = Wine(**wine_data)
-            db.add(db_wine)
-            wines_created += 1
-            
-        except Exception as e:
-            errors.append(f"Row {row_num}: {str(e)}")
-    
-    # Commit all wines
+    # Plain `def`: FastAPI runs the whole handler (restaurant check, parse,
+    # load and commit) in the threadpool, off the event loop
+    ingestor = WineIngestor(db, restaurant_id)
     try:
+        result = ingestor.ingest(file.file)
+        record_write(db, restaurant_id)
         db.commit()
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=f"Database error: {str(e)}")
     
+    analytics_cache.invalidate_restaurant(restaurant_id)
+    
     return {
-        "message": f"Successfully uploaded {wines_created} wines",
-        "wines_created": wines_created,
-        "errors": errors if errors else None
+        "message": f"Successfully uploaded {result.rows_loaded} wines",
+        "wines_created": result.rows_loaded,
+        "errors": result.error_summary()
     }
@@ -0,0 +1,300 @@
+"""
+Result cache for analytics endpoints
+
+Cached entries are keyed by endpoint, restaurant, query parameters and the
+restaurant's data version. Write endpoints bump the version, so entries
+computed before a write are never served afterwards by a process that sees
+the bump; they simply age out of the backend via LRU/TTL eviction.
+
+The version counters live in the backend. The bundled one is in-process, so
+with several workers a write only bumps the version in the worker that
+handled it, and the others would keep serving (and 304-ing) results from
+before it. The cache is therefore off unless ANALYTICS_CACHE_ENABLED is set,
+which is only safe with a single worker process or a shared backend plugged
+in with `analytics_cache.set_backend`. While it is off, responses still get
+an ETag, taken from the body, and conditional GETs are answered after the
+endpoint has run.
+"""
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Optional
+from uuid import UUID
+import functools
+import hashlib
+import inspect
+import json
+import threading
+import time
+import uuid
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import Response
+
+from app.core.compression import strip_encoding_suffix
+from app.core.config import settings
+from app.core.responses import dumps, encoded_json_response
+
+
+class CacheBackend(ABC):
+    """
+    Storage interface for the analytics cache
+    
+    Values are JSON-compatible (response bodies are stored as encoded JSON
+    text), so a shared backend (Redis, Memcached, ...) only needs to
+    serialise them. Version counters must be shared by every worker for
+    invalidation to be global.
+    
+    `epoch` names the lifetime of the version counters. ETags embed it, so
+    a tag issued before the counters were reset (e.g. a process restart
+    with the in-memory backend) can never match again.
+    """
+    
+    epoch: str = "shared"
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss / expired entry"""
+    
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        """Store a value for `ttl` seconds"""
+    
+    @abstractmethod
+    def get_version(self, namespace: str) -> int:
+        """Return the current data version for a namespace"""
+    
+    @abstractmethod
+    def bump_version(self, namespace: str) -> int:
+        """Atomically increment and return the data version for a namespace"""
+    
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry and version counter"""
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    Bounded in-process LRU cache with per-entry TTL
+    
+    Only suitable when a single process serves the API; with several uvicorn
+    workers, use a shared backend so invalidations reach every worker.
+    """
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Counters restart from zero with the process
+        self.epoch = uuid.uuid4().hex
+    
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get_version(self, namespace: str) -> int:
+        with self._lock:
+            return self._versions.get(namespace, 0)
+    
+    def bump_version(self, namespace: str) -> int:
+        with self._lock:
+            version = self._versions.get(namespace, 0) + 1
+            self._versions[namespace] = version
+            return version
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class AnalyticsCache:
+    """Facade used by the routers; the backend can be swapped at runtime"""
+    
+    def __init__(self, backend: CacheBackend, ttl: int, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+    
+    def set_backend(self, backend: CacheBackend) -> None:
+        """Plug in a different backend (e.g. a shared one, or a test fake)"""
+        self.backend = backend
+    
+    @staticmethod
+    def _namespace(restaurant_id: UUID) -> str:
+        return f"restaurant:{restaurant_id}"
+    
+    def make_key(self, endpoint: str, restaurant_id: UUID, params: dict) -> str:
+        """Build a key that changes whenever the restaurant's data changes"""
+        version = self.backend.get_version(self._namespace(restaurant_id))
+        # Defaulted date windows are relative to today, so today is part of the key
+        payload = json.dumps(
+            {'params': jsonable_encoder(params), 'today': date.today().isoformat()},
+            sort_keys=True
+        )
+        digest = hashlib.sha1(payload.encode()).hexdigest()
+        return f"analytics:{restaurant_id}:v{version}:{endpoint}:{digest}"
+    
+    def make_group_key(self, endpoint: str, restaurant_ids: list[UUID], params: dict) -> str:
+        """Build a key that changes whenever any of the restaurants' data changes"""
+        versions = [
+            f"{restaurant_id}:{self.backend.get_version(self._namespace(restaurant_id))}"
+            for restaurant_id in sorted(restaurant_ids)
+        ]
+        payload = json.dumps(
+            {'params': jsonable_encoder(params), 'today': date.today().isoformat(), 'versions': versions},
+            sort_keys=True
+        )
+        digest = hashlib.sha1(payload.encode()).hexdigest()
+        return f"analytics:group:{endpoint}:{digest}"
+    
+    def etag(self, key: str) -> str:
+        """Strong ETag for the response cached under `key`"""
+        digest = hashlib.sha1(f"{self.backend.epoch}:{key}".encode()).hexdigest()
+        return f'"{digest[:32]}"'
+    
+    def get(self, key: str) -> Optional[Any]:
+        return self.backend.get(key)
+    
+    def set(self, key: str, value: Any) -> None:
+        self.backend.set(key, value, self.ttl)
+    
+    def invalidate_restaurant(self, restaurant_id: UUID) -> None:
+        """Make every cached result for a restaurant unreachable"""
+        self.backend.bump_version(self._namespace(restaurant_id))
+
+
+analytics_cache = AnalyticsCache(
+    backend=InMemoryCacheBackend(max_entries=settings.ANALYTICS_CACHE_MAX_ENTRIES),
+    ttl=settings.ANALYTICS_CACHE_TTL_SECONDS,
+    enabled=settings.ANALYTICS_CACHE_ENABLED,
+)
+
+
+# Analytics change only through writes that bump the data version
+CACHE_CONTROL = "private, no-cache"
+
+
+def _matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """The If-None-Match entry that matches `etag`, if any (as the client sent it)"""
+    if not if_none_match:
+        return None
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or strip_encoding_suffix(tag) == etag:
+            return tag
+    return None
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': CACHE_CONTROL})
+
+
+def _body_etag(body: bytes) -> str:
+    """Strong ETag of a response body (used while the cache is off)"""
+    return f'"{hashlib.sha1(body).hexdigest()[:32]}"'
+
+
+def cached_analytics(func=None, *, key_extra=None):
+    """
+    Cache an analytics endpoint's response and answer conditional GETs
+    
+    The endpoint must take `restaurant_id` (or `restaurant_ids` for group
+    endpoints); every other argument except the database session becomes part
+    of the cache key. `key_extra`, if given, is awaited with the endpoint's
+    arguments and its result added to the key, for data that changes
+    without a write (e.g. the refresh time of precomputed summaries).
+    
+    With the cache on, the key doubles as a strong ETag: it changes with the
+    restaurant's data version, so a request whose If-None-Match still
+    matches gets a 304 before the endpoint itself runs. The endpoint's
+    dependencies still resolve first, and only they may reach the database:
+    group endpoints look up their member restaurants, `key_extra` may read
+    (e.g. a summary refresh time), and with a read replica `get_read_db`
+    refreshes its lag and write-log snapshot at most once per
+    READ_REPLICA_LAG_CHECK_SECONDS. A single-restaurant 304 is otherwise
+    answered without SQL (tests/test_cache.py checks it). With it off, the
+    ETag is a hash of the body, and a match is answered with a 304 once the
+    endpoint has run (saving the transfer, not the query). The request is
+    injected by adding a parameter to the endpoint's signature.
+    
+    The encoded body (and any headers the endpoint set) is cached, and both
+    hits and misses are returned as a ready-made JSON response. A hit
+    therefore costs no validation or encoding at all, and a miss is encoded
+    once with orjson.
+    """
+    if func is None:
+        return functools.partial(cached_analytics, key_extra=key_extra)
+    
+    @functools.wraps(func)
+    async def wrapper(*args, __request: Request, **kwargs):
+        if_none_match = __request.headers.get('if-none-match')
+        key = etag = cached = None
+        if analytics_cache.enabled:
+            params = {name: value for name, value in kwargs.items() if name != 'db'}
+            if key_extra is not None:
+                params['extra'] = await key_extra(**kwargs)
+            if 'restaurant_ids' in kwargs:
+                key = analytics_cache.make_group_key(func.__name__, kwargs['restaurant_ids'], params)
+            else:
+                key = analytics_cache.make_key(func.__name__, kwargs['restaurant_id'], params)
+            etag = analytics_cache.etag(key)
+            
+            matched = _matching_etag(if_none_match, etag)
+            if matched:
+                return _not_modified(matched)
+            cached = analytics_cache.get(key)
+        
+        if cached is not None:
+            body, headers = cached['body'].encode(), cached['headers']
+        else:
+            result = await func(*args, **kwargs)
+            if isinstance(result, Response):
+                body = result.body
+                headers = {
+                    name: value for name, value in result.headers.items()
+                    if name not in ('content-length', 'content-type')
+                }
+            else:
+                body, headers = dumps(result), {}
+            if key is not None:
+                analytics_cache.set(key, {'body': body.decode(), 'headers': headers})
+        
+        if etag is None:
+            etag = _body_etag(body)
+            matched = _matching_etag(if_none_match, etag)
+            if matched:
+                return _not_modified(matched)
+        
+        response = encoded_json_response(body)
+        response.headers.update(headers)
+        response.headers['ETag'] = etag
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        return response
+    
+    signature = inspect.signature(func)
+    wrapper.__signature__ = signature.replace(parameters=[
+        *signature.parameters.values(),
+        inspect.Parameter('__request', inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+    ])
+    return wrapper
@@ -0,0 +1,172 @@
+"""
+Brotli / gzip response compression
+
+Like Starlette's GZipMiddleware, but negotiates brotli when the client
+accepts it (and the `brotli` package is installed), uses levels suited to
+dynamic responses rather than maximum compression, flushes each chunk of a
+streaming response so exports still arrive progressively, and leaves
+already-compressed media types (Parquet) alone.
+
+A compressed body is a different representation from the identity one, so
+its ETag gets the coding appended (`"abc"` -> `"abc-br"`), as Apache does;
+`strip_encoding_suffix` recovers the original tag when checking
+If-None-Match.
+"""
+from typing import Optional
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Already compressed; recompressing costs CPU for nothing
+UNCOMPRESSIBLE_MEDIA_TYPES = {"application/vnd.apache.parquet"}
+
+
+class _Compressor:
+    """Incremental gzip or brotli encoder"""
+    
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    
+    def chunk(self, data: bytes) -> bytes:
+        """Compress and flush, so the client can decode everything sent so far"""
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+    
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush()
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred supported coding the client accepts (q=0 means refused)"""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+    for coding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def strip_encoding_suffix(tag: str) -> str:
+    """Entity tag as set by the application, without a content-coding suffix"""
+    for coding in ("br", "gzip"):
+        suffix = f'-{coding}"'
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1000,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            encoding = choose_encoding(Headers(scope=scope).get("Accept-Encoding", ""))
+            if encoding:
+                responder = _CompressionResponder(
+                    self.app, encoding, self.minimum_size,
+                    _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                )
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int, compressor: _Compressor) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.compressor = compressor
+        self.send: Optional[Send] = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+    
+    def _compressed_headers(self) -> MutableHeaders:
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("ETag")
+        if etag and etag.endswith('"'):
+            headers["ETag"] = f'{etag[:-1]}-{self.encoding}"'
+        return headers
+    
+    async def send_compressed(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Hold the headers until the first body chunk shows how to send it
+            self.initial_message = message
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("Content-Type", "").split(";")[0].strip()
+            self.passthrough = "content-encoding" in headers or media_type in UNCOMPRESSIBLE_MEDIA_TYPES
+        elif message_type != "http.response.body":
+            await self.send(message)
+        elif self.passthrough:
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+        elif not self.started:
+            self.started = True
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if len(body) < self.minimum_size and not more_body:
+                # Not worth compressing (also covers 304 and other empty bodies)
+                self.passthrough = True
+                await self.send(self.initial_message)
+                await self.send(message)
+            elif not more_body:
+                body = self.compressor.finish(body)
+                headers = self._compressed_headers()
+                headers["Content-Length"] = str(len(body))
+                message["body"] = body
+                await self.send(self.initial_message)
+                await self.send(message)
+            else:
+                # First chunk of a streaming response
+                headers = self._compressed_headers()
+                del headers["Content-Length"]
+                message["body"] = self.compressor.chunk(body)
+                await self.send(self.initial_message)
+                await self.send(message)
+        else:
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            message["body"] = self.compressor.chunk(body) if more_body else self.compressor.finish(body)
+            await self.send(message)
@@ -1,20 +1,106 @@
 """
 Database connection and session management
+
+Pool sizing comes from the DB_POOL_* settings and applies to each engine in
+each worker process. Pool usage is exported on /metrics (app.core.metrics).
+
+With READ_REPLICA_URL set, read-only endpoints take their session from
+`get_read_db`, which uses the replica unless it lags by more than
+READ_REPLICA_MAX_LAG_SECONDS or a restaurant in the request was written
+more recently than the replica's lag (read-your-writes). Every write path
+calls `record_write` before committing, which marks the restaurant in the
+`restaurant_writes` table in the same transaction (`WriteLog`); reads check
+an in-process snapshot of that table, refreshed every
+READ_REPLICA_LAG_CHECK_SECONDS, so routing a read runs no query of its own.
 """
-from sqlalchemy import create_engine
+from typing import Optional
+from uuid import UUID, uuid4
+import logging
+import math
+import threading
+import time
+
+from fastapi import Request
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
 from app.core.config import settings
+from app.core.metrics import READ_ROUTING, REPLICA_LAG_SECONDS, instrument_engine, instrumented_pool_class
+from app.core.slow_queries import slow_query_log
+
+logger = logging.getLogger(__name__)
+
+# asyncpg behind PgBouncer in transaction mode: consecutive statements may
+# run on different server connections, so no statement cache, and unique
+# names for the statements asyncpg still prepares
+PGBOUNCER_ASYNCPG_ARGS = {
+    "statement_cache_size": 0,
+    "prepared_statement_cache_size": 0,
+    "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+}
+
+
+def _engine_options(pool_class: type[Pool], label: str) -> dict:
+    """Pool and logging arguments shared by every engine"""
+    options = {
+        "poolclass": instrumented_pool_class(pool_class, label),
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "echo": settings.DEBUG,  # Log SQL queries in debug mode
+    }
+    if issubclass(pool_class, QueuePool):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    return options
+
+
+# Create engine (psycopg2 never prepares statements, so it pools the same
+# way with or without PgBouncer)
+engine = create_engine(settings.DATABASE_URL, **_engine_options(QueuePool, "primary"))
+
+
+def _create_async_engine(url: str, label: str) -> AsyncEngine:
+    # Behind PgBouncer the bouncer does the pooling
+    if settings.DB_PGBOUNCER:
+        return create_async_engine(url, connect_args=PGBOUNCER_ASYNCPG_ARGS, **_engine_options(NullPool, label))
+    return create_async_engine(url, **_engine_options(AsyncAdaptedQueuePool, label))
+
 
-# Create engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # Verify connections before using
-    echo=settings.DEBUG,  # Log SQL queries in debug mode
+# Async engine (asyncpg) for read-heavy endpoints
+async_engine = _create_async_engine(settings.async_database_url, "primary_async")
+
+# Optional streaming replica for read-only endpoints (see get_read_db)
+replica_async_engine = (
+    _create_async_engine(settings.async_read_replica_url, "replica_async")
+    if settings.async_read_replica_url else None
 )
 
-# Session factory
+# Statement counts and DB time per request on /metrics, and the slow query log
+for _engine in (engine, async_engine, replica_async_engine):
+    if _engine is not None:
+        instrument_engine(getattr(_engine, "sync_engine", _engine))
+        if slow_query_log.enabled:
+            slow_query_log.watch(getattr(_engine, "sync_engine", _engine))
+
+# Session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+ReplicaAsyncSessionLocal = async_sessionmaker(
+    replica_async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+) if replica_async_engine else None
 
 # Base class for models
 Base = declarative_base()
@@ -24,9 +110,252 @@ def get_db():
     """
     Dependency to get database session
     Usage: db: Session = Depends(get_db)
+    
+    The session blocks, so endpoints using it are plain `def` (run in the
+    threadpool) or hand the work to run_in_threadpool. Blocking the event
+    loop on a pool checkout deadlocks once the pool is exhausted: the
+    connections are only returned by teardowns the loop has to schedule.
     """
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Dependency to get an async database session
+    Usage: db: AsyncSession = Depends(get_async_db)
+    
+    Queries are awaited, so the event loop keeps serving other requests
+    while Postgres works.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Seconds of replay lag; 0 when the replica has replayed everything it has
+# received (or is not a replica at all, e.g. a second URL for the primary)
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+
+
+# Upsert, so the table holds one row per restaurant. clock_timestamp(), not
+# now(): the marker is written just before the commit of what may be a long
+# transaction. Returns the restaurant's group for the in-process snapshot.
+RECORD_WRITE_SQL = text("""
+    INSERT INTO restaurant_writes (restaurant_id, written_at) VALUES (:restaurant_id, clock_timestamp())
+    ON CONFLICT (restaurant_id) DO UPDATE SET written_at = excluded.written_at
+    RETURNING (SELECT group_id FROM restaurants WHERE id = :restaurant_id)
+""")
+# Writes within the window, aged by the primary's clock (like the replay lag)
+RECENT_WRITES_SQL = text("""
+    SELECT w.restaurant_id, r.group_id, extract(epoch FROM now() - w.written_at) AS age
+    FROM restaurant_writes w JOIN restaurants r ON r.id = w.restaurant_id
+    WHERE w.written_at > now() - make_interval(secs => :seconds)
+""")
+
+
+class WriteLog:
+    """
+    When restaurants were last written, for read-your-writes routing
+    
+    `record` upserts the restaurant's row in `restaurant_writes` inside the
+    transaction that writes its data, so the marker commits (and replicates)
+    with the write or not at all. Reads never query the table per request:
+    each process loads the writes of the last `window` seconds at most every
+    `refresh_interval` and answers from memory. A process sees its own
+    writes immediately and other workers' writes from its next refresh.
+    """
+    
+    def __init__(self, async_engine: AsyncEngine, window: float, refresh_interval: float):
+        self.async_engine = async_engine
+        self.window = window
+        self.refresh_interval = refresh_interval
+        # restaurant_id -> (group_id, time.monotonic() of the write)
+        self._writes: dict[UUID, tuple[Optional[UUID], float]] = {}
+        self._lock = threading.Lock()
+        self._refreshed_at = -math.inf
+        self._unreachable = False
+    
+    def record(self, db: Session, restaurant_id: UUID) -> None:
+        """Mark the restaurant as written in `db`'s transaction; call right before the commit"""
+        # A new restaurant's row must exist for the foreign key
+        db.flush()
+        group_id = db.execute(RECORD_WRITE_SQL, {"restaurant_id": restaurant_id}).scalar()
+        # Noted before the commit: until then reads of it simply go to the primary
+        self._merge({restaurant_id: (group_id, time.monotonic())})
+    
+    def _merge(self, writes: dict[UUID, tuple[Optional[UUID], float]]) -> None:
+        horizon = time.monotonic() - self.window
+        with self._lock:
+            merged = {
+                restaurant_id: write for restaurant_id, write in self._writes.items() if write[1] > horizon
+            }
+            for restaurant_id, write in writes.items():
+                if restaurant_id not in merged or write[1] > merged[restaurant_id][1]:
+                    merged[restaurant_id] = write
+            self._writes = merged
+    
+    async def refresh(self) -> bool:
+        """Load recent writes if the snapshot is due; False if the primary could not be asked"""
+        if time.monotonic() - self._refreshed_at < self.refresh_interval:
+            return not self._unreachable
+        self._refreshed_at = time.monotonic()
+        try:
+            async with self.async_engine.connect() as conn:
+                rows = (await conn.execute(RECENT_WRITES_SQL, {"seconds": self.window})).all()
+        except Exception:
+            if not self._unreachable:
+                logger.warning("Could not load recent writes; reading from the primary", exc_info=True)
+            self._unreachable = True
+            return False
+        self._unreachable = False
+        now = time.monotonic()
+        self._merge({row.restaurant_id: (row.group_id, now - float(row.age)) for row in rows})
+        return True
+    
+    def written_within(self, restaurant_ids: list[UUID], group_id: Optional[UUID], seconds: float) -> bool:
+        """
+        Whether a named restaurant, or one in the group, was written in the last `seconds`
+        
+        A request that names neither (e.g. the restaurant listing) reads
+        every restaurant, so any write counts.
+        """
+        horizon = time.monotonic() - seconds
+        requested = set(restaurant_ids)
+        for restaurant_id, (write_group_id, written_at) in self._writes.items():
+            if written_at <= horizon:
+                continue
+            if (
+                restaurant_id in requested
+                or (group_id is not None and write_group_id == group_id)
+                or (not requested and group_id is None)
+            ):
+                return True
+        return False
+
+
+class ReplicaGuard:
+    """Measures replica lag (at most every `check_interval`) and routes reads"""
+    
+    def __init__(self, engine: AsyncEngine, write_log: WriteLog, max_lag: float, check_interval: float):
+        self.engine = engine
+        self.write_log = write_log
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lag: Optional[float] = None
+        self._checked_at = -math.inf
+        self._unreachable = False
+    
+    async def lag(self) -> Optional[float]:
+        """Replica lag in seconds, or None if it could not be measured"""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            try:
+                async with self.engine.connect() as conn:
+                    lag = (await conn.execute(REPLICA_LAG_SQL)).scalar()
+                if self._unreachable:
+                    logger.info("Read replica reachable again")
+                self._unreachable = False
+                self._lag = float(lag) if lag is not None else None
+            except Exception:
+                # Log once per outage, not on every check
+                if not self._unreachable:
+                    logger.warning("Read replica unreachable; reading from the primary", exc_info=True)
+                self._unreachable = True
+                self._lag = None
+            REPLICA_LAG_SECONDS.set(math.nan if self._lag is None else self._lag)
+        return self._lag
+    
+    async def route(self, restaurant_ids: list[UUID], group_id: Optional[UUID] = None) -> tuple[bool, str]:
+        """
+        Whether to read from the replica, and why
+        
+        `restaurant_ids` and `group_id` are the restaurants the request
+        reads, as named in its path and query.
+        """
+        lag = await self.lag()
+        if lag is None:
+            return False, "replica_unavailable"
+        if lag > self.max_lag:
+            return False, "replica_lagging"
+        if not await self.write_log.refresh():
+            return False, "write_log_unavailable"
+        # Writes within this window may not have been replayed yet (the lag
+        # can have grown since it was measured)
+        if self.write_log.written_within(restaurant_ids, group_id, lag + self.check_interval):
+            return False, "recent_write"
+        return True, "fresh"
+
+
+# Only needed (and only written) when reads can go to a replica. Writes
+# older than the largest lag the replica is used with no longer matter.
+write_log = WriteLog(
+    async_engine,
+    window=settings.READ_REPLICA_MAX_LAG_SECONDS + settings.READ_REPLICA_LAG_CHECK_SECONDS,
+    refresh_interval=settings.READ_REPLICA_LAG_CHECK_SECONDS,
+) if replica_async_engine else None
+
+replica_guard = ReplicaGuard(
+    replica_async_engine,
+    write_log,
+    max_lag=settings.READ_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.READ_REPLICA_LAG_CHECK_SECONDS,
+) if replica_async_engine else None
+
+
+def record_write(db: Session, restaurant_id: UUID) -> None:
+    """
+    Keep the restaurant's reads off a lagging replica once `db` commits
+    
+    Call right before `db.commit()` on every path that writes a
+    restaurant's data; it takes the restaurant's row lock in
+    `restaurant_writes` until the commit. A no-op without a replica.
+    """
+    if write_log:
+        write_log.record(db, restaurant_id)
+
+
+def _request_restaurants(request: Request) -> tuple[list[UUID], Optional[UUID]]:
+    """Restaurants named in the path or query, and the group named in the query"""
+    values = [
+        request.path_params.get("restaurant_id"),
+        *request.query_params.getlist("restaurant_id"),
+        *request.query_params.getlist("restaurant_ids"),
+    ]
+    restaurant_ids = []
+    for value in values:
+        try:
+            restaurant_ids.append(UUID(str(value)))
+        except ValueError:
+            continue
+    try:
+        group_id = UUID(request.query_params["group_id"])
+    except (KeyError, ValueError):
+        group_id = None
+    return restaurant_ids, group_id
+
+
+async def get_read_db(request: Request):
+    """
+    Dependency for read-only endpoints (analytics, listings, exports)
+    Usage: db: AsyncSession = Depends(get_read_db)
+    
+    A session on the read replica when one is configured and fresh enough
+    for this request, otherwise on the primary. Never write through it.
+    """
+    session_factory = AsyncSessionLocal
+    if replica_guard:
+        use_replica, reason = await replica_guard.route(*_request_restaurants(request))
+        READ_ROUTING.labels("replica" if use_replica else "primary", reason).inc()
+        if use_replica:
+            session_factory = ReplicaAsyncSessionLocal
+    async with session_factory() as db:
+        yield db
@@ -0,0 +1,248 @@
+"""
+Streaming CSV / NDJSON / Parquet exports
+
+Rows are read from a server-side cursor EXPORT_BATCH_SIZE at a time, and
+each batch is encoded and handed to the response before the next one is
+fetched, so memory stays flat however many rows an export covers. Parquet
+output gets one row group per batch and its footer at the end.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, Optional, Sequence, Union, get_args, get_origin
+from uuid import UUID
+import csv
+import io
+import logging
+import types
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncEngine
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.core.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+# format -> (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+EXPORT_FORMAT_PATTERN = f"^({'|'.join(EXPORT_FORMATS)})$"
+
+# Money columns are NUMERIC(10, 2) in the database
+CENT = Decimal('0.01')
+ARROW_TYPES = {
+    str: pa.string(),
+    int: pa.int64(),
+    float: pa.float64(),
+    bool: pa.bool_(),
+    Decimal: pa.decimal128(18, 2),
+    date: pa.date32(),
+    datetime: pa.timestamp('us'),
+    UUID: pa.string(),
+}
+
+
+@dataclass
+class ExportColumn:
+    """Name and Python type (a key of ARROW_TYPES) of an exported column"""
+    name: str
+    type: type
+
+
+def query_columns(query: Select) -> list[ExportColumn]:
+    """Columns of a SELECT, typed from its SQLAlchemy column types"""
+    return [ExportColumn(column.name, column.type.python_type) for column in query.selected_columns]
+
+
+def model_columns(model: type[BaseModel]) -> list[ExportColumn]:
+    """Columns of a response model, in field order (Optional[X] exports as X)"""
+    columns = []
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        if get_origin(annotation) in (Union, types.UnionType):
+            annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+        columns.append(ExportColumn(name, annotation))
+    return columns
+
+
+def model_values(instance: BaseModel) -> tuple:
+    """A response model as a row, matching `model_columns`"""
+    return tuple(getattr(instance, name) for name in type(instance).model_fields)
+
+
+def dict_values(model: type[BaseModel], values: dict) -> tuple:
+    """A dict of a response model's fields as a row, matching `model_columns`"""
+    return tuple(values[name] for name in model.model_fields)
+
+
+class ExportWriter(ABC):
+    """Encodes batches of rows (sequences in column order) into bytes"""
+    
+    def __init__(self, columns: list[ExportColumn]):
+        self.columns = columns
+    
+    def begin(self) -> bytes:
+        return b''
+    
+    @abstractmethod
+    def write(self, rows: Sequence[Sequence]) -> bytes:
+        """Encode one batch"""
+    
+    def finish(self) -> bytes:
+        return b''
+
+
+class CsvExportWriter(ExportWriter):
+    """Header row, then one line per row; NULL is an empty field"""
+    
+    def __init__(self, columns: list[ExportColumn]):
+        super().__init__(columns)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        # str() of a date is already ISO 8601; datetimes need the "T"
+        self._datetimes = [i for i, column in enumerate(columns) if column.type is datetime]
+    
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+    
+    def begin(self) -> bytes:
+        self._writer.writerow([column.name for column in self.columns])
+        return self._drain()
+    
+    def write(self, rows: Sequence[Sequence]) -> bytes:
+        if self._datetimes:
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for i in self._datetimes:
+                    if row[i] is not None:
+                        row[i] = row[i].isoformat()
+        self._writer.writerows(rows)
+        return self._drain()
+
+
+class NdjsonExportWriter(ExportWriter):
+    """One JSON object per line, encoded like the JSON API (orjson)"""
+    
+    def write(self, rows: Sequence[Sequence]) -> bytes:
+        names = [column.name for column in self.columns]
+        return b''.join(dumps(dict(zip(names, row))) + b'\n' for row in rows)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file whose contents are handed out chunk by chunk"""
+    
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        # Parquet records absolute offsets, so report bytes written so far
+        return self._position
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetExportWriter(ExportWriter):
+    """One row group per batch; the footer is written by `finish()`"""
+    
+    def __init__(self, columns: list[ExportColumn]):
+        super().__init__(columns)
+        self._schema = pa.schema([(column.name, ARROW_TYPES[column.type]) for column in columns])
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self._schema, compression='snappy')
+    
+    def write(self, rows: Sequence[Sequence]) -> bytes:
+        if not rows:
+            return b''
+        arrays = []
+        for column, values in zip(self.columns, zip(*rows)):
+            if column.type is Decimal:
+                values = [None if value is None else value.quantize(CENT) for value in values]
+            elif column.type is UUID:
+                values = [None if value is None else str(value) for value in values]
+            arrays.append(pa.array(values, type=ARROW_TYPES[column.type]))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+        return self._sink.drain()
+    
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+EXPORT_WRITERS = {
+    "csv": CsvExportWriter,
+    "ndjson": NdjsonExportWriter,
+    "parquet": ParquetExportWriter,
+}
+
+
+async def stream_export(
+    query: Select,
+    columns: list[ExportColumn],
+    export_format: str,
+    convert: Optional[Callable[[Any], Sequence]] = None,
+    bind: AsyncEngine = async_engine,
+) -> AsyncIterator[bytes]:
+    """
+    Encoded export of every row of `query`, batch by batch
+    
+    Runs on its own connection from `bind` (pass the request session's
+    engine, which may be the read replica): the response body is produced
+    after the endpoint and its session have returned. `convert` maps a
+    result row to the exported values.
+    """
+    writer = EXPORT_WRITERS[export_format](columns)
+    yield writer.begin()
+    async with bind.connect() as conn:
+        try:
+            result = await conn.stream(query.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+            async for batch in result.partitions():
+                chunk = writer.write([convert(row) for row in batch] if convert else batch)
+                if chunk:
+                    yield chunk
+        except Exception:
+            # Headers are already sent; the client sees a truncated body
+            logger.exception("Export failed mid-stream")
+            raise
+    yield writer.finish()
+
+
+def export_response(
+    query: Select,
+    columns: list[ExportColumn],
+    export_format: str,
+    filename: str,
+    convert: Optional[Callable[[Any], Sequence]] = None,
+    bind: AsyncEngine = async_engine,
+) -> StreamingResponse:
+    """Stream `query` as a file download named `filename` (plus extension)"""
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        stream_export(query, columns, export_format, convert, bind),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
@@ -0,0 +1,267 @@
+"""
+Prometheus metrics
+
+Served in the text exposition format at GET /metrics. Values are per
+worker process (each uvicorn/gunicorn worker has its own pools), so scrape
+every worker, e.g. one worker per container.
+
+Connection pools: every engine's pool class is wrapped by
+`instrumented_pool_class`, which records
+- db_pool_checkout_seconds: time to get a connection (waiting for one to be
+  returned when the pool is exhausted, or opening a new one)
+- db_pool_overflow_connections_total: connections opened beyond pool_size
+- db_pool_checkout_timeouts_total: checkouts that gave up after pool_timeout
+and the current db_pool_size / db_pool_checked_out / db_pool_checked_in /
+db_pool_overflow gauges, all labelled by pool.
+
+Read replica: db_replica_lag_seconds as last measured, and
+db_read_routing_total by target (replica/primary) and reason.
+
+Requests: `RequestMetricsMiddleware` records, per method and route
+template, latency, response bytes as sent and, through cursor events on
+every engine (`instrument_engine`), the number of SQL statements each
+request ran and the time they took. A route whose statement count grows
+with the data (an N+1) stands out in http_request_db_statements.
+"""
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+import time
+import weakref
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool, QueuePool
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Time to check a connection out of the pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+POOL_OVERFLOW_CONNECTIONS = Counter(
+    "db_pool_overflow_connections",
+    "Connections opened beyond pool_size",
+    ["pool"],
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts",
+    "Checkouts that timed out waiting for a connection",
+    ["pool"],
+)
+REPLICA_LAG_SECONDS = Gauge(
+    "db_replica_lag_seconds",
+    "Replication lag of the read replica when last measured (NaN if unreachable)",
+)
+READ_ROUTING = Counter(
+    "db_read_routing",
+    "Read-only requests by the database they were sent to",
+    ["target", "reason"],
+)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last byte of its response",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements",
+    "SQL statements executed per request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing SQL per request",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+RESPONSE_BYTES = Histogram(
+    "http_response_size_bytes",
+    "Response body size as sent (after compression)",
+    ["method", "route"],
+    buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000),
+)
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "Requests being served")
+SLOW_QUERIES = Counter(
+    "db_slow_queries",
+    "Statements over SLOW_QUERY_THRESHOLD_MS, logged or not (see app.core.slow_queries)",
+    ["route"],
+)
+
+# Live pools by label; an engine's pool is replaced on dispose(), and the
+# newest one wins
+_pools: dict[str, weakref.ref] = {}
+
+
+class _InstrumentedPool:
+    """Mixin for SQLAlchemy pool classes; `metrics_label` is set per subclass"""
+    
+    metrics_label = "default"
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _pools[self.metrics_label] = weakref.ref(self)
+    
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.labels(self.metrics_label).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_SECONDS.labels(self.metrics_label).observe(time.perf_counter() - started)
+    
+    def _inc_overflow(self) -> bool:
+        # QueuePool only; _overflow counts up from -pool_size
+        opened = super()._inc_overflow()
+        if opened and self._overflow > 0:
+            POOL_OVERFLOW_CONNECTIONS.labels(self.metrics_label).inc()
+        return opened
+
+
+def instrumented_pool_class(pool_class: type[Pool], label: str) -> type[Pool]:
+    """`pool_class` reporting its metrics under `label` (pass as `poolclass`)"""
+    return type(
+        f"Instrumented{pool_class.__name__}",
+        (_InstrumentedPool, pool_class),
+        {"metrics_label": label},
+    )
+
+
+class _PoolStateCollector(Collector):
+    """Reads the current size and usage of each queue pool at scrape time"""
+    
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        gauges = {
+            "size": GaugeMetricFamily("db_pool_size", "Configured pool_size", labels=["pool"]),
+            "checked_out": GaugeMetricFamily(
+                "db_pool_checked_out", "Connections currently in use", labels=["pool"]
+            ),
+            "checked_in": GaugeMetricFamily(
+                "db_pool_checked_in", "Idle connections held by the pool", labels=["pool"]
+            ),
+            "overflow": GaugeMetricFamily(
+                "db_pool_overflow", "Open connections beyond pool_size", labels=["pool"]
+            ),
+        }
+        for label, ref in list(_pools.items()):
+            pool = ref()
+            if not isinstance(pool, QueuePool):
+                continue
+            gauges["size"].add_metric([label], pool.size())
+            gauges["checked_out"].add_metric([label], pool.checkedout())
+            gauges["checked_in"].add_metric([label], pool.checkedin())
+            gauges["overflow"].add_metric([label], max(0, pool.overflow()))
+        yield from gauges.values()
+
+
+REGISTRY.register(_PoolStateCollector())
+
+
+@dataclass
+class RequestStats:
+    """SQL activity of the request being served (see `current_request`)"""
+    
+    method: str
+    scope: dict = field(repr=False)
+    statements: int = 0
+    db_seconds: float = 0.0
+    
+    @property
+    def route(self) -> str:
+        """Route template (`/dashboard/{restaurant_id}`), once routing has matched"""
+        route = self.scope.get("route")
+        return route.path if route is not None else "<unmatched>"
+
+
+# Set for the duration of each HTTP request; None in background threads
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # On the execution context, so nothing outlives the statement if it fails
+    context.query_started = time.perf_counter()
+
+
+def _record_statement(context) -> None:
+    elapsed = time.perf_counter() - context.query_started
+    stats = current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    _record_statement(context)
+
+
+def _handle_error(exception_context) -> None:
+    # A failed statement still took a round trip (errors before the cursor
+    # ran, e.g. on connect, have no start time)
+    context = exception_context.execution_context
+    if context is not None and hasattr(context, "query_started"):
+        _record_statement(context)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count statements and DB time per request (pass `.sync_engine` for async engines)"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class RequestMetricsMiddleware:
+    """
+    Records latency, response size and SQL use of every HTTP request
+    
+    Add it last (outermost), so sizes are measured after compression and
+    the time includes every other middleware.
+    """
+    
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats = RequestStats(method=scope["method"], scope=scope)
+        token = current_request.set(stats)
+        status = 500
+        sent = 0
+        
+        async def send_measured(message: Message) -> None:
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+        
+        started = time.perf_counter()
+        REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_measured)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            current_request.reset(token)
+            route = stats.route
+            REQUEST_SECONDS.labels(stats.method, route, str(status)).observe(time.perf_counter() - started)
+            REQUEST_DB_STATEMENTS.labels(stats.method, route).observe(stats.statements)
+            REQUEST_DB_SECONDS.labels(stats.method, route).observe(stats.db_seconds)
+            RESPONSE_BYTES.labels(stats.method, route).observe(sent)
+
+
+def metrics_response() -> Response:
+    """Current values of every registered metric"""
+    # As a header: Starlette would append a second charset to the media type
+    return Response(generate_latest(REGISTRY), headers={"Content-Type": CONTENT_TYPE_LATEST})
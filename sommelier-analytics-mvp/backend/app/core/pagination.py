@@ -0,0 +1,89 @@
+"""
+Keyset (cursor) pagination helpers
+
+A cursor is the sort key of the last row on a page, JSON-encoded and
+base64url'd so clients treat it as opaque. The next page is fetched with
+`WHERE (k1, k2, ...) < (:v1, :v2, ...) ORDER BY k1, k2, ... LIMIT n`, which
+an index on the sort key answers by reading n rows however deep the client
+has scrolled (OFFSET reads and discards every earlier row).
+"""
+from typing import Any, Callable, Optional, Sequence
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+
+def encode_cursor(kind: str, values: Sequence[Any]) -> str:
+    """Opaque cursor for the row with sort key `values`"""
+    payload = json.dumps([kind, [str(value) for value in values]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(kind: str, cursor: str, parsers: Sequence[Callable[[str], Any]]) -> tuple:
+    """Sort key from a cursor produced by `encode_cursor` (400 if it isn't one)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_kind, values = json.loads(base64.urlsafe_b64decode(padded))
+        if cursor_kind != kind or len(values) != len(parsers):
+            raise ValueError(cursor_kind)
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_page(
+    query: Select,
+    columns: Sequence,
+    after: Optional[tuple],
+    page_size: int,
+    descending: bool = False,
+) -> Select:
+    """
+    Order by `columns` and return the page following the key `after`
+    
+    One extra row is fetched so the caller can tell whether another page
+    exists. All columns sort in the same direction, which lets Postgres use a
+    row-value comparison and a single index range scan.
+    """
+    if after is not None:
+        key = tuple_(*columns)
+        query = query.where(key < tuple_(*after) if descending else key > tuple_(*after))
+    order = [column.desc() for column in columns] if descending else list(columns)
+    return query.order_by(*order).limit(page_size + 1)
+
+
+class ExplainJson(Executable, ClauseElement):
+    """`EXPLAIN (FORMAT JSON)` of a query, executed with the query's bound parameters"""
+    
+    inherit_cache = False
+    
+    def __init__(self, query: Select):
+        self.query = query
+
+
+@compiles(ExplainJson, "postgresql")
+def _compile_explain_json(element: ExplainJson, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.query, **kw)
+
+
+async def count_rows(db: AsyncSession, query: Select, mode: str) -> Optional[int]:
+    """
+    Total rows matched by `query`
+    
+    mode is "exact" (COUNT(*)), "estimate" (the planner's row estimate, no
+    scan) or "none".
+    """
+    if mode == "exact":
+        return (await db.execute(select(func.count()).select_from(query.subquery()))).scalar()
+    if mode == "estimate":
+        plan = (await db.execute(ExplainJson(query))).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    return None
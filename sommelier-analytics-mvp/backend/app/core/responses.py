@@ -0,0 +1,48 @@
+"""
+Fast JSON responses
+
+FastAPI's default path for a returned Pydantic model validates it against
+`response_model` a second time, serialises it to plain Python, and then
+encodes that with the stdlib `json` module. Routers that return large
+bodies opt out of all three by returning a `FastJSONResponse` themselves:
+orjson encodes dicts, lists, UUIDs and dates natively, and models are
+dumped once. The output is the same JSON the default path produces
+(Decimals are strings, as in Pydantic's JSON mode).
+
+Benchmark against the default path with:
+    python -m benchmarks.serialization
+"""
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from starlette.responses import Response
+import orjson
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    # asyncpg returns its own UUID subclass, which orjson does not take natively
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode a response body (dicts, lists, models, UUIDs, dates, Decimals)"""
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson-encoded response that also accepts Decimals and Pydantic models"""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def encoded_json_response(body: bytes) -> Response:
+    """Response for a body that is already encoded JSON (e.g. from the cache)"""
+    return Response(content=body, media_type=FastJSONResponse.media_type)
@@ -0,0 +1,228 @@
+"""
+Slow query log
+
+Statements that take longer than SLOW_QUERY_THRESHOLD_MS are logged to the
+`app.slow_queries` logger as one JSON object per line:
+
+    {"event": "slow_query", "duration_ms": 1834.2, "route": "GET /api/v1/analytics/dashboard/{restaurant_id}",
+     "thread": "MainThread", "statement": "SELECT ...", "parameters": {"restaurant_id_1": "a3f...", ...},
+     "plan": [...]}
+
+`route` is the route template of the request that issued the statement
+(null for background work, where `thread` tells the refresher, partition
+maintainer and import workers apart). Every slow statement is counted in
+db_slow_queries_total on /metrics; only a sample is logged, so the log is
+safe to leave on under load:
+
+- SLOW_QUERY_SAMPLE_RATE: fraction of slow statements logged
+- SLOW_QUERY_MAX_PER_MINUTE: per-process cap on logged statements
+
+Parameters are redacted unless SLOW_QUERY_REDACT_PARAMETERS is off: ids,
+numbers, dates and booleans are kept (they are what a query is slow *for*),
+strings become `<str len=N>` and string literals in the statement `'?'`.
+
+With SLOW_QUERY_EXPLAIN, a sample (SLOW_QUERY_EXPLAIN_SAMPLE_RATE) of the
+logged SELECTs is run again under `EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`
+(only plain reads: not row-locking SELECT ... FOR UPDATE/SHARE, not
+data-modifying CTEs; see `is_read_only`) on the same connection, inside a savepoint that is rolled back, with
+statement_timeout set to SLOW_QUERY_EXPLAIN_TIMEOUT_MS (on an autocommit
+connection there is no transaction, so the timeout is set for the session
+and put back afterwards). That doubles the cost of the sampled statement,
+hence the separate, low rate.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Optional
+from uuid import UUID
+import logging
+import random
+import re
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import SLOW_QUERIES, current_request
+from app.core.responses import dumps
+
+logger = logging.getLogger("app.slow_queries")
+
+# Kept verbatim when redacting: not personal data, and needed to reproduce
+_SAFE_TYPES = (bool, int, float, Decimal, date, datetime, UUID, type(None))
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+# Anything that writes or locks when run again: DML (also in CTEs), row
+# locks (FOR [NO KEY] UPDATE, FOR [KEY] SHARE), SELECT INTO, sequences,
+# advisory locks and notifications
+_SIDE_EFFECT = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|MERGE|SHARE|INTO|nextval|setval|pg_(try_)?advisory_\w*|pg_notify)\b",
+    re.IGNORECASE,
+)
+# Lists (IN clauses, COPY batches) are cut to this many items in the log
+_MAX_LIST_ITEMS = 10
+
+
+def redact(value: Any) -> Any:
+    """Log-safe form of a bound parameter value"""
+    if isinstance(value, _SAFE_TYPES):
+        return value
+    if isinstance(value, (list, tuple)):
+        items = [redact(item) for item in value[:_MAX_LIST_ITEMS]]
+        if len(value) > _MAX_LIST_ITEMS:
+            items.append(f"<{len(value) - _MAX_LIST_ITEMS} more>")
+        return items
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__} len={len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_statement(statement: str) -> str:
+    """Statement with its string literals replaced by '?'"""
+    return _STRING_LITERAL.sub("'?'", statement)
+
+
+def is_read_only(statement: str) -> bool:
+    """True for statements that are safe to run again under EXPLAIN ANALYZE"""
+    head = statement.lstrip().upper()
+    if not head.startswith(("SELECT", "WITH")):
+        return False
+    # Keywords inside string literals do not count
+    return not _SIDE_EFFECT.search(redact_statement(statement))
+
+
+class _RateLimit:
+    """At most `limit` events per minute (fixed windows), across threads"""
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._window = 0
+        self._count = 0
+    
+    def allow(self) -> bool:
+        window = int(time.monotonic() // 60)
+        with self._lock:
+            if window != self._window:
+                self._window, self._count = window, 0
+            if self._count >= self.limit:
+                return False
+            self._count += 1
+            return True
+
+
+class SlowQueryLog:
+    """Cursor event listeners that log statements over the threshold"""
+    
+    def __init__(
+        self,
+        threshold_ms: Optional[float] = None,
+        sample_rate: Optional[float] = None,
+        max_per_minute: Optional[int] = None,
+        redact_parameters: Optional[bool] = None,
+        explain: Optional[bool] = None,
+        explain_sample_rate: Optional[float] = None,
+        explain_timeout_ms: Optional[int] = None,
+    ):
+        def pick(value, default):
+            return default if value is None else value
+        
+        self.threshold = pick(threshold_ms, settings.SLOW_QUERY_THRESHOLD_MS) / 1000
+        self.sample_rate = pick(sample_rate, settings.SLOW_QUERY_SAMPLE_RATE)
+        self.rate_limit = _RateLimit(pick(max_per_minute, settings.SLOW_QUERY_MAX_PER_MINUTE))
+        self.redact_parameters = pick(redact_parameters, settings.SLOW_QUERY_REDACT_PARAMETERS)
+        self.explain = pick(explain, settings.SLOW_QUERY_EXPLAIN)
+        self.explain_sample_rate = pick(explain_sample_rate, settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE)
+        self.explain_timeout_ms = pick(explain_timeout_ms, settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS)
+    
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+    
+    def watch(self, engine: Engine) -> None:
+        """Listen on `engine` (pass `.sync_engine` for async engines)"""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        # On the execution context, so nothing outlives the statement if it fails
+        context.slow_query_started = time.perf_counter()
+    
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - context.slow_query_started
+        if elapsed < self.threshold:
+            return
+        stats = current_request.get()
+        route = f"{stats.method} {stats.route}" if stats else None
+        SLOW_QUERIES.labels(route or "<background>").inc()
+        if random.random() >= self.sample_rate or not self.rate_limit.allow():
+            return
+        
+        try:
+            record = {
+                "event": "slow_query",
+                "duration_ms": round(elapsed * 1000, 1),
+                "route": route,
+                "thread": threading.current_thread().name,
+                "executemany": executemany,
+                "statement": redact_statement(statement) if self.redact_parameters else statement,
+                "parameters": redact(parameters) if self.redact_parameters else parameters,
+            }
+            if (
+                self.explain
+                and not executemany
+                and is_read_only(statement)
+                and random.random() < self.explain_sample_rate
+            ):
+                record["plan"] = self._explain(conn, statement, parameters)
+            logger.warning(dumps(record).decode())
+        except Exception:
+            # Never fail the statement that was being logged
+            logger.exception("Could not log slow query")
+    
+    def _explain(self, conn, statement: str, parameters: Any) -> Any:
+        """
+        EXPLAIN ANALYZE output for `statement`, or an error string
+        
+        Runs on the raw DBAPI connection (so it neither fires these events
+        nor counts towards the request's statements), in a savepoint rolled
+        back afterwards so a failure or timeout leaves the caller's
+        transaction as it was.
+        """
+        # Set per connection or engine-wide, it ends up on the DBAPI connection
+        # (psycopg2 and SQLAlchemy's asyncpg adapter both expose it)
+        dbapi_connection = conn.connection.dbapi_connection
+        autocommit = getattr(dbapi_connection, "autocommit", False)
+        cursor = dbapi_connection.cursor()
+        try:
+            if autocommit:
+                # SET LOCAL needs a transaction; restore the session's own value
+                cursor.execute("SHOW statement_timeout")
+                previous_timeout = cursor.fetchone()[0]
+                cursor.execute(f"SET statement_timeout = {int(self.explain_timeout_ms)}")
+            else:
+                cursor.execute("SAVEPOINT slow_query_explain")
+                cursor.execute(f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}")
+            try:
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters)
+                plan = cursor.fetchone()[0]
+                # psycopg2 decodes the json column, asyncpg returns text
+                return plan if not isinstance(plan, str) else orjson.loads(plan)
+            except Exception as e:
+                return f"EXPLAIN failed: {type(e).__name__}: {e}"
+            finally:
+                if autocommit:
+                    # A literal: the drivers disagree on placeholder syntax
+                    previous_timeout = previous_timeout.replace("'", "''")
+                    cursor.execute(f"SET statement_timeout = '{previous_timeout}'")
+                else:
+                    cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                    cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        finally:
+            cursor.close()
+
+
+slow_query_log = SlowQueryLog()
@@ -1,10 +1,38 @@
 """
 Main FastAPI application
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1 import restaurants, wines, sales, analytics
+from app.api.v1 import restaurants, wines, sales, analytics, imports
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.metrics import RequestMetricsMiddleware, metrics_response
+from app.services.import_jobs import import_worker
+from app.services.partitions import partition_maintainer
+from app.services.summaries import summary_refresher
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background CSV import workers (jobs resume from the database on restart)
+    if settings.IMPORT_WORKER_ENABLED:
+        import_worker.start()
+    # Periodic rebuild of the summaries behind source=materialized analytics
+    if settings.ANALYTICS_SUMMARY_REFRESH_ENABLED:
+        summary_refresher.start()
+    # Upcoming sales partitions and retention (first run at startup)
+    if settings.SALES_PARTITION_MAINTENANCE_ENABLED:
+        partition_maintainer.start()
+    yield
+    if settings.SALES_PARTITION_MAINTENANCE_ENABLED:
+        await run_in_threadpool(partition_maintainer.stop)
+    if settings.ANALYTICS_SUMMARY_REFRESH_ENABLED:
+        await run_in_threadpool(summary_refresher.stop)
+    if settings.IMPORT_WORKER_ENABLED:
+        await run_in_threadpool(import_worker.stop)
+
 
 app = FastAPI(
     title="Sommelier Analytics API",
@@ -12,6 +40,7 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 # CORS middleware
@@ -21,13 +50,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Data-As-Of"],
 )
 
+# Response compression (exports stream through it chunk by chunk)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.GZIP_COMPRESS_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
+
+# Per-route latency, response size and SQL use on /metrics (outermost, so it
+# sees compressed sizes and the time spent in every other middleware)
+app.add_middleware(RequestMetricsMiddleware)
+
 # Include routers
 app.include_router(restaurants.router, prefix="/api/v1/restaurants", tags=["restaurants"])
 app.include_router(wines.router, prefix="/api/v1/wines", tags=["wines"])
 app.include_router(sales.router, prefix="/api/v1/sales", tags=["sales"])
 app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["analytics"])
+app.include_router(imports.router, prefix="/api/v1/imports", tags=["imports"])
 
 
 @app.get("/")
@@ -44,3 +87,9 @@ async def root():
 async def health():
     """Health check for load balancers"""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this worker process"""
+    return metrics_response()
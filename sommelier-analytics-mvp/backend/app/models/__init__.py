@@ -5,6 +5,10 @@ from app.models.restaurant import Restaurant
 from app.models.wine import Wine, WineBody, WineType
 from app.models.sale import Sale
 from app.models.dish import Dish
+from app.models.daily_wine_sales import DailyWineSales
+from app.models.import_job import ImportJob, ImportJobStatus, ImportKind
+from app.models.analytics_summary import AnalyticsSummaryState, WineRankingSummary, WineProfitSummary
+from app.models.restaurant_write import RestaurantWrite
 
 __all__ = [
     "Restaurant",
@@ -13,4 +17,12 @@ __all__ = [
     "WineType",
     "Sale",
     "Dish",
+    "DailyWineSales",
+    "ImportJob",
+    "ImportJobStatus",
+    "ImportKind",
+    "AnalyticsSummaryState",
+    "WineRankingSummary",
+    "WineProfitSummary",
+    "RestaurantWrite",
 ]
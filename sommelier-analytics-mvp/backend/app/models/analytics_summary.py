@@ -0,0 +1,66 @@
+"""
+Precomputed analytics summary models (rebuilt by app.services.summaries)
+"""
+from sqlalchemy import Column, String, Integer, Float, Numeric, DateTime, ForeignKey, Date
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+class AnalyticsSummaryState(Base):
+    """When a restaurant's summaries were last rebuilt"""
+    __tablename__ = "analytics_summary_state"
+    
+    restaurant_id = Column(
+        UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True
+    )
+    refreshed_at = Column(DateTime, nullable=False)  # As-of time of materialized reads
+    duration_ms = Column(Float, nullable=True)
+    
+    def __repr__(self):
+        return f"<AnalyticsSummaryState {self.restaurant_id} at {self.refreshed_at}>"
+
+
+class WineRankingSummary(Base):
+    """One wine's trailing-90-day metrics and ranks for one ranking metric"""
+    __tablename__ = "wine_ranking_summaries"
+    
+    restaurant_id = Column(
+        UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True
+    )
+    rank_by = Column(String(10), primary_key=True)  # bottles | revenue | profit | margin
+    wine_id = Column(
+        UUID(as_uuid=True), ForeignKey("wines.id", ondelete="CASCADE"), primary_key=True
+    )
+    window_start = Column(Date, nullable=False)
+    window_end = Column(Date, nullable=False)
+    top_rank = Column(Integer, nullable=False)
+    bottom_rank = Column(Integer, nullable=False)
+    
+    # Same columns as a row of the top/bottom wines query
+    wine_name = Column(String(255), nullable=False)
+    producer = Column(String(255), nullable=True)
+    vintage = Column(Integer, nullable=True)
+    total_bottles_sold = Column(Integer, nullable=False)
+    total_revenue = Column(Numeric(12, 2), nullable=False)
+    total_profit = Column(Numeric(12, 2), nullable=True)
+    avg_price = Column(Numeric(12, 2), nullable=False)
+    profit_margin = Column(Float, nullable=True)
+    last_sale_date = Column(Date, nullable=True)
+
+
+class WineProfitSummary(Base):
+    """One wine's year-to-date realised profit"""
+    __tablename__ = "wine_profit_summaries"
+    
+    restaurant_id = Column(
+        UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True
+    )
+    wine_id = Column(
+        UUID(as_uuid=True), ForeignKey("wines.id", ondelete="CASCADE"), primary_key=True
+    )
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False)
+    wine_name = Column(String(255), nullable=False)
+    cost = Column(Numeric(10, 2), nullable=False)
+    price = Column(Numeric(10, 2), nullable=False)
+    total_profit = Column(Numeric(12, 2), nullable=False)
@@ -0,0 +1,36 @@
+"""
+Daily sales rollup model (pre-aggregated analytics data)
+"""
+from sqlalchemy import Column, Integer, Numeric, DateTime, ForeignKey, Date
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.core.database import Base
+
+
+class DailyWineSales(Base):
+    """Per-wine, per-day sales totals maintained on every sale write"""
+    __tablename__ = "daily_wine_sales"
+    
+    restaurant_id = Column(
+        UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True
+    )
+    sale_date = Column(Date, primary_key=True)
+    wine_id = Column(
+        UUID(as_uuid=True), ForeignKey("wines.id", ondelete="CASCADE"), primary_key=True
+    )
+    
+    # Aggregates
+    bottles_sold = Column(Integer, default=0, nullable=False)  # SUM(quantity)
+    revenue = Column(Numeric(12, 2), default=0, nullable=False)  # SUM(total_amount)
+    profit = Column(Numeric(12, 2), nullable=True)  # SUM(quantity * (unit_price - unit_cost))
+    transaction_count = Column(Integer, default=0, nullable=False)  # COUNT(*)
+    
+    # Timestamps
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    # Relationships
+    wine = relationship("Wine", back_populates="daily_sales")
+    
+    def __repr__(self):
+        return f"<DailyWineSales {self.wine_id} on {self.sale_date}>"
@@ -0,0 +1,61 @@
+"""
+Import job model (background CSV imports)
+"""
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Text, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+import enum
+from app.core.database import Base
+
+
+class ImportKind(str, enum.Enum):
+    """What an import job loads"""
+    WINES = "wines"
+    SALES = "sales"
+
+
+class ImportJobStatus(str, enum.Enum):
+    """Import job lifecycle"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class ImportJob(Base):
+    """
+    A CSV import processed by the background worker
+    
+    Progress counters are committed in the same transaction as each batch of
+    imported rows, so `rows_processed` is always the resume point.
+    """
+    __tablename__ = "import_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    restaurant_id = Column(
+        UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=False
+    )
+    
+    kind = Column(String(20), nullable=False)  # ImportKind value
+    status = Column(String(20), default=ImportJobStatus.QUEUED.value, nullable=False)  # ImportJobStatus value
+    filename = Column(String(255), nullable=True)  # Original upload name
+    file_path = Column(String(500), nullable=False)  # Stored upload (see IMPORT_STORAGE_DIR)
+    
+    # Progress
+    rows_processed = Column(Integer, default=0, nullable=False)  # CSV data rows consumed (resume point)
+    rows_loaded = Column(Integer, default=0, nullable=False)  # Rows written to the target table
+    error_count = Column(Integer, default=0, nullable=False)
+    errors = Column(JSON, nullable=True)  # First IMPORT_MAX_ERRORS row errors
+    rows_per_second = Column(Float, nullable=True)  # Throughput of the current/last run
+    failure_reason = Column(Text, nullable=True)  # Set when the job as a whole failed
+    attempts = Column(Integer, default=0, nullable=False)  # Runs started (> 1 after a resume)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # Last committed batch of the running worker
+    finished_at = Column(DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f"<ImportJob {self.kind} {self.id} ({self.status})>"
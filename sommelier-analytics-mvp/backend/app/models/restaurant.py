@@ -1,7 +1,7 @@
 """
 Restaurant model
 """
-from sqlalchemy import Column, String, DateTime, Boolean
+from sqlalchemy import Column, String, DateTime, Boolean, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -25,6 +25,13 @@ class Restaurant(Base):
     # Subscription status
     is_active = Column(Boolean, default=True)
     subscription_tier = Column(String(50), default="trial")  # trial, basic, pro, enterprise
+    group_id = Column(UUID(as_uuid=True), nullable=True)  # Owner/group of several locations
+    
+    # Analytics settings
+    summary_window_days = Column(Integer, default=30, nullable=False)  # Dashboard "recent sales" window
+    reorder_stock_threshold = Column(Integer, default=5, nullable=False)  # Reorder below this many bottles
+    overstock_stock_threshold = Column(Integer, default=20, nullable=False)  # Overstocked above this many bottles...
+    overstock_sales_threshold = Column(Integer, default=5, nullable=False)  # ...with fewer than this many sold
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
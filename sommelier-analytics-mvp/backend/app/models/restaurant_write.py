@@ -0,0 +1,19 @@
+"""
+Restaurant write log model (read-your-writes replica routing)
+"""
+from sqlalchemy import Column, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+
+class RestaurantWrite(Base):
+    """When a restaurant's data was last written (see app.core.database.WriteLog)"""
+    __tablename__ = "restaurant_writes"
+    
+    restaurant_id = Column(
+        UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True
+    )
+    written_at = Column(DateTime(timezone=True), nullable=False, index=True)  # Primary's clock
+    
+    def __repr__(self):
+        return f"<RestaurantWrite {self.restaurant_id} at {self.written_at}>"
@@ -1,7 +1,7 @@
 """
 Sale model for tracking wine sales
 """
-from sqlalchemy import Column, String, Integer, Numeric, DateTime, ForeignKey, Date
+from sqlalchemy import Column, String, Integer, Numeric, DateTime, ForeignKey, Date, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -10,15 +10,25 @@ from app.core.database import Base
 
 
 class Sale(Base):
-    """Wine sale transaction"""
+    """
+    Wine sale transaction
+    
+    Stored in monthly partitions on sale_date (see app.services.partitions),
+    which is why the primary key and the POS transaction id are unique
+    together with sale_date.
+    """
     __tablename__ = "sales"
+    __table_args__ = (
+        UniqueConstraint("pos_transaction_id", "sale_date", name="sales_pos_transaction_id_key"),
+        {"postgresql_partition_by": "RANGE (sale_date)"},
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     restaurant_id = Column(UUID(as_uuid=True), ForeignKey("restaurants.id"), nullable=False)
     wine_id = Column(UUID(as_uuid=True), ForeignKey("wines.id"), nullable=False)
     
     # Sale details
-    sale_date = Column(Date, nullable=False)  # Date of sale (not datetime for easier aggregation)
+    sale_date = Column(Date, primary_key=True)  # Date of sale (not datetime for easier aggregation)
     quantity = Column(Integer, default=1, nullable=False)  # Bottles/glasses sold
     unit_price = Column(Numeric(10, 2), nullable=False)  # Price per unit at time of sale
     total_amount = Column(Numeric(10, 2), nullable=False)  # quantity * unit_price
@@ -32,7 +42,7 @@ class Sale(Base):
     notes = Column(String(500), nullable=True)
     
     # POS integration (for future)
-    pos_transaction_id = Column(String(100), nullable=True, unique=True)
+    pos_transaction_id = Column(String(100), nullable=True)
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -44,14 +54,14 @@ class Sale(Base):
     @property
     def profit(self):
         """Calculate profit for this sale"""
-        if self.unit_cost is not 0:
+        if self.unit_cost is not None:
             return (self.unit_price - self.unit_cost) * self.quantity
         return None
     
     @property
     def profit_margin(self):
         """Calculate profit margin percentage"""
-        if self.unit_cost is not 0 and self.unit_price is not 0:
+        if self.unit_cost is not None and self.unit_price:
             return ((self.unit_price - self.unit_cost) / self.unit_price) * 100
         return None
     
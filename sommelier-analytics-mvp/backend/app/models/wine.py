@@ -42,9 +42,9 @@ class Wine(Base):
     region = Column(String(255), nullable=True)  # Burgundy, Napa Valley, etc.
     country = Column(String(100), nullable=True)
     
-    # Wine characteristics
-    wine_type = Column(SQLEnum(WineType), nullable=True)
-    body = Column(SQLEnum(WineBody), nullable=True)
+    # Wine characteristics (varchar columns in the schema, holding the member names)
+    wine_type = Column(SQLEnum(WineType, native_enum=False, length=20), nullable=True)
+    body = Column(SQLEnum(WineBody, native_enum=False, length=20), nullable=True)
     sweetness = Column(Integer, nullable=True)  # 1-5 scale (1=dry, 5=sweet)
     acidity = Column(Integer, nullable=True)  # 1-5 scale
     tannin = Column(Integer, nullable=True)  # 1-5 scale (reds only)
@@ -70,18 +70,21 @@ class Wine(Base):
     # Relationships
     restaurant = relationship("Restaurant", back_populates="wines")
     sales = relationship("Sale", back_populates="wine", cascade="all, delete-orphan")
+    daily_sales = relationship(
+        "DailyWineSales", back_populates="wine", cascade="all, delete-orphan", passive_deletes=True
+    )
     
     @property
     def profit_margin(self):
         """Calculate profit margin percentage"""
-        if self.cost is not 0 and self.price is not 0:
+        if self.cost is not None and self.price:
             return ((self.price - self.cost) / self.price) * 100
         return None
     
     @property
     def markup(self):
         """Calculate markup percentage"""
-        if self.cost is not 0 and self.price is not 0:
+        if self.cost and self.price:
             return ((self.price - self.cost) / self.cost) * 100
         return None
     
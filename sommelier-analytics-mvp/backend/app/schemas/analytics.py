@@ -3,7 +3,7 @@ Analytics schemas for dashboard data
 """
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import date
+from datetime import date, datetime
 from uuid import UUID
 from decimal import Decimal
 
@@ -27,12 +27,14 @@ class WineSalesMetric(BaseModel):
 
 class TopBottomWines(BaseModel):
     """Top and bottom performing wines"""
-    top_sellers: List[WineSalesMetric]
-    slow_movers: List[WineSalesMetric]
+    top_sellers: List[WineSalesMetric]  # Best first
+    slow_movers: List[WineSalesMetric]  # Same order, so the weakest wine is last
+    rank_by: str = "bottles"  # bottles | revenue | profit | margin
+    as_of: Optional[datetime] = None  # Refresh time of a materialized read; None when computed fresh
 
 
 class SalesTrend(BaseModel):
-    """Sales trend data point"""
+    """Sales trend data point (one day, week or month)"""
     date: date
     total_sales: int
     total_revenue: Decimal
@@ -44,9 +46,11 @@ class SalesTrendResponse(BaseModel):
     """Time series of sales trends"""
     period_start: date
     period_end: date
+    granularity: str = "day"  # day | week | month (trend dates are bucket starts)
     trends: List[SalesTrend]
     total_sales: int
     total_revenue: Decimal
+    total_profit: Optional[Decimal] = None
     avg_daily_sales: float
 
 
@@ -61,6 +65,20 @@ class InventoryHealth(BaseModel):
     overstocked: bool
 
 
+class ReorderForecast(BaseModel):
+    """Forecast demand and reorder recommendation for one wine"""
+    wine_id: UUID
+    wine_name: str
+    current_inventory: int
+    forecast_daily_sales: float  # Average over the next 7 days
+    trend_per_week: float  # Change in daily sales per week (weekday adjusted)
+    days_until_stockout: Optional[int]  # None if not selling out within the horizon
+    stockout_date: Optional[date]
+    reorder_date: Optional[date]  # None if no order is needed within the horizon
+    reorder_quantity: int
+    safety_stock: int
+
+
 class ProfitAnalysis(BaseModel):
     """Profit analysis by wine"""
     wine_id: UUID
@@ -70,7 +88,9 @@ class ProfitAnalysis(BaseModel):
     profit_per_bottle: Decimal
     profit_margin: float
     markup_percentage: float
-    total_profit_ytd: Decimal
+    total_profit_ytd: Decimal  # Realised profit over the requested period (YTD by default)
+    period_start: Optional[date] = None
+    period_end: Optional[date] = None
     recommended_price: Optional[Decimal] = None  # Based on market analysis
 
 
@@ -87,6 +107,77 @@ class DashboardSummary(BaseModel):
     slowest_wine: Optional[str]
     wines_needing_reorder: int
     overstocked_wines: int
+    window_days: int = 30  # Length of the "last 30 days" window (per-restaurant setting)
+
+
+class LocationDashboardSummary(DashboardSummary):
+    """Dashboard summary for one location of a group"""
+    restaurant_id: UUID
+    restaurant_name: str
+
+
+class GroupDashboardTotals(BaseModel):
+    """Dashboard figures summed over every location of a group"""
+    restaurant_count: int
+    total_wines: int
+    total_bottles_in_stock: int
+    total_sales_last_30_days: int  # Each location over its own window_days
+    revenue_last_30_days: Decimal
+    profit_last_30_days: Optional[Decimal]
+    avg_profit_margin: Optional[float]
+    wines_needing_reorder: int
+    overstocked_wines: int
+
+
+class GroupDashboardSummary(BaseModel):
+    """Dashboard summary for several locations"""
+    locations: List[LocationDashboardSummary]
+    totals: GroupDashboardTotals
+
+
+class GroupWineSalesMetric(WineSalesMetric):
+    """Wine sales metrics ranked across a group (wines belong to one location)"""
+    restaurant_id: UUID
+
+
+class LocationTopBottomWines(BaseModel):
+    """Top and bottom performing wines of one location"""
+    restaurant_id: UUID
+    restaurant_name: str
+    top_sellers: List[WineSalesMetric]
+    slow_movers: List[WineSalesMetric]
+
+
+class GroupTopBottomWines(BaseModel):
+    """Top and bottom performing wines per location and across the group"""
+    rank_by: str = "bottles"
+    locations: List[LocationTopBottomWines]
+    top_sellers: List[GroupWineSalesMetric]  # Across every location
+    slow_movers: List[GroupWineSalesMetric]
+
+
+class LocationSalesTrends(BaseModel):
+    """Sales trends of one location"""
+    restaurant_id: UUID
+    restaurant_name: str
+    trends: List[SalesTrend]
+    total_sales: int
+    total_revenue: Decimal
+    total_profit: Optional[Decimal] = None
+    avg_daily_sales: float
+
+
+class GroupSalesTrendResponse(BaseModel):
+    """Sales trends per location, plus the group total for every bucket"""
+    period_start: date
+    period_end: date
+    granularity: str = "day"
+    locations: List[LocationSalesTrends]
+    trends: List[SalesTrend]  # Summed over locations
+    total_sales: int
+    total_revenue: Decimal
+    total_profit: Optional[Decimal] = None
+    avg_daily_sales: float
 
 
 class DateRangeFilter(BaseModel):
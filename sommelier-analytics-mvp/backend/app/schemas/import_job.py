@@ -0,0 +1,32 @@
+"""
+Import job schemas for API responses
+"""
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+from uuid import UUID
+
+
+class ImportJobResponse(BaseModel):
+    """Status and progress of a background CSV import"""
+    id: UUID
+    restaurant_id: UUID
+    kind: str
+    status: str
+    filename: Optional[str] = None
+    
+    rows_processed: int
+    rows_loaded: int
+    rows_per_second: Optional[float] = None
+    error_count: int
+    errors: Optional[list[str]] = None
+    failure_reason: Optional[str] = None
+    attempts: int
+    
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
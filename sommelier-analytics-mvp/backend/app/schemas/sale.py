@@ -52,7 +52,9 @@ class SaleResponse(SaleBase):
 class SaleListResponse(BaseModel):
     """Schema for paginated sale list"""
     sales: list[SaleResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # None when count=none
+    total_estimated: bool = False  # total is the planner's estimate
+    page: Optional[int] = None  # Offset mode only
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Cursor mode: pass back as ?cursor= (None on the last page)
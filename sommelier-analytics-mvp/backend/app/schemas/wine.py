@@ -87,7 +87,9 @@ class WineResponse(WineBase):
 class WineListResponse(BaseModel):
     """Schema for paginated wine list"""
     wines: list[WineResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # None when count=none
+    total_estimated: bool = False  # total is the planner's estimate
+    page: Optional[int] = None  # Offset mode only
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # Cursor mode: pass back as ?cursor= (None on the last page)
@@ -0,0 +1,142 @@
+"""
+Analytics query builders
+
+Statements shared by the live analytics endpoints (app.api.v1.analytics)
+and the summary refresh (app.services.summaries), which stores exactly
+what the live queries return.
+"""
+from datetime import date
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import Float, Numeric, and_, case, func, literal, select
+
+from app.models import DailyWineSales, Restaurant, Wine
+
+
+def ranked_wines_query(
+    restaurant_ids: list[UUID],
+    start_date: date,
+    end_date: date,
+    rank_by: str,
+    limit: Optional[int],
+    across_group: bool = False,
+):
+    """
+    Build the top/bottom query over every wine of the restaurants
+    
+    Wines are ranked within their restaurant (and, with `across_group`, over
+    all the restaurants together); only rows within `limit` of either end of
+    some ranking are returned (every row when `limit` is None).
+    """
+    # Per-wine totals inside the window
+    window_sales = select(
+        DailyWineSales.wine_id,
+        func.sum(DailyWineSales.bottles_sold).label('bottles_sold'),
+        func.sum(DailyWineSales.revenue).label('revenue'),
+        func.sum(DailyWineSales.profit).label('profit'),
+        func.max(DailyWineSales.sale_date).label('last_sale_date')
+    ).where(
+        and_(
+            DailyWineSales.restaurant_id.in_(restaurant_ids),
+            DailyWineSales.sale_date >= start_date,
+            DailyWineSales.sale_date <= end_date
+        )
+    ).group_by(DailyWineSales.wine_id).subquery('window_sales')
+    
+    # Every wine on the list, zero-filled when it didn't sell
+    total_bottles = func.coalesce(window_sales.c.bottles_sold, 0)
+    total_revenue = func.coalesce(window_sales.c.revenue, 0)
+    # No sales means no profit, as long as the wine has a cost to compute it from
+    total_profit = func.coalesce(
+        window_sales.c.profit,
+        case((Wine.cost.is_not(None), literal(0, Numeric)))
+    )
+    profit_margin = (total_profit / func.nullif(total_revenue, 0) * 100).cast(Float)
+    
+    metric = {
+        "bottles": total_bottles,
+        "revenue": total_revenue,
+        "profit": total_profit,
+        "margin": profit_margin,
+    }[rank_by]
+    
+    # Unranked (NULL) wines sort last in both directions; name/id break ties
+    best_first = (metric.desc().nulls_last(), Wine.name, Wine.id)
+    worst_first = (metric.asc().nulls_last(), Wine.name, Wine.id)
+    ranks = [
+        func.row_number().over(partition_by=Wine.restaurant_id, order_by=best_first).label('top_rank'),
+        func.row_number().over(partition_by=Wine.restaurant_id, order_by=worst_first).label('bottom_rank'),
+    ]
+    if across_group:
+        ranks += [
+            func.row_number().over(order_by=best_first).label('group_top_rank'),
+            func.row_number().over(order_by=worst_first).label('group_bottom_rank'),
+        ]
+    
+    ranked = select(
+        Wine.restaurant_id,
+        Restaurant.name.label('restaurant_name'),
+        Wine.id.label('wine_id'),
+        Wine.name.label('wine_name'),
+        Wine.producer,
+        Wine.vintage,
+        total_bottles.label('total_bottles_sold'),
+        total_revenue.label('total_revenue'),
+        total_profit.label('total_profit'),
+        func.coalesce(
+            func.round(window_sales.c.revenue / func.nullif(window_sales.c.bottles_sold, 0), 2),
+            Wine.price
+        ).label('avg_price'),
+        profit_margin.label('profit_margin'),
+        window_sales.c.last_sale_date,
+        *ranks
+    ).select_from(Wine).join(
+        Restaurant, Restaurant.id == Wine.restaurant_id
+    ).outerjoin(
+        window_sales, window_sales.c.wine_id == Wine.id
+    ).where(Wine.restaurant_id.in_(restaurant_ids)).subquery('ranked')
+    
+    query = select(ranked).order_by(
+        ranked.c.restaurant_name, ranked.c.restaurant_id, ranked.c.top_rank
+    )
+    if limit is None:
+        return query
+    
+    # At most 2 * limit rows per ranking leave the database
+    keep = (ranked.c.top_rank <= limit) | (ranked.c.bottom_rank <= limit)
+    if across_group:
+        keep = keep | (ranked.c.group_top_rank <= limit) | (ranked.c.group_bottom_rank <= limit)
+    return query.where(keep)
+
+
+def profit_analysis_query(restaurant_id: UUID, period_start: date, period_end: date):
+    """Build the profit query: wines with cost data and their period profit"""
+    # Realised profit per wine over the period, aggregated once
+    period_profit = select(
+        DailyWineSales.wine_id.label('wine_id'),
+        func.sum(DailyWineSales.profit).label('total_profit')
+    ).where(
+        and_(
+            DailyWineSales.restaurant_id == restaurant_id,
+            DailyWineSales.sale_date >= period_start,
+            DailyWineSales.sale_date <= period_end
+        )
+    ).group_by(DailyWineSales.wine_id).subquery()
+    
+    # All wines with cost data, joined to their period profit
+    return select(
+        Wine.id,
+        Wine.name,
+        Wine.cost,
+        Wine.price,
+        func.coalesce(period_profit.c.total_profit, 0).label('total_profit')
+    ).outerjoin(
+        period_profit, period_profit.c.wine_id == Wine.id
+    ).where(
+        and_(
+            Wine.restaurant_id == restaurant_id,
+            Wine.cost.isnot(None),
+            Wine.cost > 0
+        )
+    )
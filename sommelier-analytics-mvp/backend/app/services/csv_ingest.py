@@ -0,0 +1,139 @@
+"""
+Shared plumbing for batched CSV ingest
+
+Subclasses implement `_process_batch`; the base class handles incremental
+parsing, error capping, timing and the per-batch callback. Nothing here
+commits, so the same ingestor works inside a single request transaction or
+inside an import job that commits after every batch.
+"""
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Callable, Iterator, Optional
+from uuid import UUID
+import csv
+import io
+import itertools
+import time
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+CENT = Decimal('0.01')
+
+
+@dataclass
+class IngestResult:
+    """Outcome of a bulk ingest"""
+    rows_processed: int = 0
+    rows_loaded: int = 0
+    errors: list[str] = field(default_factory=list)
+    errors_truncated: int = 0  # Errors beyond the reporting cap
+    elapsed_seconds: float = 0.0
+    
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_processed / self.elapsed_seconds if self.elapsed_seconds > 0 else 0.0
+    
+    @property
+    def error_count(self) -> int:
+        return len(self.errors) + self.errors_truncated
+    
+    def error_summary(self) -> Optional[list[str]]:
+        """Errors as returned by the API (None when there were none)"""
+        errors = self.errors
+        if self.errors_truncated:
+            errors = errors + [f"... and {self.errors_truncated} more errors"]
+        return errors or None
+
+
+def parse_money(row: dict, column: str, required: bool = True) -> Optional[Decimal]:
+    """Parse a currency column to cents (None when optional and blank)"""
+    value = (row.get(column) or '').strip()
+    if not value:
+        if required:
+            raise ValueError(f"{column} is required")
+        return None
+    try:
+        return Decimal(value).quantize(CENT)
+    except InvalidOperation:
+        raise ValueError(f"invalid {column} '{value}'")
+
+
+def iter_csv_batches(
+    fileobj: BinaryIO,
+    batch_size: int,
+    start_row: int = 0,
+) -> Iterator[list[tuple[int, dict]]]:
+    """
+    Yield (row_number, row) batches without reading the whole file
+    
+    `start_row` data rows are skipped first (used to resume an import).
+    """
+    text = io.TextIOWrapper(fileobj, encoding='utf-8', newline='')
+    try:
+        reader = enumerate(csv.DictReader(text), start=2)  # Start at 2 (after header)
+        if start_row:
+            reader = itertools.islice(reader, start_row, None)
+        batch = []
+        for row_num, row in reader:
+            batch.append((row_num, row))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        # Don't let the wrapper close the caller's file
+        text.detach()
+
+
+class CsvIngestor(ABC):
+    """
+    Load a CSV file for one restaurant in fixed-size batches
+    
+    The ingestor never commits; `on_batch` is called after every batch has
+    been written so callers can commit, report progress, or both.
+    """
+    
+    def __init__(
+        self,
+        db: Session,
+        restaurant_id: UUID,
+        batch_size: Optional[int] = None,
+        max_errors: int = 1000,
+    ):
+        self.db = db
+        self.restaurant_id = restaurant_id
+        self.batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        self.max_errors = max_errors
+    
+    def ingest(
+        self,
+        fileobj: BinaryIO,
+        on_batch: Optional[Callable[[IngestResult], None]] = None,
+        start_row: int = 0,
+    ) -> IngestResult:
+        """Process the file, optionally skipping rows already loaded"""
+        result = IngestResult()
+        started = time.perf_counter()
+        
+        for batch in iter_csv_batches(fileobj, self.batch_size, start_row):
+            self._process_batch(batch, result)
+            result.elapsed_seconds = time.perf_counter() - started
+            if on_batch:
+                on_batch(result)
+        
+        result.elapsed_seconds = time.perf_counter() - started
+        return result
+    
+    @abstractmethod
+    def _process_batch(self, batch: list[tuple[int, dict]], result: IngestResult) -> None:
+        """Validate and write one batch, recording rows and errors in `result`"""
+    
+    def _add_error(self, result: IngestResult, message: str) -> None:
+        if len(result.errors) < self.max_errors:
+            result.errors.append(message)
+        else:
+            result.errors_truncated += 1
@@ -0,0 +1,279 @@
+"""
+Demand forecasting for reorder recommendations
+
+Forecasts every wine of a restaurant at once. One query returns the wines
+and their daily bottles over the history window (from the
+`daily_wine_sales` rollup); they are laid out as a wines x days matrix and
+every step below is a numpy operation over the whole matrix:
+
+1. Day-of-week factors per wine: the wine's own weekday profile, shrunk
+   towards the restaurant's (summed over all wines) in proportion to how
+   few bottles the wine sold, so slow sellers follow the house pattern.
+   A weekday the restaurant never sells on gets a factor of 0.
+2. Level and trend: an exponentially weighted (half-life HALFLIFE_DAYS)
+   least squares fit of sales to weekday factor x (level + trend x day).
+   The trend is shrunk towards 0 the noisier it is, and damped
+   (TREND_DAMPING) when projected, so a few busy days don't extrapolate
+   into an endless climb.
+3. Forecast: level plus damped trend, times the weekday factor, for each
+   day from today; its running total is the demand to date.
+
+Stockout is the first day the demand to date reaches the inventory. An
+order placed on the reorder date arrives `lead_time_days` later with at
+least the safety stock still on hand (z * residual spread * sqrt(lead
+time)); it is sized to cover `cover_days` of forecast demand after
+arrival. Wines with no forecast demand are never reordered.
+
+History ends yesterday (today is still being sold), and the forecast
+starts today.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import and_, func, select, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from app.models import DailyWineSales, Wine
+
+# Weighting of the level and trend fit: a day this old counts half as much
+HALFLIFE_DAYS = 14
+# Per-day damping of the trend when projecting it forwards
+TREND_DAMPING = 0.9
+# Bottles of history at which a wine's own weekday profile and the
+# restaurant's weigh the same
+WEEKDAY_PRIOR_BOTTLES = 50
+# Safety stock in residual standard deviations (about a 95% service level)
+SAFETY_Z = 1.65
+# Days ahead searched for stockouts and reorder dates
+HORIZON_DAYS = 120
+
+
+@dataclass
+class SalesMatrix:
+    """Daily bottles sold per wine (rows) and day (columns, oldest first)"""
+    
+    wine_ids: list[UUID]
+    wine_names: list[str]
+    inventory: np.ndarray
+    bottles: np.ndarray
+    start: date
+
+
+def sales_matrix_query(restaurant_id: UUID, start: date, end: date):
+    """
+    One row: the restaurant's wines, and its daily sales in [start, end)
+    
+    Everything comes back as arrays, so the sales are a few flat integer
+    arrays (wine position, day offset, bottles) rather than a row per wine
+    and day, and aggregating them needs no sort. Wines and sales are read in
+    the same statement, so positions always match.
+    """
+    wines = select(
+        Wine.id,
+        Wine.name,
+        func.coalesce(Wine.inventory_count, 0).label('inventory_count'),
+        (func.row_number().over(order_by=Wine.id) - 1).label('position')
+    ).where(Wine.restaurant_id == restaurant_id).cte('wines')
+    
+    wine_arrays = select(
+        func.array_agg(aggregate_order_by(wines.c.id, wines.c.position)).label('wine_ids'),
+        func.array_agg(aggregate_order_by(wines.c.name, wines.c.position)).label('wine_names'),
+        func.array_agg(aggregate_order_by(wines.c.inventory_count, wines.c.position)).label('inventory')
+    ).subquery()
+    
+    sales_arrays = select(
+        func.array_agg(wines.c.position).label('positions'),
+        # date - date is a day count in Postgres
+        func.array_agg(DailyWineSales.sale_date - start).label('days'),
+        func.array_agg(DailyWineSales.bottles_sold).label('bottles')
+    ).join(
+        wines, wines.c.id == DailyWineSales.wine_id
+    ).where(
+        and_(
+            DailyWineSales.restaurant_id == restaurant_id,
+            DailyWineSales.sale_date >= start,
+            DailyWineSales.sale_date < end
+        )
+    ).subquery()
+    
+    return select(wine_arrays, sales_arrays).select_from(wine_arrays.join(sales_arrays, true()))
+
+
+def sales_matrix(row: Any, start: date, days: int) -> SalesMatrix:
+    """Lay the row of `sales_matrix_query` out as a dense matrix"""
+    wine_ids = row.wine_ids or []
+    bottles = np.zeros((len(wine_ids), days))
+    if row.positions:
+        bottles[np.array(row.positions), np.array(row.days)] = np.array(row.bottles)
+    return SalesMatrix(
+        wine_ids=wine_ids,
+        wine_names=row.wine_names or [],
+        inventory=np.array(row.inventory or [], dtype=np.float64),
+        bottles=bottles,
+        start=start,
+    )
+
+
+def weekday_factors(bottles: np.ndarray, weekdays: np.ndarray) -> np.ndarray:
+    """Wines x 7 multipliers of the average day, Monday first (each row averages 1 over open weekdays)"""
+    onehot = np.eye(7)[weekdays]
+    # Average bottles per weekday, per wine
+    by_weekday = (bottles @ onehot) / np.maximum(onehot.sum(axis=0), 1)
+    
+    house = by_weekday.sum(axis=0)
+    house = house / house.mean() if house.sum() > 0 else np.ones(7)
+    
+    mean = by_weekday.mean(axis=1, keepdims=True)
+    own = np.divide(by_weekday, mean, out=np.zeros_like(by_weekday), where=mean > 0)
+    sold = bottles.sum(axis=1, keepdims=True)
+    factors = (own * sold + house * WEEKDAY_PRIOR_BOTTLES) / (sold + WEEKDAY_PRIOR_BOTTLES)
+    # Closed days stay closed; the rest are rescaled to average 1
+    factors[:, house == 0] = 0
+    scale = factors.sum(axis=1, keepdims=True) / max(int((house > 0).sum()), 1)
+    return np.divide(factors, scale, out=np.zeros_like(factors), where=scale > 0)
+
+
+@dataclass
+class DemandForecast:
+    """Forecast bottles per wine (rows) and day (columns, from today)"""
+    
+    demand: np.ndarray
+    # Change in daily bottles per week (before weekday factors)
+    trend_per_week: np.ndarray
+    # Standard deviation of a day's sales around the fit, in bottles
+    spread: np.ndarray
+
+
+def forecast_demand(matrix: SalesMatrix, days_ahead: int) -> DemandForecast:
+    """Daily demand for the `days_ahead` days after the history (today first)"""
+    bottles = matrix.bottles
+    wines, days = bottles.shape
+    first_weekday = matrix.start.weekday()
+    weekdays = (first_weekday + np.arange(days)) % 7
+    factors = weekday_factors(bottles, weekdays)
+    
+    # Weighted least squares of sales on weekday factor x (level + trend *
+    # t), with t = 0 yesterday and recent days weighted up. Days are also
+    # weighted by 1 / factor (sales vary about as much as they are large),
+    # which leaves these sums; with no trend the level is just decayed
+    # sales over decayed factors. Closed days have a factor of 0 and sell
+    # nothing, so they drop out.
+    f = factors[:, weekdays]
+    t = np.arange(days, dtype=np.float64) - (days - 1)
+    decay = 0.5 ** (-t / HALFLIFE_DAYS)
+    s0 = f @ decay
+    s1 = f @ (decay * t)
+    s2 = f @ (decay * t ** 2)
+    y0 = bottles @ decay
+    y1 = bottles @ (decay * t)
+    det = s0 * s2 - s1 ** 2
+    fitted = det > 1e-9
+    slope = np.divide(s0 * y1 - s1 * y0, det, out=np.zeros(wines), where=fitted)
+    
+    def level_for(slope: np.ndarray) -> np.ndarray:
+        return np.divide(y0 - slope * s1, s0, out=np.zeros(wines), where=s0 > 0)
+    
+    residuals = bottles - f * (level_for(slope)[:, None] + slope[:, None] * t)
+    open_decay = decay * (f > 0)
+    spread = np.sqrt(np.divide(
+        (open_decay * residuals ** 2).sum(axis=1), open_decay.sum(axis=1),
+        out=np.zeros(wines), where=open_decay.sum(axis=1) > 0
+    ))
+    
+    # Shrink the slope by its standard error: noisy trends count for less
+    slope_error = np.divide(spread * np.sqrt(s0), np.sqrt(np.abs(det)), out=np.full(wines, np.inf), where=fitted)
+    slope *= slope ** 2 / (slope ** 2 + slope_error ** 2 + 1e-12)
+    level = np.maximum(level_for(slope), 0)
+    
+    # Level plus damped trend, times the weekday factor
+    h = np.arange(1, days_ahead + 1)
+    damped = np.cumsum(TREND_DAMPING ** h)
+    rate = np.maximum(level[:, None] + slope[:, None] * damped, 0)
+    return DemandForecast(
+        demand=rate * factors[:, (first_weekday + days - 1 + h) % 7],
+        trend_per_week=slope * 7,
+        spread=spread,
+    )
+
+
+def _whole_bottles(bottles: np.ndarray) -> np.ndarray:
+    """Round up, ignoring float noise (a spread of 1e-16 is no bottle of safety stock)"""
+    return np.ceil(np.round(bottles, 6))
+
+
+def forecast_reorders(
+    matrix: SalesMatrix,
+    today: date,
+    lead_time_days: int,
+    cover_days: int,
+) -> list[dict]:
+    """
+    Reorder recommendation per wine (`ReorderForecast` fields), most urgent first
+    
+    Returned as dicts, like the other unbounded reports.
+    """
+    inventory = matrix.inventory
+    wines = len(inventory)
+    # Far enough out to size an order placed on the last day searched
+    ahead = HORIZON_DAYS + lead_time_days + cover_days
+    forecast = forecast_demand(matrix, ahead)
+    demand, spread = forecast.demand, forecast.spread
+    to_date = np.cumsum(demand, axis=1)
+    
+    safety = SAFETY_Z * spread * np.sqrt(lead_time_days)
+    searched = to_date[:, :HORIZON_DAYS]
+    
+    # Days are counted from today; HORIZON_DAYS stands for "not within the horizon"
+    never = HORIZON_DAYS
+    selling = to_date[:, -1] > 0
+    
+    # Demand to date reaches the inventory; day 0 when already out of stock
+    stocks_out = searched >= inventory[:, None]
+    stockout_day = np.where(stocks_out.any(axis=1) & selling, stocks_out.argmax(axis=1), never)
+    
+    # Reorder when the demand until the order arrives would eat into the
+    # safety stock; the order covers `cover_days` of demand from its
+    # arrival plus the safety stock, less what is left by then
+    short = searched > (inventory - safety)[:, None]
+    reorder = short.any(axis=1) & selling
+    reorder_day = np.where(reorder, np.maximum(short.argmax(axis=1) - lead_time_days + 1, 0), never)
+    # Index of the day before the order arrives (in range even for `never`)
+    arrival = reorder_day + lead_time_days - 1
+    rows = np.arange(wines)
+    sold_before_arrival = to_date[rows, arrival]
+    on_arrival = np.maximum(inventory - sold_before_arrival, 0)
+    cover = to_date[rows, arrival + cover_days] - sold_before_arrival
+    quantity = np.where(reorder, _whole_bottles(np.maximum(cover + safety - on_arrival, 0)), 0)
+    
+    # Soonest reorder first, then soonest stockout; as Python values from here
+    order = np.lexsort((stockout_day, reorder_day))
+    dates = [today + timedelta(days=day) for day in range(HORIZON_DAYS)] + [None]
+    columns = zip(
+        order.tolist(),
+        inventory[order].astype(int).tolist(),
+        demand[order, :7].mean(axis=1).round(2).tolist(),
+        # + 0.0 turns a rounded -0.0 into 0.0
+        (forecast.trend_per_week[order].round(3) + 0.0).tolist(),
+        stockout_day[order].tolist(),
+        reorder_day[order].tolist(),
+        quantity[order].astype(int).tolist(),
+        _whole_bottles(safety[order]).astype(int).tolist(),
+    )
+    return [
+        {
+            'wine_id': matrix.wine_ids[i],
+            'wine_name': matrix.wine_names[i],
+            'current_inventory': stock,
+            'forecast_daily_sales': daily,
+            'trend_per_week': trend,
+            'days_until_stockout': stockout if stockout < never else None,
+            'stockout_date': dates[stockout],
+            'reorder_date': dates[reorder_on],
+            'reorder_quantity': bottles,
+            'safety_stock': safety_stock,
+        }
+        for i, stock, daily, trend, stockout, reorder_on, bottles, safety_stock in columns
+    ]
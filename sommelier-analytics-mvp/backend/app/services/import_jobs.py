@@ -0,0 +1,296 @@
+"""
+Background CSV import jobs
+
+Uploads are written to IMPORT_STORAGE_DIR and recorded as an `import_jobs`
+row; the HTTP request returns straight away. Worker threads claim queued
+jobs with SELECT ... FOR UPDATE SKIP LOCKED (so several API processes can
+share the queue) and run the matching ingestor, committing each batch
+together with the job's progress counters. A job interrupted by a shutdown
+goes back to the queue, and one whose worker died is picked up again once
+its heartbeat is older than IMPORT_JOB_STALE_SECONDS. Either way it resumes
+after the last committed row.
+
+Run a standalone worker (or drain the queue once) from the command line:
+    python -m app.services.import_jobs [--once]
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+from uuid import UUID
+import argparse
+import logging
+import os
+import shutil
+import threading
+import uuid
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import analytics_cache
+from app.core.config import settings
+from app.core.database import SessionLocal, record_write
+from app.models import ImportJob, ImportJobStatus, ImportKind
+from app.services.csv_ingest import IngestResult
+from app.services.sales_ingest import SalesIngestor
+from app.services.wine_ingest import WineIngestor
+
+logger = logging.getLogger(__name__)
+
+INGESTORS = {
+    ImportKind.WINES.value: WineIngestor,
+    ImportKind.SALES.value: SalesIngestor,
+}
+
+
+class JobInterrupted(Exception):
+    """The worker is stopping; the job goes back to the queue"""
+
+
+class JobLost(Exception):
+    """Another worker has taken over the job (ours was considered dead)"""
+
+
+def create_job(
+    db: Session,
+    restaurant_id: UUID,
+    kind: ImportKind,
+    fileobj: BinaryIO,
+    filename: Optional[str] = None,
+) -> ImportJob:
+    """Store the upload and queue a job for it (commits)"""
+    job_id = uuid.uuid4()
+    storage = Path(settings.IMPORT_STORAGE_DIR)
+    storage.mkdir(parents=True, exist_ok=True)
+    path = (storage / f"{job_id}.csv").resolve()
+    
+    with open(path, 'wb') as out:
+        shutil.copyfileobj(fileobj, out, 1024 * 1024)
+    
+    job = ImportJob(
+        id=job_id,
+        restaurant_id=restaurant_id,
+        kind=kind.value,
+        filename=filename,
+        file_path=str(path),
+    )
+    try:
+        db.add(job)
+        db.commit()
+    except Exception:
+        db.rollback()
+        path.unlink(missing_ok=True)
+        raise
+    db.refresh(job)
+    return job
+
+
+def claim_next_job(db: Session) -> Optional[ImportJob]:
+    """Mark the oldest runnable job as running and return it (commits)"""
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=settings.IMPORT_JOB_STALE_SECONDS)
+    
+    job = db.execute(
+        select(ImportJob)
+        .where(or_(
+            ImportJob.status == ImportJobStatus.QUEUED.value,
+            and_(
+                ImportJob.status == ImportJobStatus.RUNNING.value,
+                ImportJob.heartbeat_at < stale_before
+            )
+        ))
+        .order_by(ImportJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).scalar_one_or_none()
+    
+    if job is None:
+        db.rollback()
+        return None
+    
+    job.status = ImportJobStatus.RUNNING.value
+    job.attempts += 1
+    job.started_at = job.started_at or now
+    job.heartbeat_at = now
+    db.commit()
+    return job
+
+
+def run_job(
+    db: Session,
+    job: ImportJob,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> None:
+    """
+    Process a claimed job to completion, resuming after `rows_processed`
+    
+    Every UPDATE of the job row is fenced on the attempt number, so a worker
+    that was presumed dead cannot keep writing once the job was re-claimed.
+    """
+    job_id = job.id
+    attempt = job.attempts
+    restaurant_id = job.restaurant_id
+    file_path = job.file_path
+    start_row = job.rows_processed
+    base_loaded = job.rows_loaded
+    base_errors = list(job.errors or [])
+    base_error_count = job.error_count
+    
+    def save(**values) -> None:
+        result = db.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.attempts == attempt)
+            .values(**values)
+        )
+        if result.rowcount != 1:
+            raise JobLost(job_id)
+    
+    def progress(result: IngestResult) -> dict:
+        return {
+            'rows_processed': start_row + result.rows_processed,
+            'rows_loaded': base_loaded + result.rows_loaded,
+            'error_count': base_error_count + result.error_count,
+            'errors': (base_errors + result.errors)[:settings.IMPORT_MAX_ERRORS],
+            'rows_per_second': round(result.rows_per_second, 1),
+        }
+    
+    def on_batch(result: IngestResult) -> None:
+        # The batch and its progress land in the same transaction
+        save(heartbeat_at=datetime.utcnow(), **progress(result))
+        record_write(db, restaurant_id)
+        db.commit()
+        analytics_cache.invalidate_restaurant(restaurant_id)
+        if should_stop and should_stop():
+            raise JobInterrupted(job_id)
+    
+    ingestor = INGESTORS[job.kind](db, restaurant_id, max_errors=settings.IMPORT_MAX_ERRORS)
+    try:
+        with open(file_path, 'rb') as f:
+            result = ingestor.ingest(f, on_batch=on_batch, start_row=start_row)
+        save(
+            status=ImportJobStatus.SUCCEEDED.value,
+            finished_at=datetime.utcnow(),
+            **progress(result)
+        )
+        record_write(db, restaurant_id)
+        db.commit()
+    except JobInterrupted:
+        save(status=ImportJobStatus.QUEUED.value)
+        db.commit()
+        logger.info("Import job %s interrupted, requeued", job_id)
+        return
+    except JobLost:
+        db.rollback()
+        logger.warning("Import job %s was taken over by another worker", job_id)
+        return
+    except Exception as e:
+        db.rollback()
+        logger.exception("Import job %s failed", job_id)
+        save(
+            status=ImportJobStatus.FAILED.value,
+            failure_reason=str(e)[:2000],
+            finished_at=datetime.utcnow()
+        )
+        db.commit()
+    
+    analytics_cache.invalidate_restaurant(restaurant_id)
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+
+class ImportWorker:
+    """
+    Pool of threads that drain the import queue
+    
+    `start()` / `stop()` are wired to the app lifespan; `run_pending()`
+    processes everything queued in the calling thread (tests, CLI).
+    """
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency or settings.IMPORT_WORKER_CONCURRENCY
+        self.poll_interval = poll_interval or settings.IMPORT_POLL_SECONDS
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads: list[threading.Thread] = []
+    
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopping.clear()
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._run_loop, name=f"import-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def stop(self, timeout: Optional[float] = 30.0) -> None:
+        """Finish the current batch of each running job, requeue it, and exit"""
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+    
+    def notify(self) -> None:
+        """A job was queued; wake an idle thread instead of waiting for the poll"""
+        self._wake.set()
+    
+    def run_pending(self) -> int:
+        """Run queued jobs in this thread until none are left; returns the count"""
+        count = 0
+        while self._run_one():
+            count += 1
+        return count
+    
+    def _run_one(self) -> bool:
+        db = self.session_factory()
+        try:
+            job = claim_next_job(db)
+            if job is None:
+                return False
+            run_job(db, job, should_stop=self._stopping.is_set)
+            return True
+        finally:
+            db.close()
+    
+    def _run_loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                if self._run_one():
+                    continue
+            except Exception:
+                logger.exception("Import worker error")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+import_worker = ImportWorker()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued CSV import jobs")
+    parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    if args.once:
+        print(f"Processed {import_worker.run_pending()} import jobs")
+        return
+    
+    import_worker.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        import_worker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Monthly partitions of the sales table
+
+`sales` is range-partitioned on `sale_date`, one partition per calendar
+month (`sales_y2025m03` holds March 2025), so date-bounded queries only
+touch the months they ask for and vacuum works on one month at a time.
+`sales_default` catches dates no monthly partition covers yet; creating
+the partition later moves those rows into it. Attaching a partition locks
+`sales_default` exclusively, so months are created well before their
+first sale, while the default partition is empty and the attach is
+instant.
+
+Maintenance keeps SALES_PARTITION_MONTHS_AHEAD future months created and,
+when SALES_PARTITION_RETENTION_MONTHS is set, takes older months out of
+`sales`: detached into the `sales_archive` schema (re-attachable, still
+queryable) or dropped. The daily rollup keeps its rows for those months,
+so analytics history is unaffected.
+
+Run from the command line:
+    python -m app.services.partitions [--once] [--months-ahead N] [--start-date YYYY-MM-DD]
+"""
+from datetime import date
+from typing import Callable, Optional
+import argparse
+import logging
+import re
+import threading
+import time
+
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+SALES_TABLE = "sales"
+DEFAULT_PARTITION = "sales_default"
+ARCHIVE_SCHEMA = "sales_archive"
+ARCHIVE_MODES = ("detach", "drop")
+
+_PARTITION_NAME = re.compile(r"^sales_y(\d{4})m(\d{2})$")
+# Any fixed key; serialises maintenance between processes
+_LOCK_KEY = 0x5A1E5
+# SQLSTATE of a lock_timeout
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month `months` after (or before) `month`"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"sales_y{month.year:04d}m{month.month:02d}"
+
+
+def monthly_partitions(db: Session) -> dict[date, str]:
+    """Attached monthly partitions of `sales`, by first day of the month"""
+    names = db.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:parent AS regclass)
+    """), {"parent": SALES_TABLE}).scalars()
+    partitions = {}
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+
+def create_partition(db: Session, month: date) -> str:
+    """
+    Create and attach the partition for one month
+    
+    Rows that arrived ahead of their partition are moved over from
+    `sales_default` first, and a CHECK constraint on the bounds spares the
+    attach from scanning the new table. `sales` itself only gets a SHARE
+    UPDATE EXCLUSIVE lock, but the attach takes ACCESS EXCLUSIVE on
+    `sales_default` and scans it for rows in the new range. Queries that
+    cannot prune the default partition wait for that, so this is cheap
+    only while the default partition is (nearly) empty, as it is for
+    months created ahead of time.
+    """
+    name = partition_name(month)
+    bounds = {"start": month, "end": add_months(month, 1)}
+    start, end = bounds["start"].isoformat(), bounds["end"].isoformat()
+    db.execute(text(f"CREATE TABLE {name} (LIKE {SALES_TABLE} INCLUDING DEFAULTS)"))
+    db.execute(text(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE sale_date >= :start AND sale_date < :end
+            RETURNING *
+        )
+        INSERT INTO {name} SELECT * FROM moved
+    """), bounds)
+    db.execute(text(
+        f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds CHECK (sale_date >= '{start}' AND sale_date < '{end}')"
+    ))
+    db.execute(text(f"ALTER TABLE {SALES_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"))
+    # The partition constraint does the same job from here on
+    db.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds"))
+    return name
+
+
+def ensure_partitions(
+    db: Session,
+    start: Optional[date] = None,
+    months_ahead: Optional[int] = None,
+    today: Optional[date] = None,
+) -> list[str]:
+    """
+    Create any missing monthly partitions from `start` (default: this month)
+    through `months_ahead` months from now; returns the names created
+    
+    Months before the oldest existing partition are only filled in when
+    `start` asks for them. The caller owns the commit.
+    """
+    today = today or date.today()
+    if months_ahead is None:
+        months_ahead = settings.SALES_PARTITION_MONTHS_AHEAD
+    existing = monthly_partitions(db)
+    month = month_start(start or today)
+    last = add_months(month_start(today), months_ahead)
+    created = []
+    while month <= last:
+        if month not in existing:
+            created.append(create_partition(db, month))
+        month = add_months(month, 1)
+    return created
+
+
+def archive_partitions(
+    db: Session,
+    retention_months: Optional[int] = None,
+    mode: Optional[str] = None,
+    today: Optional[date] = None,
+) -> list[str]:
+    """
+    Take partitions that ended more than `retention_months` ago out of
+    `sales`; returns their names (0 retention keeps everything)
+    
+    "detach" moves them into the `sales_archive` schema, "drop" deletes
+    them. Rows left in `sales_default` are not touched. The caller owns the
+    commit.
+    """
+    if retention_months is None:
+        retention_months = settings.SALES_PARTITION_RETENTION_MONTHS
+    mode = mode or settings.SALES_PARTITION_ARCHIVE_MODE
+    if mode not in ARCHIVE_MODES:
+        raise ValueError(f"Unknown archive mode {mode!r}; expected one of {ARCHIVE_MODES}")
+    if retention_months <= 0:
+        return []
+    
+    cutoff = add_months(month_start(today or date.today()), -retention_months)
+    archived = []
+    for month, name in sorted(monthly_partitions(db).items()):
+        if month >= cutoff:
+            break
+        db.execute(text(f"ALTER TABLE {SALES_TABLE} DETACH PARTITION {name}"))
+        if mode == "drop":
+            db.execute(text(f"DROP TABLE {name}"))
+        else:
+            db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+            db.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        archived.append(name)
+    return archived
+
+
+def oldest_retained_date(db: Session) -> Optional[date]:
+    """
+    Earliest date `sales` still covers (None when there are no sales)
+    
+    Raw sales before it have been archived, so the rollup must not be
+    rebuilt for those days.
+    """
+    partitions = monthly_partitions(db)
+    default_min = db.execute(text(f"SELECT min(sale_date) FROM {DEFAULT_PARTITION}")).scalar()
+    candidates = [day for day in (min(partitions, default=None), default_min) if day]
+    return min(candidates) if candidates else None
+
+
+def maintain(db: Session, today: Optional[date] = None) -> dict[str, list[str]]:
+    """
+    Create upcoming partitions and archive expired ones (commits)
+    
+    Attach and detach need exclusive locks, and queries queue up behind a
+    waiting lock request, so lock waits are capped at
+    SALES_PARTITION_LOCK_TIMEOUT_MS. A round that times out is rolled back
+    and retried on the next one.
+    """
+    try:
+        db.execute(select(func.pg_advisory_xact_lock(_LOCK_KEY)))
+        db.execute(text(f"SET LOCAL lock_timeout = {int(settings.SALES_PARTITION_LOCK_TIMEOUT_MS)}"))
+        result = {
+            "created": ensure_partitions(db, today=today),
+            "archived": archive_partitions(db, today=today),
+        }
+        db.commit()
+        return result
+    except Exception:
+        db.rollback()
+        raise
+
+
+class PartitionMaintainer:
+    """
+    Background thread that runs `maintain()` every interval
+    
+    Wired to the app lifespan like the summary refresher; several
+    processes may run it, the advisory lock serialises them.
+    """
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        interval: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval or settings.SALES_PARTITION_MAINTENANCE_SECONDS
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="partition-maintainer", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = 30.0) -> None:
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+    
+    def _run_loop(self) -> None:
+        while not self._stopping.is_set():
+            started = time.perf_counter()
+            db = self.session_factory()
+            try:
+                result = maintain(db)
+                if result["created"] or result["archived"]:
+                    logger.info("Sales partitions created: %s; archived: %s",
+                                result["created"], result["archived"])
+            except OperationalError as e:
+                if getattr(e.orig, "pgcode", None) == LOCK_NOT_AVAILABLE:
+                    logger.warning("Partition maintenance gave up waiting for a lock; retrying next round")
+                else:
+                    logger.exception("Partition maintenance error")
+            except Exception:
+                logger.exception("Partition maintenance error")
+            finally:
+                db.close()
+            self._stopping.wait(max(0.0, self.interval - (time.perf_counter() - started)))
+
+
+partition_maintainer = PartitionMaintainer()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create upcoming sales partitions and archive expired ones")
+    parser.add_argument("--once", action="store_true", help="Run maintenance once and exit")
+    parser.add_argument("--months-ahead", type=int, default=None, help="Override SALES_PARTITION_MONTHS_AHEAD")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=None,
+                        help="Also create partitions back to this date (before loading history)")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    if args.start_date or args.months_ahead is not None:
+        db = SessionLocal()
+        try:
+            db.execute(select(func.pg_advisory_xact_lock(_LOCK_KEY)))
+            created = ensure_partitions(db, start=args.start_date, months_ahead=args.months_ahead)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        print(f"Created {len(created)} partitions: {', '.join(created) or '-'}")
+        return
+    
+    if args.once:
+        db = SessionLocal()
+        try:
+            result = maintain(db)
+        finally:
+            db.close()
+        print(f"Created: {', '.join(result['created']) or '-'}; archived: {', '.join(result['archived']) or '-'}")
+        return
+    
+    partition_maintainer.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        partition_maintainer.stop()
+
+
+if __name__ == "__main__":
+    main()
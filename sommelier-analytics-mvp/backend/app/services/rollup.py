@@ -0,0 +1,175 @@
+"""
+Daily sales rollup maintenance
+
+The `daily_wine_sales` table holds one row per (restaurant, day, wine) with
+pre-aggregated bottles, revenue, profit and transaction count. Every code
+path that writes or deletes sales applies the same delta here in the same
+transaction, so analytics can read the rollup instead of raw sales.
+
+Backfill / repair from the command line:
+    python -m app.services.rollup [--restaurant-id <UUID>]
+
+The command line rebuild starts at the oldest sale still in `sales`, so
+rollup rows for archived sales partitions are kept.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Optional
+from uuid import UUID
+import argparse
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import DailyWineSales, Sale
+
+
+def _to_decimal(value) -> Decimal:
+    """Normalise ints/floats/Decimals coming from ORM objects or CSV parsing"""
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def record_sales(db: Session, sales: Iterable[Sale], sign: int = 1) -> None:
+    """
+    Apply a batch of sales to the rollup (sign=-1 reverses them)
+    
+    Sales are grouped by (restaurant, day, wine) first so each rollup row is
+    touched by at most one upsert per call.
+    """
+    deltas = defaultdict(lambda: {
+        'bottles_sold': 0,
+        'revenue': Decimal(0),
+        'profit': None,
+        'transaction_count': 0,
+    })
+    
+    for sale in sales:
+        delta = deltas[(sale.restaurant_id, sale.sale_date, sale.wine_id)]
+        delta['bottles_sold'] += sign * sale.quantity
+        delta['revenue'] += sign * _to_decimal(sale.total_amount)
+        delta['transaction_count'] += sign
+        if sale.unit_cost is not None:
+            profit = sale.quantity * (_to_decimal(sale.unit_price) - _to_decimal(sale.unit_cost))
+            delta['profit'] = (delta['profit'] or Decimal(0)) + sign * profit
+    
+    apply_deltas(db, [
+        {'restaurant_id': key[0], 'sale_date': key[1], 'wine_id': key[2], **delta}
+        for key, delta in deltas.items()
+    ])
+
+
+def record_sale(db: Session, sale: Sale, sign: int = 1) -> None:
+    """Apply a single sale to the rollup (sign=-1 reverses it)"""
+    record_sales(db, [sale], sign=sign)
+
+
+def apply_deltas(db: Session, rows: list[dict]) -> None:
+    """
+    Upsert pre-aggregated deltas keyed by (restaurant_id, sale_date, wine_id)
+    
+    Each row carries bottles_sold, revenue, profit (None when no sale in the
+    group had a cost) and transaction_count. Rows whose transaction count
+    drops to zero are removed so "last sale" lookups stay correct.
+    """
+    if not rows:
+        return
+    
+    now = datetime.utcnow()
+    table = DailyWineSales.__table__
+    
+    # One statement for all rows: executed as executemany, which SQLAlchemy
+    # batches into multi-row VALUES pages and compiles only once
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.restaurant_id, table.c.sale_date, table.c.wine_id],
+        set_={
+            'bottles_sold': table.c.bottles_sold + stmt.excluded.bottles_sold,
+            'revenue': table.c.revenue + stmt.excluded.revenue,
+            'profit': func.coalesce(
+                func.coalesce(table.c.profit, 0) + stmt.excluded.profit,
+                table.c.profit
+            ),
+            'transaction_count': table.c.transaction_count + stmt.excluded.transaction_count,
+            'updated_at': stmt.excluded.updated_at,
+        }
+    )
+    db.execute(stmt, [{**row, 'updated_at': now} for row in rows])
+    
+    # Only rows that lost sales can have dropped to zero; look them up by key
+    reduced = [
+        (row['restaurant_id'], row['sale_date'], row['wine_id'])
+        for row in rows if row['transaction_count'] < 0
+    ]
+    if reduced:
+        db.execute(table.delete().where(
+            tuple_(table.c.restaurant_id, table.c.sale_date, table.c.wine_id).in_(reduced),
+            table.c.transaction_count <= 0
+        ))
+
+
+def backfill(db: Session, restaurant_id: Optional[UUID] = None, start_date: Optional[date] = None) -> int:
+    """
+    Rebuild the rollup from raw sales (for one restaurant or all of them,
+    from `start_date` onwards when given)
+    
+    Returns the number of rollup rows written. The caller owns the commit.
+    """
+    table = DailyWineSales.__table__
+    
+    delete_stmt = table.delete()
+    if restaurant_id:
+        delete_stmt = delete_stmt.where(table.c.restaurant_id == restaurant_id)
+    if start_date:
+        delete_stmt = delete_stmt.where(table.c.sale_date >= start_date)
+    db.execute(delete_stmt)
+    
+    source = select(
+        Sale.restaurant_id,
+        Sale.sale_date,
+        Sale.wine_id,
+        func.sum(Sale.quantity),
+        func.sum(Sale.total_amount),
+        func.sum(Sale.quantity * (Sale.unit_price - Sale.unit_cost)),
+        func.count(),
+        func.now(),
+    ).group_by(Sale.restaurant_id, Sale.sale_date, Sale.wine_id)
+    if restaurant_id:
+        source = source.where(Sale.restaurant_id == restaurant_id)
+    if start_date:
+        source = source.where(Sale.sale_date >= start_date)
+    
+    result = db.execute(
+        table.insert().from_select(
+            ['restaurant_id', 'sale_date', 'wine_id', 'bottles_sold', 'revenue',
+             'profit', 'transaction_count', 'updated_at'],
+            source
+        )
+    )
+    return result.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the daily_wine_sales rollup from raw sales")
+    parser.add_argument("--restaurant-id", type=UUID, default=None, help="Only rebuild this restaurant")
+    args = parser.parse_args()
+    
+    from app.core.database import SessionLocal
+    from app.services.partitions import oldest_retained_date
+    
+    db = SessionLocal()
+    try:
+        start_date = oldest_retained_date(db)
+        rows = backfill(db, args.restaurant_id, start_date)
+        db.commit()
+        print(f"Rebuilt daily_wine_sales from {start_date or 'the start'}: {rows} rows")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
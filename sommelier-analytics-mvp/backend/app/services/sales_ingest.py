@@ -0,0 +1,156 @@
+"""
+Streaming bulk ingest of sales CSV files
+
+The file is parsed incrementally and processed in fixed-size batches. For
+each batch, wine names are resolved with one query, rows are loaded with
+Postgres COPY (multi-row INSERT on other drivers), and the wine counters and
+daily rollup receive one aggregated update per wine / per (day, wine).
+Memory use therefore depends on the batch size, not the file size.
+
+Expected CSV format:
+wine_name,sale_date,quantity,unit_price,unit_cost,server_name,table_number
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+import csv
+import io
+import uuid
+
+from sqlalchemy import Integer, column, func, insert, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.orm import Session
+
+from app.models import Sale, Wine
+from app.services import rollup
+from app.services.csv_ingest import CsvIngestor, IngestResult, parse_money
+
+# Column order used for both COPY and INSERT
+SALE_COLUMNS = [
+    'id', 'restaurant_id', 'wine_id', 'sale_date', 'quantity', 'unit_price',
+    'total_amount', 'unit_cost', 'server_name', 'table_number', 'created_at',
+]
+
+
+class SalesIngestor(CsvIngestor):
+    """Load a sales CSV for one restaurant"""
+    
+    def __init__(self, db: Session, restaurant_id: UUID, **kwargs):
+        super().__init__(db, restaurant_id, **kwargs)
+        self._wine_ids: dict[str, Optional[UUID]] = {}  # lower(name) -> id (None = unknown)
+        
+        bind = db.get_bind()
+        self._use_copy = bind.dialect.name == 'postgresql' and bind.dialect.driver == 'psycopg2'
+    
+    def _resolve_wines(self, names: set[str]) -> None:
+        """Look up any wine names not seen in earlier batches"""
+        missing = [name for name in names if name not in self._wine_ids]
+        if not missing:
+            return
+        
+        rows = self.db.execute(
+            select(Wine.id, func.lower(Wine.name)).where(
+                Wine.restaurant_id == self.restaurant_id,
+                func.lower(Wine.name).in_(missing)
+            )
+        ).all()
+        for name in missing:
+            self._wine_ids[name] = None
+        for wine_id, name in rows:
+            self._wine_ids[name] = wine_id
+    
+    def _process_batch(self, batch: list[tuple[int, dict]], result: IngestResult) -> None:
+        self._resolve_wines({(row.get('wine_name') or '').strip().lower() for _, row in batch})
+        
+        now = datetime.utcnow()
+        sales = []
+        wine_deltas = defaultdict(int)
+        rollup_deltas = {}
+        
+        for row_num, row in batch:
+            result.rows_processed += 1
+            try:
+                # Look up wine by name
+                wine_name = (row.get('wine_name') or '').strip()
+                wine_id = self._wine_ids.get(wine_name.lower())
+                if not wine_id:
+                    self._add_error(result, f"Row {row_num}: Wine '{wine_name}' not found in inventory")
+                    continue
+                
+                # Parse fields
+                sale_date = date.fromisoformat(row['sale_date'])
+                quantity = int(row['quantity'])
+                unit_price = parse_money(row, 'unit_price')
+                unit_cost = parse_money(row, 'unit_cost', required=False)
+                total_amount = unit_price * quantity
+            except (KeyError, ValueError, TypeError) as e:
+                self._add_error(result, f"Row {row_num}: {str(e)}")
+                continue
+            
+            sales.append((
+                uuid.uuid4(), self.restaurant_id, wine_id, sale_date, quantity, unit_price,
+                total_amount, unit_cost, row.get('server_name') or None,
+                row.get('table_number') or None, now,
+            ))
+            wine_deltas[wine_id] += quantity
+            
+            delta = rollup_deltas.setdefault((sale_date, wine_id), {
+                'restaurant_id': self.restaurant_id,
+                'sale_date': sale_date,
+                'wine_id': wine_id,
+                'bottles_sold': 0,
+                'revenue': Decimal(0),
+                'profit': None,
+                'transaction_count': 0,
+            })
+            delta['bottles_sold'] += quantity
+            delta['revenue'] += total_amount
+            delta['transaction_count'] += 1
+            if unit_cost is not None:
+                delta['profit'] = (delta['profit'] or Decimal(0)) + quantity * (unit_price - unit_cost)
+        
+        if not sales:
+            return
+        
+        self._load_sales(sales)
+        self._apply_wine_deltas(wine_deltas)
+        rollup.apply_deltas(self.db, list(rollup_deltas.values()))
+        result.rows_loaded += len(sales)
+    
+    def _load_sales(self, sales: list[tuple]) -> None:
+        if self._use_copy:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(sales)  # None -> empty unquoted field -> NULL
+            buffer.seek(0)
+            dbapi_connection = self.db.connection().connection.dbapi_connection
+            with dbapi_connection.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY sales ({', '.join(SALE_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+        else:
+            self.db.execute(
+                insert(Sale.__table__),
+                [dict(zip(SALE_COLUMNS, sale)) for sale in sales]
+            )
+    
+    def _apply_wine_deltas(self, wine_deltas: dict[UUID, int]) -> None:
+        """One UPDATE for every wine touched by the batch"""
+        deltas = values(
+            column('wine_id', PG_UUID(as_uuid=True)),
+            column('quantity', Integer),
+            name='deltas'
+        ).data(list(wine_deltas.items()))
+        
+        wines = Wine.__table__
+        self.db.execute(
+            update(wines)
+            .where(wines.c.id == deltas.c.wine_id)
+            .values(
+                times_sold=func.coalesce(wines.c.times_sold, 0) + deltas.c.quantity,
+                inventory_count=func.greatest(func.coalesce(wines.c.inventory_count, 0) - deltas.c.quantity, 0),
+                updated_at=datetime.utcnow(),
+            )
+        )
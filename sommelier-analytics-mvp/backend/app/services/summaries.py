@@ -0,0 +1,225 @@
+"""
+Precomputed analytics summaries
+
+The heaviest reports are also kept as per-restaurant summary tables:
+every wine ranked over the trailing 90 days by each ranking metric
+(`wine_ranking_summaries`) and year-to-date profit per wine
+(`wine_profit_summaries`). They hold exactly what the live queries return,
+so `source=materialized` reads are a short index scan, at the price of
+being up to ANALYTICS_SUMMARY_REFRESH_SECONDS (plus one refresh) old.
+
+Each restaurant is rebuilt in its own transaction (readers keep seeing the
+previous rows until it commits), several restaurants at a time, and a
+transaction-level advisory lock keeps two processes from rebuilding the
+same restaurant at once. Plain tables are used rather than materialized
+views because a materialized view can only be refreshed as a whole.
+
+Refresh from the command line:
+    python -m app.services.summaries [--once] [--restaurant-id <UUID>]
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
+from uuid import UUID
+import argparse
+import logging
+import threading
+import time
+
+from sqlalchemy import Date, String, delete, func, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import AnalyticsSummaryState, Restaurant, WineProfitSummary, WineRankingSummary
+from app.services.analytics_queries import profit_analysis_query, ranked_wines_query
+
+logger = logging.getLogger(__name__)
+
+RANKING_WINDOW_DAYS = 90
+RANK_METRICS = ("bottles", "revenue", "profit", "margin")
+
+
+def ranking_window(today: date) -> tuple[date, date]:
+    """The window of the materialized rankings (the top/bottom default)"""
+    return today - timedelta(days=RANKING_WINDOW_DAYS), today
+
+
+def profit_period(today: date) -> tuple[date, date]:
+    """The period of the materialized profit analysis (year to date)"""
+    return date(today.year, 1, 1), today
+
+
+def _lock_key(restaurant_id: UUID) -> int:
+    # pg advisory locks take a signed 64-bit key
+    return (restaurant_id.int >> 65) or 1
+
+
+def refresh_restaurant(db: Session, restaurant_id: UUID, today: Optional[date] = None) -> bool:
+    """
+    Rebuild one restaurant's summaries (commits)
+    
+    Returns False without doing anything if another process is already
+    rebuilding them.
+    """
+    today = today or date.today()
+    started = time.perf_counter()
+    try:
+        if not db.execute(select(func.pg_try_advisory_xact_lock(_lock_key(restaurant_id)))).scalar():
+            db.rollback()
+            return False
+        
+        window_start, window_end = ranking_window(today)
+        db.execute(delete(WineRankingSummary).where(WineRankingSummary.restaurant_id == restaurant_id))
+        for rank_by in RANK_METRICS:
+            ranked = ranked_wines_query([restaurant_id], window_start, window_end, rank_by, limit=None).subquery()
+            db.execute(insert(WineRankingSummary).from_select(
+                [
+                    'restaurant_id', 'rank_by', 'wine_id', 'window_start', 'window_end',
+                    'top_rank', 'bottom_rank', 'wine_name', 'producer', 'vintage',
+                    'total_bottles_sold', 'total_revenue', 'total_profit', 'avg_price',
+                    'profit_margin', 'last_sale_date',
+                ],
+                select(
+                    ranked.c.restaurant_id, literal(rank_by, String), ranked.c.wine_id,
+                    literal(window_start, Date), literal(window_end, Date),
+                    ranked.c.top_rank, ranked.c.bottom_rank, ranked.c.wine_name, ranked.c.producer,
+                    ranked.c.vintage, ranked.c.total_bottles_sold, ranked.c.total_revenue,
+                    ranked.c.total_profit, ranked.c.avg_price, ranked.c.profit_margin,
+                    ranked.c.last_sale_date,
+                )
+            ))
+        
+        period_start, period_end = profit_period(today)
+        profit = profit_analysis_query(restaurant_id, period_start, period_end).subquery()
+        db.execute(delete(WineProfitSummary).where(WineProfitSummary.restaurant_id == restaurant_id))
+        db.execute(insert(WineProfitSummary).from_select(
+            ['restaurant_id', 'wine_id', 'period_start', 'period_end', 'wine_name', 'cost', 'price', 'total_profit'],
+            select(
+                literal(restaurant_id, WineProfitSummary.restaurant_id.type), profit.c.id,
+                literal(period_start, Date), literal(period_end, Date),
+                profit.c.name, profit.c.cost, profit.c.price, profit.c.total_profit,
+            )
+        ))
+        
+        state = {
+            'restaurant_id': restaurant_id,
+            'refreshed_at': datetime.utcnow(),
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+        db.execute(
+            insert(AnalyticsSummaryState).values(**state)
+            .on_conflict_do_update(index_elements=['restaurant_id'], set_=state)
+        )
+        db.commit()
+        return True
+    except Exception:
+        db.rollback()
+        raise
+
+
+def refresh_all(
+    session_factory: Callable[[], Session] = SessionLocal,
+    concurrency: Optional[int] = None,
+) -> int:
+    """Rebuild every restaurant's summaries, several at a time; returns the count"""
+    db = session_factory()
+    try:
+        restaurant_ids = db.execute(select(Restaurant.id)).scalars().all()
+    finally:
+        db.close()
+    
+    def refresh_one(restaurant_id: UUID) -> bool:
+        db = session_factory()
+        try:
+            return refresh_restaurant(db, restaurant_id)
+        except Exception:
+            logger.exception("Summary refresh failed for restaurant %s", restaurant_id)
+            return False
+        finally:
+            db.close()
+    
+    workers = concurrency or settings.ANALYTICS_SUMMARY_REFRESH_CONCURRENCY
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summary-refresh") as pool:
+        return sum(pool.map(refresh_one, restaurant_ids))
+
+
+class SummaryRefresher:
+    """
+    Background thread that refreshes every summary each interval
+    
+    `start()` / `stop()` are wired to the app lifespan, like the import
+    worker; run it in one process only, or let the advisory locks sort out
+    the overlap.
+    """
+    
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        interval: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.interval = interval or settings.ANALYTICS_SUMMARY_REFRESH_SECONDS
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        if self._thread:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run_loop, name="summary-refresher", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = 30.0) -> None:
+        """Let the current refresh finish and exit"""
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+    
+    def _run_loop(self) -> None:
+        while not self._stopping.is_set():
+            started = time.perf_counter()
+            try:
+                count = refresh_all(self.session_factory)
+                logger.info("Refreshed analytics summaries for %d restaurants in %.1fs",
+                            count, time.perf_counter() - started)
+            except Exception:
+                logger.exception("Summary refresher error")
+            self._stopping.wait(max(0.0, self.interval - (time.perf_counter() - started)))
+
+
+summary_refresher = SummaryRefresher()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild precomputed analytics summaries")
+    parser.add_argument("--once", action="store_true", help="Refresh every restaurant once and exit")
+    parser.add_argument("--restaurant-id", type=UUID, default=None, help="Refresh a single restaurant")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    if args.restaurant_id:
+        db = SessionLocal()
+        try:
+            refreshed = refresh_restaurant(db, args.restaurant_id)
+        finally:
+            db.close()
+        print(f"Refreshed {args.restaurant_id}" if refreshed else "Refresh already running elsewhere")
+        return
+    
+    if args.once:
+        print(f"Refreshed summaries for {refresh_all()} restaurants")
+        return
+    
+    summary_refresher.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        summary_refresher.stop()
+
+
+if __name__ == "__main__":
+    main()
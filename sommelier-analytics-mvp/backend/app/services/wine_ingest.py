@@ -0,0 +1,48 @@
+"""
+Batched bulk ingest of wine inventory CSV files
+
+Expected CSV format:
+name,producer,vintage,varietal,region,country,wine_type,body,price,cost,inventory_count
+"""
+from sqlalchemy import insert
+
+from app.models import Wine, WineBody, WineType
+from app.services.csv_ingest import CsvIngestor, IngestResult, parse_money
+
+
+class WineIngestor(CsvIngestor):
+    """Load a wine inventory CSV for one restaurant"""
+    
+    def _process_batch(self, batch: list[tuple[int, dict]], result: IngestResult) -> None:
+        wines = []
+        
+        for row_num, row in batch:
+            result.rows_processed += 1
+            try:
+                name = (row.get('name') or '').strip()
+                if not name:
+                    raise ValueError("name is required")
+                
+                wines.append({
+                    'restaurant_id': self.restaurant_id,
+                    'name': name,
+                    'producer': row.get('producer') or None,
+                    'vintage': int(row['vintage']) if row.get('vintage') else None,
+                    'varietal': row.get('varietal') or None,
+                    'region': row.get('region') or None,
+                    'country': row.get('country') or None,
+                    'wine_type': WineType(row['wine_type']) if row.get('wine_type') else None,
+                    'body': WineBody(row['body']) if row.get('body') else None,
+                    'price': parse_money(row, 'price'),
+                    'cost': parse_money(row, 'cost', required=False),
+                    'inventory_count': int(row.get('inventory_count') or 0),
+                })
+            except (KeyError, ValueError, TypeError) as e:
+                self._add_error(result, f"Row {row_num}: {str(e)}")
+        
+        if not wines:
+            return
+        
+        # Column defaults (id, timestamps, times_sold, ...) are applied per row
+        self.db.execute(insert(Wine.__table__), wines)
+        result.rows_loaded += len(wines)
@@ -0,0 +1,3 @@
+"""
+Benchmarks and query-plan checks (run against a scratch database)
+"""
@@ -0,0 +1,78 @@
+"""
+Compare two endpoint benchmark results
+
+Reads two JSON files written by `benchmarks.endpoints --json` (typically
+the parent commit and the change under review, on the same dataset and
+machine) and prints, per scenario, the p50 time, SQL statement count and
+response size of each. Exits non-zero if any scenario regressed:
+
+- p50 slower by more than --tolerance (a fraction) and --min-delta-ms
+- more SQL statements per call (an N+1 creeping in)
+- a status code that differs, or any server error (5xx) after, even one
+  that was already there before
+
+Run from the backend directory:
+    python -m benchmarks.compare before.json after.json --tolerance 0.2
+"""
+from typing import Any
+import argparse
+import json
+import sys
+
+
+def regressions(before: dict[str, Any], after: dict[str, Any], tolerance: float, min_delta_ms: float) -> list[str]:
+    """Why `after` is worse than `before` for one scenario (empty if it is not)"""
+    problems = []
+    delta = after["p50_ms"] - before["p50_ms"]
+    if delta > min_delta_ms and delta > before["p50_ms"] * tolerance:
+        problems.append(f"p50 +{delta:.1f} ms ({delta / before['p50_ms']:+.0%})")
+    if after["statements"] > before["statements"]:
+        problems.append(f"statements {before['statements']} -> {after['statements']}")
+    if after["status"] != before["status"]:
+        problems.append(f"status {before['status']} -> {after['status']}")
+    elif any(status >= 500 for status in after["status"]):
+        problems.append(f"server error {after['status']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two endpoint benchmark result files")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 slowdown, as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore p50 changes smaller than this")
+    args = parser.parse_args()
+    
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    
+    for label, run in (("before", before), ("after", after)):
+        meta = run["meta"]
+        dirty = " (dirty)" if meta.get("dirty") else ""
+        print(f"{label:7} {(meta.get('commit') or '?')[:10]}{dirty}  {meta['created_at']}  "
+              f"{meta['dataset']['sales']} sales, {meta['dataset']['wines']} wines")
+    # Counts drift a little between runs (the write scenarios add rows)
+    if before["meta"]["dataset"]["restaurant_id"] != after["meta"]["dataset"]["restaurant_id"]:
+        print("warning: the runs benchmarked different restaurants")
+    
+    failed = False
+    print(f"\n{'scenario':34} {'p50 before':>11} {'p50 after':>10} {'change':>8} {'stmts':>7} {'bytes':>17}")
+    for name in sorted(set(before["scenarios"]) | set(after["scenarios"])):
+        old, new = before["scenarios"].get(name), after["scenarios"].get(name)
+        if old is None or new is None:
+            print(f"{name:34} {'only in ' + ('after' if old is None else 'before'):>30}")
+            continue
+        change = (new["p50_ms"] - old["p50_ms"]) / old["p50_ms"] if old["p50_ms"] else 0.0
+        problems = regressions(old, new, args.tolerance, args.min_delta_ms)
+        failed = failed or bool(problems)
+        print(f"{name:34} {old['p50_ms']:11.1f} {new['p50_ms']:10.1f} {change:+8.0%} "
+              f"{old['statements']:3}>{new['statements']:<3} {old['response_bytes']:8}>{new['response_bytes']:<8}"
+              f"{'  REGRESSION: ' + '; '.join(problems) if problems else ''}")
+    
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
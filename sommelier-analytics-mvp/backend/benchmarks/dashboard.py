@@ -0,0 +1,175 @@
+"""
+Dashboard summary round trips
+
+Compares the dashboard summary as it used to be computed (eight sequential
+statements over `sales` and `wines`, kept below as `legacy_dashboard_summary`)
+with the single CTE statement the endpoint runs now. Both run on the same
+psycopg2 session, so the difference is the query shape and the number of
+round trips. Reports statements per call and median wall time.
+
+On a local socket a round trip costs next to nothing; `--rtt-ms` adds a
+simulated network round trip (a sleep before each statement) to show what
+the eight trips cost against a database across the network.
+
+Run from the backend directory against a restaurant from benchmarks.datagen:
+    python -m benchmarks.dashboard --restaurant-id <UUID> --rtt-ms 0 2
+"""
+from datetime import date, timedelta
+from typing import Any, Callable
+from uuid import UUID
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("IMPORT_WORKER_ENABLED", "false")
+os.environ.setdefault("DEBUG", "false")
+
+import numpy as np
+from sqlalchemy import and_, desc, event, func
+from sqlalchemy.orm import Session
+
+from app.api.v1.analytics import _dashboard_summary, _dashboard_summary_query
+from app.core.database import SessionLocal, engine
+from app.models import Restaurant, Sale, Wine
+from app.schemas.analytics import DashboardSummary
+
+
+def legacy_dashboard_summary(db: Session, restaurant_id: UUID) -> DashboardSummary:
+    """The dashboard before the single-statement query (fixed 30 days, 5/20/5 thresholds)"""
+    restaurant = db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
+    if not restaurant:
+        raise LookupError("Restaurant not found")
+    
+    end_date = date.today()
+    start_date = end_date - timedelta(days=30)
+    
+    total_wines = db.query(func.count(Wine.id)).filter(Wine.restaurant_id == restaurant_id).scalar()
+    total_bottles = db.query(func.sum(Wine.inventory_count)).filter(
+        Wine.restaurant_id == restaurant_id
+    ).scalar() or 0
+    
+    sales_query = db.query(
+        func.sum(Sale.quantity).label('total_sales'),
+        func.sum(Sale.total_amount).label('total_revenue'),
+        func.sum(Sale.quantity * (Sale.unit_price - Sale.unit_cost)).label('total_profit')
+    ).filter(
+        and_(
+            Sale.restaurant_id == restaurant_id,
+            Sale.sale_date >= start_date,
+            Sale.sale_date <= end_date
+        )
+    ).first()
+    total_sales = sales_query.total_sales or 0
+    revenue = sales_query.total_revenue or 0
+    profit = sales_query.total_profit
+    avg_profit_margin = (float(profit) / float(revenue)) * 100 if profit and revenue and revenue > 0 else None
+    
+    top_wine_row = db.query(
+        Wine.name,
+        func.sum(Sale.quantity).label('sales_count')
+    ).join(Sale).filter(
+        and_(
+            Sale.restaurant_id == restaurant_id,
+            Sale.sale_date >= start_date
+        )
+    ).group_by(Wine.id, Wine.name).order_by(desc('sales_count')).first()
+    
+    slowest_wine_row = db.query(Wine.name, func.max(Sale.sale_date).label('last_sale'))\
+        .outerjoin(Sale)\
+        .filter(Wine.restaurant_id == restaurant_id)\
+        .group_by(Wine.id, Wine.name)\
+        .having(func.coalesce(func.max(Sale.sale_date), date(1900, 1, 1)) < start_date)\
+        .first()
+    
+    wines_low_stock = db.query(func.count(Wine.id)).filter(
+        and_(Wine.restaurant_id == restaurant_id, Wine.inventory_count < 5, Wine.times_sold > 0)
+    ).scalar() or 0
+    wines_overstocked = db.query(func.count(Wine.id)).filter(
+        and_(Wine.restaurant_id == restaurant_id, Wine.inventory_count > 20, Wine.times_sold < 5)
+    ).scalar() or 0
+    
+    return DashboardSummary(
+        total_wines=total_wines,
+        total_bottles_in_stock=int(total_bottles),
+        total_sales_last_30_days=int(total_sales),
+        revenue_last_30_days=revenue,
+        profit_last_30_days=profit,
+        avg_profit_margin=avg_profit_margin,
+        top_wine_this_month=top_wine_row[0] if top_wine_row else None,
+        slowest_wine=slowest_wine_row[0] if slowest_wine_row else None,
+        wines_needing_reorder=wines_low_stock,
+        overstocked_wines=wines_overstocked
+    )
+
+
+def dashboard_summary(db: Session, restaurant_id: UUID) -> DashboardSummary:
+    """What the endpoint does now, on the sync session"""
+    row = db.execute(_dashboard_summary_query([restaurant_id], date.today())).first()
+    if not row:
+        raise LookupError("Restaurant not found")
+    return _dashboard_summary(row)
+
+
+class RoundTrips:
+    """Counts statements on the sync engine, sleeping `rtt_ms` before each"""
+    
+    def __init__(self, rtt_ms: float):
+        self.rtt = rtt_ms / 1000
+        self.count = 0
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        if self.rtt:
+            time.sleep(self.rtt)
+    
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        return self
+    
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+
+
+def measure(summary: Callable[[Session, UUID], DashboardSummary], restaurant_id: UUID, rtt_ms: float, repeat: int) -> dict[str, Any]:
+    with SessionLocal() as db:
+        summary(db, restaurant_id)  # Warm up the connection and plan caches
+        timings, round_trips = [], []
+        with RoundTrips(rtt_ms) as trips:
+            for _ in range(repeat):
+                trips.count = 0
+                started = time.perf_counter()
+                summary(db, restaurant_id)
+                timings.append((time.perf_counter() - started) * 1000)
+                round_trips.append(trips.count)
+                db.rollback()
+    return {
+        "round_trips": int(np.median(round_trips)),
+        "p50_ms": round(float(np.median(timings)), 2),
+        "min_ms": round(min(timings), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard summary: eight statements vs one")
+    parser.add_argument("--restaurant-id", type=UUID, required=True)
+    parser.add_argument("--rtt-ms", type=float, nargs="*", default=[0.0], help="Simulated round trip times")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", default=None, help="Write results to this file")
+    args = parser.parse_args()
+    
+    results = {}
+    print(f"{'rtt ms':>6}  {'version':8} {'round trips':>11} {'p50 ms':>8} {'min ms':>8}")
+    for rtt_ms in args.rtt_ms:
+        for name, summary in (("before", legacy_dashboard_summary), ("after", dashboard_summary)):
+            result = measure(summary, args.restaurant_id, rtt_ms, args.repeat)
+            results.setdefault(str(rtt_ms), {})[name] = result
+            print(f"{rtt_ms:6.1f}  {name:8} {result['round_trips']:11} {result['p50_ms']:8.2f} {result['min_ms']:8.2f}")
+    
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"restaurant_id": str(args.restaurant_id), "repeat": args.repeat, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Synthetic dataset generator for the benchmarks
+
+Generates restaurants, wine lists and a multi-year sales history with
+numpy, shaped like real restaurant data:
+
+- restaurants differ in size (lognormal share of the sales) and come in
+  groups of up to five locations (`group_id`), for the group endpoints
+- wine prices are lognormal around $60, costs 30-45% of price (a few
+  unknown), stock 0-60 bottles; types and body follow a typical list
+- popularity is Zipf-like within each list, and the last 10% of each list
+  never sells
+- sale dates carry weekday (Friday/Saturday peak), December and summer
+  seasonality and year-on-year growth; most tables order one bottle
+
+Everything is drawn from one seeded generator, so a given seed and scale
+always produce the same rows. Loading goes through COPY: wines directly,
+sales via an unlogged staging table of integers joined to the wine list
+(PostgreSQL assigns the sale ids), followed by partition creation, the
+daily rollup and summary tables, and VACUUM ANALYZE.
+
+Also builds the CSV uploads used by the bulk upload scenarios.
+
+Run from the backend directory against a scratch database:
+    python -m benchmarks.datagen --restaurants 10 --wines 2000 --sales 5000000 --years 3
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+from uuid import UUID
+import argparse
+import io
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from app.core.database import SessionLocal, engine
+from app.models import WineBody, WineType
+from app.services import partitions, rollup, summaries
+
+# Rows per COPY chunk (bounds the memory of the CSV buffer)
+COPY_CHUNK = 500_000
+
+VARIETALS = {
+    WineType.RED: ["Cabernet Sauvignon", "Pinot Noir", "Merlot", "Syrah", "Nebbiolo", "Tempranillo", "Malbec"],
+    WineType.WHITE: ["Chardonnay", "Sauvignon Blanc", "Riesling", "Chenin Blanc", "Albariño"],
+    WineType.ROSE: ["Grenache Rosé", "Provence Rosé"],
+    WineType.SPARKLING: ["Champagne", "Crémant", "Prosecco"],
+    WineType.DESSERT: ["Sauternes", "Tokaji"],
+    WineType.FORTIFIED: ["Port", "Sherry"],
+}
+TYPE_SHARE = {
+    WineType.RED: 0.48, WineType.WHITE: 0.32, WineType.ROSE: 0.06,
+    WineType.SPARKLING: 0.09, WineType.DESSERT: 0.03, WineType.FORTIFIED: 0.02,
+}
+REGIONS = [
+    ("Napa Valley", "USA"), ("Sonoma", "USA"), ("Willamette Valley", "USA"), ("Bordeaux", "France"),
+    ("Burgundy", "France"), ("Champagne", "France"), ("Rhône", "France"), ("Piedmont", "Italy"),
+    ("Tuscany", "Italy"), ("Rioja", "Spain"), ("Mendoza", "Argentina"), ("Marlborough", "New Zealand"),
+    ("Mosel", "Germany"), ("Douro", "Portugal"), ("Barossa", "Australia"),
+]
+# Share of a week's sales by weekday, Monday first
+WEEKDAY_WEIGHT = np.array([0.09, 0.10, 0.12, 0.14, 0.21, 0.22, 0.12])
+# Share of a year's sales by month (December parties, summer terraces)
+MONTH_WEIGHT = np.array([0.07, 0.07, 0.08, 0.08, 0.09, 0.09, 0.09, 0.08, 0.08, 0.08, 0.08, 0.11])
+ANNUAL_GROWTH = 0.08
+
+
+@dataclass
+class Dataset:
+    """Generated rows, as columns (one entry per restaurant / wine / sale)"""
+    
+    restaurants: pd.DataFrame  # id, name, email, group_id
+    wines: pd.DataFrame  # id, restaurant_id, name, producer, ..., price, cost, inventory_count
+    sales: pd.DataFrame  # wine (row of `wines`), day (offset from first_day), quantity, unit_price, minute
+    first_day: date
+    days: int
+
+
+def uuids(rng: np.random.Generator, n: int) -> list[UUID]:
+    """`n` version-4 UUIDs drawn from `rng` (reproducible, unlike uuid4())"""
+    raw = rng.bytes(16 * n)
+    return [UUID(bytes=raw[i:i + 16], version=4) for i in range(0, 16 * n, 16)]
+
+
+def restaurant_frame(rng: np.random.Generator, restaurants: int, seed: int) -> pd.DataFrame:
+    ids = uuids(rng, restaurants)
+    groups = uuids(rng, (restaurants + 4) // 5)
+    return pd.DataFrame({
+        "id": ids,
+        "name": [f"Benchmark {seed}-{i}" for i in range(restaurants)],
+        "email": [f"bench-{rid}@example.com" for rid in ids],
+        "group_id": [groups[i // 5] for i in range(restaurants)],
+    })
+
+
+def wine_frame(rng: np.random.Generator, restaurant_ids: list, wines: int) -> pd.DataFrame:
+    """`wines` wines for each restaurant, in list order (most popular first)"""
+    n = len(restaurant_ids) * wines
+    types = list(TYPE_SHARE)
+    wine_type = rng.choice(len(types), size=n, p=list(TYPE_SHARE.values()))
+    varietal = np.array([
+        VARIETALS[types[t]][v % len(VARIETALS[types[t]])]
+        for t, v in zip(wine_type, rng.integers(0, 1 << 16, size=n))
+    ])
+    region = rng.integers(0, len(REGIONS), size=n)
+    vintage = rng.integers(2000, date.today().year - 1, size=n)
+    price = np.clip(np.round(rng.lognormal(np.log(60), 0.6, size=n)), 25, 900)
+    cost = np.round(price * rng.uniform(0.30, 0.45, size=n), 2)
+    body = np.array([b.name for b in WineBody])[rng.integers(0, len(WineBody), size=n)]
+    producer = np.char.add("Domaine ", rng.integers(1, 400, size=n).astype(str))
+    position = np.tile(np.arange(wines), len(restaurant_ids))
+    name = [
+        f"{v} {p} {va} #{pos:05d}"
+        for v, p, va, pos in zip(vintage, producer, varietal, position)
+    ]
+    return pd.DataFrame({
+        "id": uuids(rng, n),
+        "restaurant_id": np.repeat(np.array(restaurant_ids, dtype=object), wines),
+        "position": position,
+        "name": name,
+        "producer": producer,
+        "vintage": vintage,
+        "varietal": varietal,
+        "region": [REGIONS[r][0] for r in region],
+        "country": [REGIONS[r][1] for r in region],
+        "wine_type": [types[t].name for t in wine_type],
+        "body": body,
+        "price": price,
+        "cost": np.where(rng.random(n) < 0.05, np.nan, cost),
+        "inventory_count": np.minimum(rng.poisson(14, size=n), 60),
+    })
+
+
+def day_weights(first_day: date, days: int) -> np.ndarray:
+    """Relative sales volume of each day: weekday x month x growth"""
+    dates = pd.date_range(first_day, periods=days, freq="D")
+    weights = WEEKDAY_WEIGHT[dates.dayofweek] * MONTH_WEIGHT[dates.month - 1]
+    weights *= (1 + ANNUAL_GROWTH) ** (np.arange(days) / 365)
+    return weights / weights.sum()
+
+
+def sales_frame(
+    rng: np.random.Generator,
+    wines: pd.DataFrame,
+    per_restaurant: int,
+    sales: int,
+    days: int,
+    first_day: date,
+) -> pd.DataFrame:
+    """`sales` sales, as row numbers into `wines` plus day offsets"""
+    restaurants = len(wines) // per_restaurant
+    share = rng.lognormal(0, 0.5, size=restaurants)
+    counts = rng.multinomial(sales, share / share.sum())
+    
+    # Zipf-like popularity over the part of each list that sells
+    selling = max(1, int(per_restaurant * 0.9))
+    popularity = 1 / np.arange(1, selling + 1) ** 0.9
+    popularity /= popularity.sum()
+    position = np.concatenate([rng.choice(selling, size=c, p=popularity) for c in counts])
+    wine = np.repeat(np.arange(restaurants) * per_restaurant, counts) + position
+    
+    quantity = rng.choice([1, 2, 3, 4, 6], size=sales, p=[0.72, 0.18, 0.05, 0.03, 0.02])
+    price = wines["price"].to_numpy()[wine]
+    # Occasional 10% discount (happy hour, staff)
+    unit_price = np.where(rng.random(sales) < 0.04, np.round(price * 0.9, 2), price)
+    return pd.DataFrame({
+        "wine": wine,
+        "day": rng.choice(days, size=sales, p=day_weights(first_day, days)),
+        "quantity": quantity,
+        "unit_price": unit_price,
+        "minute": rng.integers(17 * 60, 23 * 60, size=sales),  # Evening service
+    })
+
+
+def generate(
+    restaurants: int = 10,
+    wines: int = 2000,
+    sales: int = 5_000_000,
+    years: int = 3,
+    seed: int = 0,
+    today: Optional[date] = None,
+) -> Dataset:
+    rng = np.random.default_rng(seed)
+    days = 365 * years
+    first_day = (today or date.today()) - timedelta(days=days - 1)
+    restaurant_rows = restaurant_frame(rng, restaurants, seed)
+    wine_rows = wine_frame(rng, list(restaurant_rows["id"]), wines)
+    return Dataset(
+        restaurants=restaurant_rows,
+        wines=wine_rows,
+        sales=sales_frame(rng, wine_rows, wines, sales, days, first_day),
+        first_day=first_day,
+        days=days,
+    )
+
+
+def _copy(cursor, table: str, frame: pd.DataFrame) -> None:
+    """COPY `frame` into `table` (its columns, in order) in chunks"""
+    columns = ", ".join(frame.columns)
+    for start in range(0, len(frame), COPY_CHUNK):
+        buffer = io.StringIO()
+        frame.iloc[start:start + COPY_CHUNK].to_csv(buffer, header=False, index=False)
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def load(dataset: Dataset) -> dict[str, float]:
+    """Insert `dataset` and build everything derived from it; returns seconds per step"""
+    timings = {}
+    now = datetime.utcnow()
+    restaurant_ids = list(dataset.restaurants["id"])
+    
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        cursor = db.connection().connection.cursor()
+        _copy(cursor, "restaurants", dataset.restaurants.assign(
+            created_at=now, updated_at=now, is_active=True, subscription_tier="trial",
+        ))
+        wines = dataset.wines.drop(columns=["position"]).assign(
+            created_at=now, updated_at=now, bottle_size="750ml", times_sold=0,
+        )
+        _copy(cursor, "wines", wines)
+        timings["restaurants_and_wines"] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        partitions.ensure_partitions(db, start=dataset.first_day)
+        db.execute(text("""
+            CREATE TEMP TABLE bench_wine_rows (n int PRIMARY KEY, id uuid, restaurant_id uuid, cost numeric)
+            ON COMMIT DROP
+        """))
+        _copy(cursor, "bench_wine_rows", pd.DataFrame({
+            "n": np.arange(len(dataset.wines)),
+            "id": dataset.wines["id"],
+            "restaurant_id": dataset.wines["restaurant_id"],
+            "cost": dataset.wines["cost"],
+        }))
+        db.execute(text("""
+            CREATE UNLOGGED TABLE bench_sales_stage (
+                wine int, day int, quantity int, unit_price numeric(10, 2), minute int
+            )
+        """))
+        _copy(cursor, "bench_sales_stage", dataset.sales)
+        db.execute(text("""
+            INSERT INTO sales (
+                id, restaurant_id, wine_id, sale_date, quantity,
+                unit_price, total_amount, unit_cost, created_at
+            )
+            SELECT
+                gen_random_uuid(), w.restaurant_id, w.id, :first_day + s.day, s.quantity,
+                s.unit_price, s.unit_price * s.quantity, w.cost,
+                (:first_day + s.day) + make_interval(mins => s.minute)
+            FROM bench_sales_stage s
+            JOIN bench_wine_rows w ON w.n = s.wine
+            ORDER BY s.day  -- one partition at a time, appending to its indexes
+        """), {"first_day": dataset.first_day})
+        db.execute(text("DROP TABLE bench_sales_stage"))
+        # Keep times_sold consistent with what the API's write paths maintain
+        db.execute(text("""
+            UPDATE wines SET times_sold = sold.bottles
+            FROM (
+                SELECT wine_id, sum(quantity) AS bottles FROM sales
+                WHERE restaurant_id = ANY(:ids) GROUP BY wine_id
+            ) sold
+            WHERE wines.id = sold.wine_id
+        """), {"ids": restaurant_ids})
+        timings["sales"] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        for rid in restaurant_ids:
+            rollup.backfill(db, rid)
+        db.commit()
+        timings["rollup"] = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        for rid in restaurant_ids:
+            summaries.refresh_restaurant(db, rid)
+        timings["summaries"] = time.perf_counter() - started
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    
+    started = time.perf_counter()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE restaurants, wines, sales, daily_wine_sales"))
+    timings["vacuum_analyze"] = time.perf_counter() - started
+    return {step: round(seconds, 1) for step, seconds in timings.items()}
+
+
+def wines_csv(rng: np.random.Generator, wines: int) -> bytes:
+    """A wine inventory upload in the bulk-upload CSV format"""
+    frame = wine_frame(rng, [None], wines)
+    frame["wine_type"] = [WineType[t].value for t in frame["wine_type"]]
+    frame["body"] = [WineBody[b].value for b in frame["body"]]
+    columns = ["name", "producer", "vintage", "varietal", "region", "country",
+               "wine_type", "body", "price", "cost", "inventory_count"]
+    return frame[columns].to_csv(index=False, float_format="%.2f").encode()
+
+
+def sales_csv(rng: np.random.Generator, wine_names: list[str], prices: list[float], sales: int, days: int) -> bytes:
+    """A sales upload for the given wines over the last `days` days"""
+    first_day = date.today() - timedelta(days=days - 1)
+    wine = rng.integers(0, len(wine_names), size=sales)
+    day = rng.choice(days, size=sales, p=day_weights(first_day, days))
+    price = np.asarray(prices, dtype=float)[wine]
+    frame = pd.DataFrame({
+        "wine_name": np.asarray(wine_names, dtype=object)[wine],
+        "sale_date": (np.datetime64(first_day) + day.astype("timedelta64[D]")).astype(str),
+        "quantity": rng.choice([1, 2, 3], size=sales, p=[0.75, 0.2, 0.05]),
+        "unit_price": price,
+        "unit_cost": np.round(price * 0.4, 2),
+        "server_name": rng.choice(["Sarah", "Mike", "Ana", "Tom", "Lee"], size=sales),
+        "table_number": rng.integers(1, 40, size=sales),
+    })
+    return frame.to_csv(index=False, float_format="%.2f").encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and load a synthetic benchmark dataset")
+    parser.add_argument("--restaurants", type=int, default=10)
+    parser.add_argument("--wines", type=int, default=2000, help="Wines per restaurant")
+    parser.add_argument("--sales", type=int, default=5_000_000, help="Sales across all restaurants")
+    parser.add_argument("--years", type=int, default=3, help="Sales history length")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    started = time.perf_counter()
+    dataset = generate(args.restaurants, args.wines, args.sales, args.years, args.seed)
+    print(f"Generated {len(dataset.sales)} sales in {time.perf_counter() - started:.1f}s")
+    for step, seconds in load(dataset).items():
+        print(f"  {step:22} {seconds:7.1f}s")
+    print("Restaurants:")
+    for rid, name in zip(dataset.restaurants["id"], dataset.restaurants["name"]):
+        print(f"  {rid}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+Endpoint benchmarks
+
+Calls every endpoint in app/api/v1 in-process (TestClient, so no server or
+network in the numbers) against a benchmark dataset and records, per
+scenario, wall time percentiles, the SQL statements issued and their time,
+and the response size. Results are written as JSON keyed by scenario name,
+with the commit and dataset they were taken on, so two runs can be
+compared with `python -m benchmarks.compare`.
+
+Scenarios cover the analytics reports (and their exports and group
+variants), list pagination (first and deep pages, keyset cursors, count
+modes, search), single-row reads and writes, bulk CSV uploads and queued
+imports. Read scenarios run `--repeat` times after one warm-up call; bulk
+uploads, imports and exports run `--heavy-repeat` times, each upload into
+a fresh restaurant. Writes go to the benchmark restaurant or to restaurants
+created for the purpose, so use a scratch database. The analytics cache
+is off, so every report reaches the database. A scenario that gets a server
+error is still recorded, but the run exits non-zero.
+
+Run from the backend directory against a scratch database:
+    python -m benchmarks.endpoints --generate --restaurants 10 --wines 2000 --sales 5000000 --json after.json
+    python -m benchmarks.endpoints --restaurant-id <UUID> --json after.json
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Optional
+from uuid import UUID
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+
+# Measure the database, not the cache; no background threads competing
+os.environ.setdefault("ANALYTICS_CACHE_ENABLED", "false")
+os.environ.setdefault("IMPORT_WORKER_ENABLED", "false")
+os.environ.setdefault("ANALYTICS_SUMMARY_REFRESH_ENABLED", "false")
+os.environ.setdefault("SALES_PARTITION_MAINTENANCE_ENABLED", "false")
+os.environ.setdefault("DEBUG", "false")
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+from app.core.config import settings
+from app.core.database import SessionLocal, async_engine, engine
+from app.main import app
+from app.services.import_jobs import import_worker
+from benchmarks import datagen
+
+API = "/api/v1"
+
+
+@dataclass
+class Scenario:
+    """One timed call; `prepare` runs untimed before each call and feeds it"""
+    
+    name: str
+    call: Callable[[TestClient, dict], Any]
+    prepare: Optional[Callable[[TestClient], dict]] = None
+    heavy: bool = False
+
+
+def dataset_context(restaurant_id: UUID) -> dict[str, Any]:
+    """Ids and bounds the scenarios need, read from the benchmark restaurant"""
+    db = SessionLocal()
+    try:
+        restaurant = db.execute(text(
+            "SELECT id, group_id FROM restaurants WHERE id = :id"
+        ), {"id": restaurant_id}).one()
+        group = db.execute(text(
+            "SELECT id FROM restaurants WHERE group_id = :group_id ORDER BY name"
+        ), {"group_id": restaurant.group_id}).scalars().all() if restaurant.group_id else [restaurant_id]
+        wines = db.execute(text(
+            "SELECT count(*) FROM wines WHERE restaurant_id = :id"
+        ), {"id": restaurant_id}).scalar()
+        top_wine = db.execute(text("""
+            SELECT wine_id FROM daily_wine_sales WHERE restaurant_id = :id
+            GROUP BY wine_id ORDER BY sum(bottles_sold) DESC LIMIT 1
+        """), {"id": restaurant_id}).scalar()
+        sales = db.execute(text(
+            "SELECT count(*), min(sale_date), max(sale_date) FROM sales WHERE restaurant_id = :id"
+        ), {"id": restaurant_id}).one()
+        a_sale = db.execute(text(
+            "SELECT id FROM sales WHERE restaurant_id = :id ORDER BY sale_date DESC LIMIT 1"
+        ), {"id": restaurant_id}).scalar()
+        server_version = db.execute(text("SHOW server_version")).scalar()
+    finally:
+        db.close()
+    return {
+        "restaurant_id": restaurant_id,
+        "group_id": restaurant.group_id,
+        "group_ids": group,
+        "wines": wines,
+        "top_wine_id": top_wine,
+        "sale_id": a_sale,
+        "sales": sales[0],
+        "first_sale": sales[1],
+        "last_sale": sales[2],
+        "postgres": server_version,
+    }
+
+
+def new_restaurant(client: TestClient) -> UUID:
+    response = client.post(f"{API}/restaurants/", json={
+        "name": "Benchmark upload", "email": f"bench-upload-{uuid.uuid4()}@example.com",
+    })
+    response.raise_for_status()
+    return UUID(response.json()["id"])
+
+
+def scenarios(ctx: dict[str, Any], upload_wines: int, upload_sales: int, seed: int) -> list[Scenario]:
+    rid = ctx["restaurant_id"]
+    today = date.today()
+    quarter = (today - timedelta(days=90)).isoformat()
+    year = (today - timedelta(days=365)).isoformat()
+    month = (today - timedelta(days=30)).isoformat()
+    group = "&".join(f"restaurant_ids={r}" for r in ctx["group_ids"])
+    deep_wine_page = max(1, ctx["wines"] // 50 // 2)
+    deep_sale_page = max(1, min(ctx["sales"] // 50 // 2, 2000))
+    
+    def get(url: str) -> Callable[[TestClient, dict], Any]:
+        return lambda client, _: client.get(url)
+    
+    reads = {
+        # Analytics
+        "dashboard": f"{API}/analytics/dashboard/{rid}",
+        "top_bottom_wines": f"{API}/analytics/top-bottom-wines/{rid}",
+        "top_bottom_wines_quarter_margin": f"{API}/analytics/top-bottom-wines/{rid}?start_date={quarter}&rank_by=margin",
+        "top_bottom_wines_materialized": f"{API}/analytics/top-bottom-wines/{rid}?source=materialized",
+        "sales_trends": f"{API}/analytics/sales-trends/{rid}",
+        "sales_trends_year_weekly": f"{API}/analytics/sales-trends/{rid}?start_date={year}&granularity=week",
+        "inventory_health": f"{API}/analytics/inventory-health/{rid}",
+        "reorder_forecast": f"{API}/analytics/reorder-forecast/{rid}",
+        "profit_analysis": f"{API}/analytics/profit-analysis/{rid}",
+        "profit_analysis_ttm": f"{API}/analytics/profit-analysis/{rid}?period=ttm",
+        "profit_analysis_materialized": f"{API}/analytics/profit-analysis/{rid}?source=materialized",
+        "group_dashboard": f"{API}/analytics/group/dashboard?{group}",
+        "group_top_bottom_wines": f"{API}/analytics/group/top-bottom-wines?{group}",
+        "group_sales_trends_year_weekly": f"{API}/analytics/group/sales-trends?{group}&start_date={year}&granularity=week",
+        # Listings
+        "restaurants_list": f"{API}/restaurants/",
+        "restaurant_get": f"{API}/restaurants/{rid}",
+        "wines_page_1": f"{API}/wines/?restaurant_id={rid}",
+        "wines_page_deep": f"{API}/wines/?restaurant_id={rid}&page={deep_wine_page}",
+        "wines_cursor_first": f"{API}/wines/?restaurant_id={rid}&cursor=",
+        "wines_search": f"{API}/wines/?restaurant_id={rid}&search=Pinot&count=estimate",
+        "wines_by_type": f"{API}/wines/?restaurant_id={rid}&wine_type=red",
+        "wine_get": f"{API}/wines/{ctx['top_wine_id']}",
+        "sales_page_1": f"{API}/sales/?restaurant_id={rid}",
+        "sales_page_1_no_count": f"{API}/sales/?restaurant_id={rid}&count=none",
+        "sales_page_deep": f"{API}/sales/?restaurant_id={rid}&page={deep_sale_page}",
+        "sales_cursor_first": f"{API}/sales/?restaurant_id={rid}&cursor=",
+        "sales_month": f"{API}/sales/?restaurant_id={rid}&start_date={month}",
+        "sales_wine": f"{API}/sales/?restaurant_id={rid}&wine_id={ctx['top_wine_id']}",
+        "sale_get": f"{API}/sales/{ctx['sale_id']}",
+        "imports_list": f"{API}/imports/?restaurant_id={rid}",
+    }
+    exports = {
+        "sales_export_csv": f"{API}/sales/export?restaurant_id={rid}&start_date={year}",
+        "sales_export_parquet": f"{API}/sales/export?restaurant_id={rid}&start_date={year}&format=parquet",
+        "top_bottom_wines_export": f"{API}/analytics/top-bottom-wines/{rid}/export",
+        "sales_trends_export": f"{API}/analytics/sales-trends/{rid}/export?granularity=day",
+        "inventory_health_export": f"{API}/analytics/inventory-health/{rid}/export",
+        "profit_analysis_export": f"{API}/analytics/profit-analysis/{rid}/export",
+    }
+    result = [Scenario(name, get(url)) for name, url in reads.items()]
+    result += [Scenario(name, get(url), heavy=True) for name, url in exports.items()]
+    
+    # Single-row writes (each creates what it deletes, untimed)
+    sale = {
+        "restaurant_id": str(rid), "wine_id": str(ctx["top_wine_id"]), "sale_date": today.isoformat(),
+        "quantity": 1, "unit_price": "45.00", "unit_cost": "18.00", "table_number": "7",
+    }
+    wine = {"restaurant_id": str(rid), "name": "Benchmark pour", "price": "12.00", "cost": "4.00",
+            "inventory_count": 0}
+    
+    def created(url: str, body: dict) -> Callable[[TestClient], dict]:
+        def prepare(client: TestClient) -> dict:
+            response = client.post(url, json=body)
+            response.raise_for_status()
+            return {"id": response.json()["id"]}
+        return prepare
+    
+    result += [
+        Scenario("sale_create", lambda client, _: client.post(f"{API}/sales/", json=sale)),
+        Scenario("sale_delete", lambda client, p: client.delete(f"{API}/sales/{p['id']}"),
+                 prepare=created(f"{API}/sales/", sale)),
+        Scenario("wine_create", lambda client, _: client.post(f"{API}/wines/", json=wine)),
+        Scenario("wine_update", lambda client, p: client.put(f"{API}/wines/{p['id']}", json={"price": "13.00"}),
+                 prepare=created(f"{API}/wines/", wine)),
+        Scenario("wine_delete", lambda client, p: client.delete(f"{API}/wines/{p['id']}"),
+                 prepare=created(f"{API}/wines/", wine)),
+        Scenario("restaurant_update",
+                 lambda client, _: client.put(f"{API}/restaurants/{rid}", json={"phone": "555-0100"})),
+    ]
+    
+    # Bulk uploads and queued imports, each into a fresh restaurant
+    rng = np.random.default_rng(seed)
+    wines_csv = datagen.wines_csv(rng, upload_wines)
+    listed = pd.read_csv(io.BytesIO(wines_csv))
+    sales_csv = datagen.sales_csv(rng, list(listed["name"]), list(listed["price"]), upload_sales, days=365)
+    
+    def with_wines(client: TestClient) -> dict:
+        restaurant = new_restaurant(client)
+        client.post(f"{API}/wines/bulk-upload?restaurant_id={restaurant}",
+                    files={"file": ("wines.csv", wines_csv, "text/csv")}).raise_for_status()
+        return {"restaurant_id": restaurant}
+    
+    def queued_import(client: TestClient, p: dict):
+        queued = client.post(f"{API}/imports/sales?restaurant_id={p['restaurant_id']}",
+                             files={"file": ("sales.csv", sales_csv, "text/csv")})
+        queued.raise_for_status()
+        import_worker.run_pending()
+        return client.get(f"{API}/imports/{queued.json()['id']}")
+    
+    result += [
+        Scenario(
+            "wines_bulk_upload",
+            lambda client, p: client.post(f"{API}/wines/bulk-upload?restaurant_id={p['restaurant_id']}",
+                                          files={"file": ("wines.csv", wines_csv, "text/csv")}),
+            prepare=lambda client: {"restaurant_id": new_restaurant(client)},
+            heavy=True,
+        ),
+        Scenario(
+            "sales_bulk_upload",
+            lambda client, p: client.post(f"{API}/sales/bulk-upload?restaurant_id={p['restaurant_id']}",
+                                          files={"file": ("sales.csv", sales_csv, "text/csv")}),
+            prepare=with_wines,
+            heavy=True,
+        ),
+        Scenario("sales_import_queued", queued_import, prepare=with_wines, heavy=True),
+    ]
+    return result
+
+
+class StatementCounter:
+    """SQL statements and their time across every engine, between resets"""
+    
+    def __init__(self):
+        self.engines = [engine, async_engine.sync_engine]
+        self.statements = 0
+        self.seconds = 0.0
+    
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        context.bench_started = time.perf_counter()
+    
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+        self.seconds += time.perf_counter() - context.bench_started
+    
+    def __enter__(self):
+        for e in self.engines:
+            event.listen(e, "before_cursor_execute", self._before)
+            event.listen(e, "after_cursor_execute", self._after)
+        return self
+    
+    def __exit__(self, *exc):
+        for e in self.engines:
+            event.remove(e, "before_cursor_execute", self._before)
+            event.remove(e, "after_cursor_execute", self._after)
+    
+    def reset(self) -> None:
+        self.statements = 0
+        self.seconds = 0.0
+
+
+def run_scenario(client: TestClient, counter: StatementCounter, scenario: Scenario, repeat: int) -> dict[str, Any]:
+    """Warm up once (reads only), then time `repeat` calls"""
+    if not scenario.prepare:
+        scenario.call(client, {})
+    timings, db_ms, statements, sizes, statuses = [], [], [], [], set()
+    for _ in range(repeat):
+        params = scenario.prepare(client) if scenario.prepare else {}
+        counter.reset()
+        started = time.perf_counter()
+        response = scenario.call(client, params)
+        timings.append((time.perf_counter() - started) * 1000)
+        db_ms.append(counter.seconds * 1000)
+        statements.append(counter.statements)
+        sizes.append(len(response.content))
+        statuses.add(response.status_code)
+    ms = np.array(timings)
+    return {
+        "status": sorted(statuses),
+        "runs": repeat,
+        "min_ms": round(float(ms.min()), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "mean_ms": round(float(ms.mean()), 2),
+        "max_ms": round(float(ms.max()), 2),
+        "db_p50_ms": round(float(np.percentile(db_ms, 50)), 2),
+        "statements": int(np.median(statements)),
+        "response_bytes": int(np.median(sizes)),
+    }
+
+
+def server_errors(result: dict[str, Any]) -> list[int]:
+    """5xx statuses a scenario returned; a benchmark of an error page measures nothing"""
+    return [status for status in result["status"] if status >= 500]
+
+
+def git_revision() -> dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], capture_output=True, text=True).stdout.strip()
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--", "."))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every API endpoint against a benchmark dataset")
+    parser.add_argument("--generate", action="store_true", help="Generate and load a dataset first")
+    parser.add_argument("--restaurants", type=int, default=10)
+    parser.add_argument("--wines", type=int, default=2000, help="Wines per restaurant")
+    parser.add_argument("--sales", type=int, default=5_000_000, help="Sales across all restaurants")
+    parser.add_argument("--years", type=int, default=3, help="Sales history length")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--restaurant-id", type=UUID, default=None, help="Restaurant to benchmark")
+    parser.add_argument("--repeat", type=int, default=20, help="Calls per read/write scenario")
+    parser.add_argument("--heavy-repeat", type=int, default=3, help="Calls per export/upload/import scenario")
+    parser.add_argument("--upload-wines", type=int, default=1000, help="Rows in the wine upload CSV")
+    parser.add_argument("--upload-sales", type=int, default=20_000, help="Rows in the sales upload CSV")
+    parser.add_argument("--only", nargs="*", default=None, help="Scenario names to run")
+    parser.add_argument("--json", default=None, help="Write results to this file")
+    args = parser.parse_args()
+    
+    restaurant_id = args.restaurant_id
+    dataset = None
+    if args.generate:
+        started = time.perf_counter()
+        dataset = datagen.generate(args.restaurants, args.wines, args.sales, args.years, args.seed)
+        load_seconds = datagen.load(dataset)
+        print(f"Loaded {args.sales} sales in {time.perf_counter() - started:.0f}s")
+        # The largest restaurant, as the one the dashboards are slowest for
+        restaurant_id = restaurant_id or dataset.restaurants["id"][
+            int(np.argmax(np.bincount(dataset.sales["wine"] // args.wines, minlength=args.restaurants)))
+        ]
+    if restaurant_id is None:
+        parser.error("--restaurant-id is required without --generate")
+    
+    ctx = dataset_context(restaurant_id)
+    print(f"Restaurant {restaurant_id}: {ctx['wines']} wines, {ctx['sales']} sales "
+          f"({ctx['first_sale']} to {ctx['last_sale']}), group of {len(ctx['group_ids'])}")
+    
+    results = {}
+    print(f"{'scenario':34} {'status':>7} {'p50 ms':>9} {'p95 ms':>9} {'db ms':>8} {'stmts':>6} {'bytes':>10}")
+    # Server errors are recorded rather than aborting the run, and fail it at the end
+    with TestClient(app, raise_server_exceptions=False) as client, StatementCounter() as counter:
+        for scenario in scenarios(ctx, args.upload_wines, args.upload_sales, args.seed):
+            if args.only and scenario.name not in args.only:
+                continue
+            result = run_scenario(client, counter, scenario, args.heavy_repeat if scenario.heavy else args.repeat)
+            results[scenario.name] = result
+            print(f"{scenario.name:34} {','.join(map(str, result['status'])):>7} {result['p50_ms']:9.1f} "
+                  f"{result['p95_ms']:9.1f} {result['db_p50_ms']:8.1f} {result['statements']:6} "
+                  f"{result['response_bytes']:10}")
+    
+    if args.json:
+        meta = {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            **git_revision(),
+            "python": platform.python_version(),
+            "postgres": ctx["postgres"],
+            "dataset": {
+                "restaurant_id": restaurant_id,
+                "wines": ctx["wines"],
+                "sales": ctx["sales"],
+                "first_sale": ctx["first_sale"],
+                "last_sale": ctx["last_sale"],
+                "group_size": len(ctx["group_ids"]),
+                "generated": {
+                    "restaurants": args.restaurants, "wines": args.wines, "sales": args.sales,
+                    "years": args.years, "seed": args.seed, "load_seconds": load_seconds,
+                } if dataset is not None else None,
+            },
+            "repeat": args.repeat,
+            "heavy_repeat": args.heavy_repeat,
+            "settings": {
+                name: getattr(settings, name)
+                for name in ("DB_POOL_SIZE", "DB_PGBOUNCER", "ANALYTICS_CACHE_ENABLED", "EXPORT_BATCH_SIZE",
+                             "INGEST_BATCH_SIZE", "COMPRESSION_MINIMUM_SIZE")
+            },
+        }
+        with open(args.json, "w") as f:
+            json.dump({"meta": meta, "scenarios": results}, f, indent=2, default=str)
+    
+    errors = [name for name, result in results.items() if server_errors(result)]
+    if errors:
+        print(f"Server errors in: {', '.join(errors)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+EXPLAIN plans for the analytics endpoints
+
+Optionally generates a large synthetic dataset (several restaurants, each
+with a wine list and a multi-year sales history), calls every analytics
+endpoint in-process, and re-runs each SQL statement the endpoint issued
+under EXPLAIN (ANALYZE, BUFFERS). Exits non-zero if any statement reads
+`sales` or `daily_wine_sales` with a sequential scan, so it can be used to
+check index changes against realistic data volumes.
+
+Run from the backend directory against a scratch database:
+    python -m benchmarks.explain_analytics --generate --restaurants 20 --wines 250 --sales 2000000
+    python -m benchmarks.explain_analytics --restaurant-id <UUID> --json plans.json
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional
+from uuid import UUID
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import uuid
+
+# Measure the database, not the cache; keep import workers out of the way
+os.environ.setdefault("ANALYTICS_CACHE_ENABLED", "false")
+os.environ.setdefault("IMPORT_WORKER_ENABLED", "false")
+os.environ.setdefault("DEBUG", "false")
+
+import asyncpg
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, text
+
+from app.core.config import settings
+from app.core.database import SessionLocal, async_engine, engine
+from app.main import app
+from app.models import Restaurant, Wine
+from app.services import partitions, rollup
+
+# Tables that must never be read with a sequential scan
+LARGE_TABLES = {"sales", "daily_wine_sales"}
+# Plans name the partitions of `sales` rather than the table
+SALES_PARTITION = re.compile(r"^sales_(y\d{4}m\d{2}|default)$")
+
+
+def endpoint_urls(restaurant_id: UUID, group_ids: Optional[list[UUID]] = None) -> dict[str, str]:
+    """Every analytics endpoint, with the parameter variants that change the SQL"""
+    today = date.today()
+    quarter_start = (today - timedelta(days=90)).isoformat()
+    year_start = (today - timedelta(days=365)).isoformat()
+    base = "/api/v1/analytics"
+    group = "&".join(f"restaurant_ids={rid}" for rid in (group_ids or [restaurant_id]))
+    return {
+        "dashboard": f"{base}/dashboard/{restaurant_id}",
+        "top_bottom_wines": f"{base}/top-bottom-wines/{restaurant_id}",
+        "top_bottom_wines_quarter": f"{base}/top-bottom-wines/{restaurant_id}?start_date={quarter_start}",
+        "top_bottom_wines_by_margin": f"{base}/top-bottom-wines/{restaurant_id}?rank_by=margin",
+        "sales_trends": f"{base}/sales-trends/{restaurant_id}",
+        "sales_trends_year_weekly": f"{base}/sales-trends/{restaurant_id}?start_date={year_start}&granularity=week",
+        "sales_trends_year_monthly": f"{base}/sales-trends/{restaurant_id}?start_date={year_start}&granularity=month",
+        "inventory_health": f"{base}/inventory-health/{restaurant_id}",
+        "reorder_forecast": f"{base}/reorder-forecast/{restaurant_id}",
+        "profit_analysis_ytd": f"{base}/profit-analysis/{restaurant_id}",
+        "profit_analysis_ttm": f"{base}/profit-analysis/{restaurant_id}?period=ttm",
+        "group_dashboard": f"{base}/group/dashboard?{group}",
+        "group_top_bottom_wines": f"{base}/group/top-bottom-wines?{group}",
+        "group_sales_trends_year_weekly": f"{base}/group/sales-trends?{group}&start_date={year_start}&granularity=week",
+    }
+
+
+def generate(restaurants: int, wines: int, sales: int, days: int) -> list[UUID]:
+    """
+    Insert synthetic restaurants, wines and sales, then build the rollup
+    
+    Wine popularity is skewed (a few wines sell most bottles) and the last
+    10% of each wine list never sells, like a real cellar.
+    """
+    now = datetime.utcnow()
+    restaurant_ids = [uuid.uuid4() for _ in range(restaurants)]
+    
+    db = SessionLocal()
+    try:
+        db.execute(insert(Restaurant.__table__), [
+            {"id": rid, "name": f"Benchmark {i}", "email": f"bench-{rid}@example.com"}
+            for i, rid in enumerate(restaurant_ids)
+        ])
+        db.execute(insert(Wine.__table__), [
+            {
+                "restaurant_id": rid,
+                "name": f"Wine {n:05d}",
+                "price": 40 + n % 60,
+                "cost": (15 + n % 25) if n % 7 else None,
+                "inventory_count": n % 40,
+            }
+            for rid in restaurant_ids
+            for n in range(wines)
+        ])
+        
+        # Numbered wine list for random picks inside SQL
+        db.execute(text("""
+            CREATE TEMP TABLE bench_wines ON COMMIT DROP AS
+            SELECT row_number() OVER () AS n, id, restaurant_id, price, cost
+            FROM (
+                SELECT w.*, row_number() OVER (PARTITION BY w.restaurant_id ORDER BY w.name) AS pos
+                FROM wines w
+                WHERE w.restaurant_id = ANY(:ids)
+            ) ranked
+            WHERE pos <= :sold_per_restaurant
+        """), {"ids": restaurant_ids, "sold_per_restaurant": max(1, int(wines * 0.9))})
+        sold = db.execute(text("SELECT count(*) FROM bench_wines")).scalar()
+        db.execute(text("CREATE INDEX ON bench_wines (n)"))
+        partitions.ensure_partitions(db, start=date.today() - timedelta(days=days))
+        
+        db.execute(text("""
+            INSERT INTO sales (
+                id, restaurant_id, wine_id, sale_date, quantity,
+                unit_price, total_amount, unit_cost, created_at
+            )
+            SELECT
+                gen_random_uuid(), w.restaurant_id, w.id, current_date - s.age, s.quantity,
+                w.price, w.price * s.quantity, w.cost, :now - make_interval(days => s.age)
+            FROM (
+                SELECT
+                    1 + floor(power(random(), 2) * :sold)::int AS wn,
+                    1 + floor(random() * 3)::int AS quantity,
+                    floor(random() * :days)::int AS age
+                FROM generate_series(1, :sales)
+            ) s
+            JOIN bench_wines w ON w.n = s.wn
+        """), {"sold": sold, "days": days, "sales": sales, "now": now})
+        
+        for rid in restaurant_ids:
+            rollup.backfill(db, rid)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    
+    # Fresh statistics and visibility map (index-only scans need the latter)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE sales, daily_wine_sales, wines, restaurants"))
+    
+    return restaurant_ids
+
+
+def capture_statements(client: TestClient, url: str) -> tuple[int, list[tuple[str, tuple]]]:
+    """Call an endpoint and return its status and the SQL it executed"""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, tuple(parameters or ())))
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    return response.status_code, statements
+
+
+async def explain_all(statements: list[tuple[str, tuple]]) -> list[dict]:
+    """EXPLAIN ANALYZE each captured statement on a plain asyncpg connection"""
+    dsn = settings.async_database_url.replace("postgresql+asyncpg://", "postgresql://", 1)
+    conn = await asyncpg.connect(dsn)
+    try:
+        plans = []
+        for statement, parameters in statements:
+            raw = await conn.fetchval(
+                f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", *parameters
+            )
+            plans.append(json.loads(raw)[0] if isinstance(raw, str) else raw[0])
+        return plans
+    finally:
+        await conn.close()
+
+
+def walk(node: dict):
+    """Yield every node of a JSON plan tree"""
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def summarize(plan: dict) -> dict:
+    """Scan nodes, timings and problems for one statement plan"""
+    scans = []
+    problems = []
+    for node in walk(plan["Plan"]):
+        relation = node.get("Relation Name")
+        if not relation and not node.get("Index Name"):
+            continue
+        scans.append({
+            "node": node["Node Type"],
+            "relation": relation,
+            "index": node.get("Index Name"),
+            "rows": node.get("Actual Rows"),
+            "loops": node.get("Actual Loops"),
+            "heap_fetches": node.get("Heap Fetches"),
+            "shared_buffers": node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0),
+        })
+        table = "sales" if relation and SALES_PARTITION.match(relation) else relation
+        if node["Node Type"] == "Seq Scan" and table in LARGE_TABLES:
+            problems.append(f"Seq Scan on {relation}")
+    return {
+        "execution_ms": plan.get("Execution Time"),
+        "planning_ms": plan.get("Planning Time"),
+        "scans": scans,
+        "problems": problems,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture EXPLAIN plans for every analytics endpoint")
+    parser.add_argument("--generate", action="store_true", help="Insert a synthetic dataset first")
+    parser.add_argument("--restaurants", type=int, default=20)
+    parser.add_argument("--wines", type=int, default=250, help="Wines per restaurant")
+    parser.add_argument("--sales", type=int, default=2_000_000, help="Sales across all restaurants")
+    parser.add_argument("--days", type=int, default=730, help="Sales history length")
+    parser.add_argument("--restaurant-id", type=UUID, default=None, help="Restaurant to explain")
+    parser.add_argument("--json", default=None, help="Write full results to this file")
+    args = parser.parse_args()
+    
+    restaurant_id = args.restaurant_id
+    generated = None
+    if args.generate:
+        generated = generate(args.restaurants, args.wines, args.sales, args.days)
+        restaurant_id = restaurant_id or generated[0]
+        print(f"Generated {args.restaurants} restaurants; explaining {restaurant_id}")
+    if restaurant_id is None:
+        parser.error("--restaurant-id is required without --generate")
+    
+    results = {}
+    failed = False
+    with TestClient(app) as client:
+        for name, url in endpoint_urls(restaurant_id, generated).items():
+            status, statements = capture_statements(client, url)
+            plans = asyncio.run(explain_all(statements))
+            summaries = [summarize(plan) for plan in plans]
+            results[name] = {"url": url, "status": status, "statements": [
+                {"sql": statement, **summary} for (statement, _), summary in zip(statements, summaries)
+            ]}
+            
+            problems = [p for summary in summaries for p in summary["problems"]]
+            failed = failed or bool(problems) or status != 200
+            total_ms = sum(summary["execution_ms"] or 0 for summary in summaries)
+            print(f"{name:28} {status}  {len(statements)} stmt  {total_ms:8.1f} ms  "
+                  f"{'; '.join(problems) if problems else 'ok'}")
+            for summary in summaries:
+                for scan in summary["scans"]:
+                    index = f" using {scan['index']}" if scan["index"] else ""
+                    fetches = f" heap_fetches={scan['heap_fetches']}" if scan["heap_fetches"] is not None else ""
+                    target = f" on {scan['relation']}" if scan["relation"] else ""
+                    print(f"    {scan['node']}{target}{index} "
+                          f"rows={scan['rows']} loops={scan['loops']}{fetches}")
+    
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+    
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
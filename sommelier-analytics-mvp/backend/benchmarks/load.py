@@ -0,0 +1,395 @@
+"""
+Load test: concurrent dashboard users and POS writes
+
+Simulates a dinner service. `--users` virtual users each loop over:
+think (exponential, mean `--think-ms`), then one request drawn from the
+mix below for a random benchmark restaurant. POS `create_sale` writes run
+alongside the dashboard reads they invalidate. The test is closed-loop: a
+user waits for its response before thinking again, so a saturated server
+shows up as falling throughput and rising latency rather than a queue in
+the client.
+
+    dashboard           35%    GET  /analytics/dashboard/{id}
+    top_bottom_wines    15%    GET  /analytics/top-bottom-wines/{id}
+    sales_trends        10%    GET  /analytics/sales-trends/{id}
+    inventory_health    10%    GET  /analytics/inventory-health/{id}
+    create_sale         30%    POST /sales/
+
+`--routes` narrows the mix to some of these (weights as above) or to
+`wine_list` (GET /wines/, one page).
+
+After a `--warmup` period that is not measured, requests run for
+`--duration` seconds. The report gives, per route, throughput, p50/p95/p99
+latency, error rate (4xx/5xx responses and connection errors) and
+"stuck" requests: sent during the run but unanswered when it ended, which
+is how a server that has stalled outright shows up.
+
+Against a running server (any deployment):
+    python -m benchmarks.load --url http://localhost:8000 --users 200 --duration 60
+
+With --sweep the harness starts uvicorn itself for every combination of
+--workers and --pool-sizes (DB_POOL_SIZE; DB_MAX_OVERFLOW scales with it),
+waits for /health, runs the same load against each, and prints where
+throughput stops growing:
+    python -m benchmarks.load --sweep --workers 1 2 4 --pool-sizes 5 10 20 --users 200 --json load.json
+
+`--refs` serves the given commits (each from a temporary git worktree)
+instead of the working tree, and `--users` takes several values, so two
+versions can be compared at increasing concurrency. For example the
+dashboard before and after it moved to the async engine, with no think
+time:
+    python -m benchmarks.load --sweep --refs 194343d 6d8688f --routes dashboard --users 1 10 40 --think-ms 0 --no-cache
+
+The client is a single asyncio process; on a small machine it competes
+with the server for CPU, so compare runs made on the same host. Restaurants
+and wines come from the API (`--restaurant-ids`, or every restaurant
+named "Benchmark ...", as loaded by benchmarks.datagen).
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Iterator, Optional
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+API = "/api/v1"
+
+MIX = {
+    "dashboard": 0.35,
+    "top_bottom_wines": 0.15,
+    "sales_trends": 0.10,
+    "inventory_health": 0.10,
+    "create_sale": 0.30,
+}
+# Throughput gain below which a larger configuration counts as saturated
+SATURATION_GAIN = 0.05
+
+
+@dataclass
+class Target:
+    """A restaurant the users work on, with wines to sell"""
+    
+    restaurant_id: str
+    wines: list[dict]
+
+
+@dataclass
+class RouteStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    errors: int = 0
+    # Started in the window but still waiting when it closed
+    unfinished: int = 0
+    statuses: dict[str, int] = field(default_factory=dict)
+    
+    def record(self, status: str, elapsed_ms: float, ok: bool) -> None:
+        self.latencies_ms.append(elapsed_ms)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+    
+    def summary(self, seconds: float) -> dict[str, Any]:
+        ms = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        count = len(self.latencies_ms)
+        return {
+            "requests": count,
+            "throughput_rps": round(count / seconds, 1),
+            "p50_ms": round(float(np.percentile(ms, 50)), 1),
+            "p95_ms": round(float(np.percentile(ms, 95)), 1),
+            "p99_ms": round(float(np.percentile(ms, 99)), 1),
+            "max_ms": round(float(ms.max()), 1),
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "unfinished": self.unfinished,
+            "statuses": dict(sorted(self.statuses.items())),
+        }
+
+
+def request_for(route: str, target: Target, rng: random.Random) -> tuple[str, str, Optional[dict]]:
+    """Method, path and JSON body of one request"""
+    rid = target.restaurant_id
+    if route == "create_sale":
+        # Popular wines sell more, as in the generated history
+        wine = target.wines[min(int(rng.expovariate(1 / 20)), len(target.wines) - 1)]
+        return "POST", f"{API}/sales/", {
+            "restaurant_id": rid,
+            "wine_id": wine["id"],
+            "sale_date": date.today().isoformat(),
+            "quantity": rng.choice((1, 1, 1, 2)),
+            "unit_price": wine["price"],
+            "unit_cost": wine.get("cost"),
+            "table_number": str(rng.randint(1, 40)),
+        }
+    paths = {
+        "dashboard": f"{API}/analytics/dashboard/{rid}",
+        "top_bottom_wines": f"{API}/analytics/top-bottom-wines/{rid}",
+        "sales_trends": f"{API}/analytics/sales-trends/{rid}",
+        "inventory_health": f"{API}/analytics/inventory-health/{rid}",
+        "wine_list": f"{API}/wines/?restaurant_id={rid}",
+    }
+    return "GET", paths[route], None
+
+
+async def load_targets(client: httpx.AsyncClient, restaurant_ids: Optional[list[str]], with_wines: bool = True) -> list[Target]:
+    """Restaurants to load, each with its first 100 wines by name (unless `with_wines` is off)"""
+    if not restaurant_ids:
+        response = await client.get(f"{API}/restaurants/")
+        response.raise_for_status()
+        restaurant_ids = [r["id"] for r in response.json() if r["name"].startswith("Benchmark")]
+    if not with_wines:
+        # Read-only mixes need no wines, nor a wine list endpoint that works
+        # on every ref being compared
+        return [Target(rid, []) for rid in restaurant_ids]
+    targets = []
+    for rid in restaurant_ids:
+        response = await client.get(f"{API}/wines/", params={"restaurant_id": rid, "page_size": 100, "count": "none"})
+        response.raise_for_status()
+        wines = response.json()["wines"]
+        if wines:
+            targets.append(Target(rid, wines))
+    if not targets:
+        raise SystemExit("No restaurants with wines to load; pass --restaurant-ids or run benchmarks.datagen")
+    return targets
+
+
+async def run_load(
+    url: str,
+    users: int,
+    duration: float,
+    warmup: float,
+    think_ms: float,
+    restaurant_ids: Optional[list[str]] = None,
+    seed: int = 0,
+    mix: dict[str, float] = MIX,
+) -> dict[str, Any]:
+    """Run the mix for warmup + duration seconds; stats cover the latter"""
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        targets = await load_targets(client, restaurant_ids, with_wines="create_sale" in mix)
+        routes = list(mix)
+        weights = list(mix.values())
+        stats = {route: RouteStats() for route in routes}
+        loop = asyncio.get_running_loop()
+        measure_from = loop.time() + warmup
+        stop_at = measure_from + duration
+        
+        async def user(n: int) -> None:
+            rng = random.Random(seed * 100_003 + n)
+            # Spread the first requests over one think time
+            await asyncio.sleep(rng.uniform(0, think_ms / 1000))
+            while loop.time() < stop_at:
+                route = rng.choices(routes, weights)[0]
+                method, path, body = request_for(route, rng.choice(targets), rng)
+                started = loop.time()
+                try:
+                    response = await client.request(method, path, json=body)
+                    status, ok = str(response.status_code), response.status_code < 400
+                except httpx.HTTPError as e:
+                    status, ok = type(e).__name__, False
+                finished = loop.time()
+                if measure_from <= started:
+                    if finished <= stop_at:
+                        stats[route].record(status, (finished - started) * 1000, ok)
+                    else:
+                        stats[route].unfinished += 1
+                await asyncio.sleep(rng.expovariate(1000 / think_ms) if think_ms else 0)
+        
+        await asyncio.gather(*(user(n) for n in range(users)))
+    
+    per_route = {route: s.summary(duration) for route, s in stats.items()}
+    everything = RouteStats()
+    for s in stats.values():
+        everything.latencies_ms += s.latencies_ms
+        everything.errors += s.errors
+        everything.unfinished += s.unfinished
+        for status, count in s.statuses.items():
+            everything.statuses[status] = everything.statuses.get(status, 0) + count
+    return {"total": everything.summary(duration), "routes": per_route}
+
+
+def print_report(result: dict[str, Any]) -> None:
+    print(f"  {'route':18} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'stuck':>6}  statuses")
+    for name, s in [*result["routes"].items(), ("total", result["total"])]:
+        print(f"  {name:18} {s['throughput_rps']:8.1f} {s['p50_ms']:8.1f} {s['p95_ms']:8.1f} "
+              f"{s['p99_ms']:8.1f} {s['error_rate']:7.2%} {s['unfinished']:6}  {s['statuses']}")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def checkout(ref: Optional[str]) -> Iterator[Optional[str]]:
+    """Backend directory of `ref` in a temporary git worktree (None: the working tree)"""
+    if ref is None:
+        yield None
+        return
+    backend = subprocess.run(
+        ["git", "rev-parse", "--show-prefix"], check=True, capture_output=True, text=True
+    ).stdout.strip()
+    worktree = tempfile.mkdtemp(prefix="load-")
+    subprocess.run(["git", "worktree", "add", "--detach", worktree, ref], check=True, capture_output=True)
+    try:
+        yield os.path.join(worktree, backend)
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", worktree], check=False, capture_output=True)
+        shutil.rmtree(worktree, ignore_errors=True)
+
+
+def start_server(
+    workers: int, pool_size: int, extra_env: dict[str, str], cwd: Optional[str] = None,
+) -> tuple[subprocess.Popen, str]:
+    """uvicorn on a free local port with the given workers and pool size (serving the app in `cwd`)"""
+    port = free_port()
+    env = {
+        **os.environ,
+        "DB_POOL_SIZE": str(pool_size),
+        "DB_MAX_OVERFLOW": str(pool_size * 2),
+        **extra_env,
+    }
+    # SQL echo would dominate the timings
+    env.setdefault("DEBUG", "false")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+        cwd=cwd,
+    )
+    return server, f"http://127.0.0.1:{port}"
+
+
+def wait_healthy(server: subprocess.Popen, url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with {server.returncode}")
+        try:
+            if httpx.get(f"{url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"uvicorn did not become healthy within {timeout:.0f}s")
+
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.terminate()
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+def saturation(runs: list[dict[str, Any]]) -> list[str]:
+    """Configurations after which more workers or connections stop paying off (per ref and user count)"""
+    notes = []
+    for ref, users in sorted({(run["ref"] or "", run["users"]) for run in runs}):
+        same_load = [run for run in runs if (run["ref"] or "") == ref and run["users"] == users]
+        label = f"{ref + ' ' if ref else ''}users={users} "
+        for key, other in (("workers", "pool_size"), ("pool_size", "workers")):
+            for fixed in sorted({run[other] for run in same_load}):
+                series = sorted((run for run in same_load if run[other] == fixed), key=lambda run: run[key])
+                for smaller, larger in zip(series, series[1:]):
+                    before = smaller["result"]["total"]
+                    after = larger["result"]["total"]
+                    gain = after["throughput_rps"] / before["throughput_rps"] - 1 if before["throughput_rps"] else float("inf")
+                    if gain < SATURATION_GAIN:
+                        notes.append(
+                            f"{label}{other}={fixed}: {key} {smaller[key]} -> {larger[key]} gains {gain:+.0%} req/s "
+                            f"(p95 {before['p95_ms']:.0f} -> {after['p95_ms']:.0f} ms); saturated at {key}={smaller[key]}"
+                        )
+                        break
+    return notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent dashboard/POS load test")
+    parser.add_argument("--url", default=None, help="Server to load (default: start one per configuration)")
+    parser.add_argument("--users", type=int, nargs="+", default=[200], help="Concurrent users (one run per value)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=10.0, help="Unmeasured seconds before each run")
+    parser.add_argument("--think-ms", type=float, default=1000.0, help="Mean pause between a user's requests")
+    parser.add_argument("--restaurant-ids", nargs="*", default=None)
+    parser.add_argument("--sweep", action="store_true", help="Start uvicorn for each --workers x --pool-sizes")
+    parser.add_argument("--workers", type=int, nargs="*", default=[1], help="uvicorn worker counts to sweep")
+    parser.add_argument("--pool-sizes", type=int, nargs="*", default=[5], help="DB_POOL_SIZE values to sweep")
+    parser.add_argument("--no-cache", action="store_true", help="Start servers with the analytics cache off")
+    parser.add_argument("--refs", nargs="*", default=None, help="Git refs to serve instead of the working tree")
+    parser.add_argument("--routes", nargs="*", choices=[*MIX, "wine_list"], default=None, help="Limit the mix")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="Write results to this file")
+    args = parser.parse_args()
+    
+    if args.url and (args.sweep or args.refs):
+        parser.error("--sweep and --refs start their own servers; drop --url")
+    mix = {route: MIX.get(route, 1.0) for route in args.routes} if args.routes else MIX
+    
+    def load(url: str, users: int) -> dict[str, Any]:
+        return asyncio.run(run_load(
+            url, users, args.duration, args.warmup, args.think_ms, args.restaurant_ids, args.seed, mix,
+        ))
+    
+    runs = []
+    if args.url:
+        for users in args.users:
+            print(f"{users} users against {args.url} for {args.duration:.0f}s")
+            result = load(args.url, users)
+            print_report(result)
+            runs.append({"url": args.url, "users": users, "result": result})
+    else:
+        extra_env = {"ANALYTICS_CACHE_ENABLED": "false"} if args.no_cache else {}
+        for ref in args.refs or [None]:
+            with checkout(ref) as cwd:
+                for users in args.users:
+                    for workers in args.workers:
+                        for pool_size in args.pool_sizes:
+                            server, url = start_server(workers, pool_size, extra_env, cwd)
+                            try:
+                                wait_healthy(server, url)
+                                print(f"{ref + ' ' if ref else ''}workers={workers} pool_size={pool_size}: "
+                                      f"{users} users for {args.duration:.0f}s")
+                                result = load(url, users)
+                            finally:
+                                stop_server(server)
+                            print_report(result)
+                            runs.append({
+                                "ref": ref, "users": users, "workers": workers, "pool_size": pool_size, "result": result,
+                            })
+        if len(runs) > 1:
+            print(f"\n{'ref':>10} {'users':>6} {'workers':>7} {'pool':>5} {'req/s':>8} {'p95 ms':>8} {'p99 ms':>8} "
+                  f"{'errors':>7} {'stuck':>6}")
+            for run in runs:
+                total = run["result"]["total"]
+                print(f"{run['ref'] or '-':>10} {run['users']:6} {run['workers']:7} {run['pool_size']:5} "
+                      f"{total['throughput_rps']:8.1f} {total['p95_ms']:8.1f} {total['p99_ms']:8.1f} "
+                      f"{total['error_rate']:7.2%} {total['unfinished']:6}")
+            for note in saturation(runs):
+                print(note)
+    
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+                "users": args.users,
+                "duration": args.duration,
+                "think_ms": args.think_ms,
+                "mix": mix,
+                "runs": runs,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
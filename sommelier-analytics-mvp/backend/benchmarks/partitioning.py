@@ -0,0 +1,230 @@
+"""
+Monthly partitioning benchmark for sales
+
+Generates a multi-year sales history into two scratch tables in the
+`bench_partitioning` schema, one a single heap (the old `sales`) and one
+partitioned by month like `sales` now is, with the same indexes, then
+compares:
+
+- date-bounded queries the app runs against raw sales (a month's totals,
+  a restaurant's export and listing for a date range, one wine's history,
+  rebuilding a quarter of the rollup): best execution time, buffers read
+  and how many partitions the plan touched
+- maintenance: VACUUM ANALYZE of everything vs of the current month, and
+  removing the oldest month with DELETE vs DETACH + DROP
+
+Needs no app data; the scratch schema is dropped afterwards unless --keep.
+
+Run from the backend directory against a scratch database:
+    python -m benchmarks.partitioning --years 4 --sales 3000000
+"""
+from datetime import date, timedelta
+from typing import Any
+import argparse
+import json
+import time
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from app.services.partitions import add_months, month_start
+
+SCHEMA = "bench_partitioning"
+PLAIN = f"{SCHEMA}.sales_plain"
+MONTHLY = f"{SCHEMA}.sales_monthly"
+
+COLUMNS = """
+    id uuid NOT NULL,
+    restaurant_id uuid NOT NULL,
+    wine_id uuid NOT NULL,
+    sale_date date NOT NULL,
+    quantity integer NOT NULL,
+    unit_price numeric(10, 2) NOT NULL,
+    total_amount numeric(10, 2) NOT NULL,
+    unit_cost numeric(10, 2),
+    created_at timestamp without time zone NOT NULL
+"""
+
+
+def setup(conn, restaurants: int, wines: int, sales: int, years: int) -> dict[str, Any]:
+    """Create both tables, fill them with the same rows and return query parameters"""
+    today = date.today()
+    first_month = add_months(month_start(today), -12 * years + 1)
+    days = (today - first_month).days + 1
+    
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    conn.execute(text(f"CREATE TABLE {PLAIN} ({COLUMNS}, PRIMARY KEY (id))"))
+    conn.execute(text(f"CREATE TABLE {MONTHLY} ({COLUMNS}, PRIMARY KEY (id, sale_date)) PARTITION BY RANGE (sale_date)"))
+    month = first_month
+    while month <= month_start(today):
+        conn.execute(text(
+            f"CREATE TABLE {SCHEMA}.sales_y{month.year:04d}m{month.month:02d} PARTITION OF {MONTHLY} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+        month = add_months(month, 1)
+    
+    # Skewed wine popularity within each restaurant's list, uniform dates
+    conn.execute(text(f"""
+        CREATE TABLE {SCHEMA}.wines AS
+        SELECT row_number() OVER () AS n, r.id AS restaurant_id, gen_random_uuid() AS id,
+               (40 + w % 60)::numeric AS price, (15 + w % 25)::numeric AS cost
+        FROM (SELECT gen_random_uuid() AS id FROM generate_series(1, :restaurants)) r,
+             generate_series(1, :wines) w
+    """), {"restaurants": restaurants, "wines": wines})
+    conn.execute(text(f"CREATE INDEX ON {SCHEMA}.wines (n)"))
+    conn.execute(text(f"""
+        INSERT INTO {PLAIN}
+        SELECT gen_random_uuid(), w.restaurant_id, w.id, current_date - s.age, s.quantity,
+               w.price, w.price * s.quantity, w.cost, current_date - s.age + time '12:00'
+        FROM (
+            SELECT 1 + floor(power(random(), 2) * :count)::int AS wn,
+                   1 + floor(random() * 3)::int AS quantity,
+                   floor(random() * :days)::int AS age
+            FROM generate_series(1, :sales)
+        ) s
+        JOIN {SCHEMA}.wines w ON w.n = s.wn
+    """), {"count": restaurants * wines, "days": days, "sales": sales})
+    conn.execute(text(f"INSERT INTO {MONTHLY} SELECT * FROM {PLAIN}"))
+    for table in (PLAIN, MONTHLY):
+        conn.execute(text(f"CREATE INDEX ON {table} (restaurant_id, sale_date, created_at, id)"))
+        conn.execute(text(f"CREATE INDEX ON {table} (wine_id, sale_date)"))
+        conn.execute(text(f"VACUUM ANALYZE {table}"))
+    
+    busiest = conn.execute(text(f"""
+        SELECT restaurant_id, wine_id FROM {PLAIN}
+        GROUP BY restaurant_id, wine_id ORDER BY count(*) DESC LIMIT 1
+    """)).one()
+    last_month = add_months(month_start(today), -1)
+    return {
+        "restaurant_id": busiest.restaurant_id,
+        "wine_id": busiest.wine_id,
+        "month_start": last_month,
+        "month_end": month_start(today),
+        "quarter_start": today - timedelta(days=90),
+        "today": today,
+        "first_month": first_month,
+    }
+
+
+def queries() -> dict[str, str]:
+    """Date-bounded raw-sales queries, `{table}` standing for either table"""
+    return {
+        "month_totals": """
+            SELECT count(*), sum(total_amount) FROM {table}
+            WHERE sale_date >= :month_start AND sale_date < :month_end
+        """,
+        "restaurant_month_export": """
+            SELECT * FROM {table}
+            WHERE restaurant_id = :restaurant_id AND sale_date >= :month_start AND sale_date < :month_end
+            ORDER BY sale_date, created_at, id
+        """,
+        "restaurant_listing_page": """
+            SELECT * FROM {table}
+            WHERE restaurant_id = :restaurant_id AND sale_date >= :quarter_start
+            ORDER BY sale_date DESC, created_at DESC, id DESC LIMIT 50
+        """,
+        "wine_history_quarter": """
+            SELECT sale_date, sum(quantity) FROM {table}
+            WHERE wine_id = :wine_id AND sale_date >= :quarter_start
+            GROUP BY sale_date
+        """,
+        "rollup_rebuild_quarter": """
+            SELECT restaurant_id, sale_date, wine_id, sum(quantity), sum(total_amount),
+                   sum(quantity * (unit_price - unit_cost)), count(*)
+            FROM {table}
+            WHERE sale_date >= :quarter_start
+            GROUP BY restaurant_id, sale_date, wine_id
+        """,
+    }
+
+
+def walk(node: dict):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+def explain(conn, sql: str, params: dict, repeat: int) -> dict[str, Any]:
+    """Best execution time over `repeat` runs, with buffers and relations touched"""
+    best = None
+    for _ in range(repeat):
+        plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params).scalar()[0]
+        if best is None or plan["Execution Time"] < best["Execution Time"]:
+            best = plan
+    top = best["Plan"]
+    relations = {node["Relation Name"] for node in walk(top) if node.get("Relation Name")}
+    return {
+        "execution_ms": round(best["Execution Time"], 2),
+        "shared_buffers": top.get("Shared Hit Blocks", 0) + top.get("Shared Read Blocks", 0),
+        "relations": len(relations),
+    }
+
+
+def timed(conn, sql: str) -> float:
+    start = time.perf_counter()
+    conn.execute(text(sql))
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def maintenance(conn, params: dict) -> dict[str, dict[str, float]]:
+    """Milliseconds for vacuum and for removing the oldest month, each way"""
+    oldest = params["first_month"]
+    current = params["today"].replace(day=1)
+    return {
+        "vacuum_analyze": {
+            "plain": timed(conn, f"VACUUM ANALYZE {PLAIN}"),
+            "monthly": timed(conn, f"VACUUM ANALYZE {SCHEMA}.sales_y{current.year:04d}m{current.month:02d}"),
+        },
+        "remove_oldest_month": {
+            "plain": timed(conn, f"DELETE FROM {PLAIN} WHERE sale_date < '{add_months(oldest, 1).isoformat()}'"),
+            "monthly": timed(
+                conn,
+                f"ALTER TABLE {MONTHLY} DETACH PARTITION {SCHEMA}.sales_y{oldest.year:04d}m{oldest.month:02d}; "
+                f"DROP TABLE {SCHEMA}.sales_y{oldest.year:04d}m{oldest.month:02d}"
+            ),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare a single sales heap with monthly partitions")
+    parser.add_argument("--years", type=int, default=4, help="Sales history length")
+    parser.add_argument("--sales", type=int, default=3_000_000)
+    parser.add_argument("--restaurants", type=int, default=20)
+    parser.add_argument("--wines", type=int, default=250, help="Wines per restaurant")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="Keep the bench_partitioning schema")
+    parser.add_argument("--json", default=None, help="Write results to this file")
+    args = parser.parse_args()
+    
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        try:
+            started = time.perf_counter()
+            params = setup(conn, args.restaurants, args.wines, args.sales, args.years)
+            print(f"Generated {args.sales} sales over {args.years} years in {time.perf_counter() - started:.0f}s")
+            
+            results = {}
+            print(f"{'query':26} {'plain ms':>9} {'monthly ms':>11} {'buffers':>17} {'relations':>10}")
+            for name, sql in queries().items():
+                plain = explain(conn, sql.format(table=PLAIN), params, args.repeat)
+                monthly = explain(conn, sql.format(table=MONTHLY), params, args.repeat)
+                results[name] = {"plain": plain, "monthly": monthly}
+                print(f"{name:26} {plain['execution_ms']:9.1f} {monthly['execution_ms']:11.1f} "
+                      f"{plain['shared_buffers']:8} {monthly['shared_buffers']:8} "
+                      f"{plain['relations']:4} {monthly['relations']:5}")
+            
+            results["maintenance"] = maintenance(conn, params)
+            for name, timings in results["maintenance"].items():
+                print(f"{name:26} {timings['plain']:9.1f} {timings['monthly']:11.1f}")
+        finally:
+            if not args.keep:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"years": args.years, "sales": args.sales, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Response serialization micro-benchmark
+
+Times turning result rows into a JSON response body, per 1k rows, for the
+default FastAPI path (build Pydantic models, validate them again against
+`response_model`, serialise, `json.dumps`) and the fast path
+(`FastJSONResponse`: dicts or models encoded once with orjson), plus the
+cost of serving a cached result each way. Rows are synthetic, so no
+database is needed.
+
+Run from the backend directory:
+    python -m benchmarks.serialization --rows 1000 --repeat 50
+"""
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Callable
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+
+os.environ.setdefault("IMPORT_WORKER_ENABLED", "false")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.v1.analytics import _inventory_health, _profit_analysis
+from app.core.responses import FastJSONResponse, dumps, encoded_json_response
+from app.schemas.analytics import InventoryHealth, ProfitAnalysis
+from app.schemas.sale import SaleListResponse, SaleResponse
+
+
+def inventory_rows(n: int) -> list:
+    return [
+        SimpleNamespace(id=uuid.uuid4(), name=f"Wine {i:05d}", inventory_count=i % 40, bottles_sold=i % 13)
+        for i in range(n)
+    ]
+
+
+def profit_rows(n: int) -> list:
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            name=f"Wine {i:05d}",
+            cost=Decimal(15 + i % 25),
+            price=Decimal(40 + i % 60),
+            total_profit=Decimal(i % 500) * Decimal("12.50"),
+        )
+        for i in range(n)
+    ]
+
+
+def sale_rows(n: int) -> list:
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            restaurant_id=uuid.uuid4(),
+            wine_id=uuid.uuid4(),
+            sale_date=date.today() - timedelta(days=i % 365),
+            quantity=1 + i % 3,
+            unit_price=Decimal("45.00"),
+            unit_cost=Decimal("18.00"),
+            total_amount=Decimal("45.00") * (1 + i % 3),
+            profit=Decimal("27.00") * (1 + i % 3),
+            profit_margin=60.0,
+            server_name=None,
+            table_number=str(i % 30),
+            notes=None,
+            created_at=now,
+        )
+        for i in range(n)
+    ]
+
+
+def cases(n: int) -> dict[str, dict[str, Any]]:
+    """For each response: its model type and how each path builds the content"""
+    today = date.today()
+    inventory = inventory_rows(n)
+    profit = profit_rows(n)
+    sales = sale_rows(n)
+    sale_page = lambda rows: SaleListResponse(
+        sales=[SaleResponse.model_validate(row) for row in rows], total=len(rows), page=1, page_size=len(rows)
+    )
+    return {
+        "inventory_health": {
+            "type": list[InventoryHealth],
+            "models": lambda: [InventoryHealth(**_inventory_health(row, 30)) for row in inventory],
+            "fast": lambda: [_inventory_health(row, 30) for row in inventory],
+        },
+        "profit_analysis": {
+            "type": list[ProfitAnalysis],
+            "models": lambda: [ProfitAnalysis(**_profit_analysis(row, today, today)) for row in profit],
+            "fast": lambda: [_profit_analysis(row, today, today) for row in profit],
+        },
+        "sales_list": {
+            "type": SaleListResponse,
+            "models": lambda: sale_page(sales),
+            "fast": lambda: sale_page(sales),
+        },
+    }
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> float:
+    """Best-of-`repeat` wall time of `fn`, in milliseconds"""
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def measure(case: dict[str, Any], repeat: int) -> dict[str, float]:
+    """Milliseconds for each path of one case"""
+    field = create_response_field(name="response", type_=case["type"])
+    loop = asyncio.new_event_loop()
+    
+    def default_response(content) -> bytes:
+        # What FastAPI does with an endpoint's return value
+        serialized = loop.run_until_complete(
+            serialize_response(field=field, response_content=content, is_coroutine=True)
+        )
+        return JSONResponse(serialized).body
+    
+    cached_default = jsonable_encoder(case["models"]())
+    cached_fast = dumps(case["fast"]()).decode()
+    try:
+        return {
+            "default": timed(lambda: default_response(case["models"]()), repeat),
+            "fast": timed(lambda: FastJSONResponse(case["fast"]()).body, repeat),
+            "default_cache_store": timed(lambda: jsonable_encoder(case["models"]()), repeat),
+            "fast_cache_store": timed(lambda: dumps(case["fast"]()).decode(), repeat),
+            "default_cache_hit": timed(lambda: default_response(cached_default), repeat),
+            "fast_cache_hit": timed(lambda: encoded_json_response(cached_fast.encode()).body, repeat),
+        }
+    finally:
+        loop.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON response serialization paths")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per response")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", default=None, help="Write results to this file")
+    args = parser.parse_args()
+    
+    per_1k = 1000 / args.rows
+    results = {}
+    print(f"{'ms per 1k rows':28} {'default':>9} {'fast':>9} {'speedup':>8}")
+    for name, case in cases(args.rows).items():
+        timings = {path: ms * per_1k for path, ms in measure(case, args.repeat).items()}
+        results[name] = timings
+        for label, default, fast in (
+            ("response", timings["default"], timings["fast"]),
+            ("cache store", timings["default_cache_store"], timings["fast_cache_store"]),
+            ("cache hit", timings["default_cache_hit"], timings["fast_cache_hit"]),
+        ):
+            print(f"{name + ' ' + label:28} {default:9.2f} {fast:9.2f} {default / fast:7.1f}x")
+    
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"rows": args.rows, "ms_per_1k_rows": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Test fixtures
+
+The tests call the app in-process against the Postgres at DATABASE_URL,
+migrated to head (`alembic upgrade head`), and are skipped when it cannot
+be reached. Every restaurant a test creates is deleted afterwards, so a
+development database will do.
+
+Run from the backend directory:
+    python -m pytest -q
+"""
+from datetime import date, timedelta
+from typing import Any, Callable, Optional
+from uuid import UUID
+import os
+import uuid
+
+# Every request reaches the database; no background threads
+os.environ.setdefault("ANALYTICS_CACHE_ENABLED", "false")
+os.environ.setdefault("IMPORT_WORKER_ENABLED", "false")
+os.environ.setdefault("ANALYTICS_SUMMARY_REFRESH_ENABLED", "false")
+os.environ.setdefault("SALES_PARTITION_MAINTENANCE_ENABLED", "false")
+os.environ.setdefault("DEBUG", "false")
+# Reads stay on the primary, so statement counts are the endpoint's own;
+# test_replica_routing builds its own guard
+os.environ["READ_REPLICA_URL"] = ""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.cache import CacheBackend, analytics_cache
+from app.core.database import async_engine, engine, replica_async_engine
+from app.main import app
+
+API = "/api/v1"
+
+
+class StatementCounter:
+    """SQL statements issued on any engine while listening"""
+    
+    def __init__(self):
+        self.engines = [e for e in (engine, async_engine.sync_engine, getattr(replica_async_engine, "sync_engine", None)) if e]
+        self.count = 0
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+    
+    def __enter__(self):
+        self.count = 0
+        for e in self.engines:
+            event.listen(e, "before_cursor_execute", self._before_cursor_execute)
+        return self
+    
+    def __exit__(self, *exc):
+        for e in self.engines:
+            event.remove(e, "before_cursor_execute", self._before_cursor_execute)
+
+
+class FakeCacheBackend(CacheBackend):
+    """Dict-backed backend that never evicts"""
+    
+    epoch = "fake"
+    
+    def __init__(self):
+        self.entries: dict[str, Any] = {}
+        self.versions: dict[str, int] = {}
+    
+    def get(self, key: str) -> Optional[Any]:
+        return self.entries.get(key)
+    
+    def set(self, key: str, value: Any, ttl: int) -> None:
+        self.entries[key] = value
+    
+    def get_version(self, namespace: str) -> int:
+        return self.versions.get(namespace, 0)
+    
+    def bump_version(self, namespace: str) -> int:
+        self.versions[namespace] = self.versions.get(namespace, 0) + 1
+        return self.versions[namespace]
+    
+    def clear(self) -> None:
+        self.entries.clear()
+        self.versions.clear()
+
+
+@pytest.fixture
+def enabled_cache(monkeypatch) -> FakeCacheBackend:
+    """Turn the analytics cache on, backed by a fresh FakeCacheBackend"""
+    backend = FakeCacheBackend()
+    monkeypatch.setattr(analytics_cache, "backend", backend)
+    monkeypatch.setattr(analytics_cache, "enabled", True)
+    return backend
+
+
+@pytest.fixture(scope="session")
+def client():
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError as e:
+        pytest.skip(f"Database unavailable: {e.orig}")
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def statements() -> StatementCounter:
+    return StatementCounter()
+
+
+@pytest.fixture
+def make_restaurant(client: TestClient) -> Callable[..., UUID]:
+    """
+    Create a restaurant with `wines` wines through the API
+    
+    Each wine gets `sales_per_wine` one-bottle sales on consecutive days up
+    to today. Wine types cycle through `wine_types`.
+    """
+    created = []
+    
+    def make(wines: int = 0, sales_per_wine: int = 0, wine_types: tuple[str, ...] = ("red", "white")) -> UUID:
+        response = client.post(f"{API}/restaurants/", json={
+            "name": "Test restaurant", "email": f"test-{uuid.uuid4()}@example.com",
+        })
+        response.raise_for_status()
+        restaurant_id = UUID(response.json()["id"])
+        created.append(restaurant_id)
+        for n in range(wines):
+            response = client.post(f"{API}/wines/", json={
+                "restaurant_id": str(restaurant_id),
+                "name": f"Wine {n:04d}",
+                "wine_type": wine_types[n % len(wine_types)],
+                "price": "60.00",
+                "cost": "20.00",
+                "inventory_count": 24,
+            })
+            response.raise_for_status()
+            wine_id = response.json()["id"]
+            for day in range(sales_per_wine):
+                client.post(f"{API}/sales/", json={
+                    "restaurant_id": str(restaurant_id),
+                    "wine_id": wine_id,
+                    "sale_date": (date.today() - timedelta(days=day)).isoformat(),
+                    "quantity": 1,
+                    "unit_price": "60.00",
+                    "unit_cost": "20.00",
+                }).raise_for_status()
+        return restaurant_id
+    
+    yield make
+    
+    # Rollup and summary rows cascade from the restaurant
+    with engine.begin() as conn:
+        for table in ("sales", "dishes", "wines", "restaurants"):
+            column = "id" if table == "restaurants" else "restaurant_id"
+            conn.execute(text(f"DELETE FROM {table} WHERE {column} = ANY(:ids)"), {"ids": created})
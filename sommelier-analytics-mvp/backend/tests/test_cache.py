@@ -0,0 +1,101 @@
+"""
+Analytics result cache and conditional GETs
+"""
+from uuid import uuid4
+
+from app.core import cache
+from app.core.cache import AnalyticsCache, InMemoryCacheBackend, analytics_cache
+from tests.conftest import API, FakeCacheBackend
+
+
+def test_write_changes_the_key_of_that_restaurant_only():
+    analytics = AnalyticsCache(FakeCacheBackend(), ttl=60)
+    written, other = uuid4(), uuid4()
+    params = {"limit": 10}
+    keys = (
+        analytics.make_key("dashboard", written, params),
+        analytics.make_key("dashboard", other, params),
+        analytics.make_group_key("group_dashboard", [written, other], params),
+        analytics.make_group_key("group_dashboard", [other], params),
+    )
+    
+    analytics.invalidate_restaurant(written)
+    
+    assert analytics.make_key("dashboard", written, params) != keys[0]
+    assert analytics.make_key("dashboard", other, params) == keys[1]
+    assert analytics.make_group_key("group_dashboard", [written, other], params) != keys[2]
+    assert analytics.make_group_key("group_dashboard", [other], params) == keys[3]
+
+
+def test_in_memory_backend_evicts_least_recently_used():
+    backend = InMemoryCacheBackend(max_entries=2)
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+    backend.get("a")
+    backend.set("c", 3, ttl=60)
+    
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == (1, None, 3)
+    assert len(backend) == 2
+
+
+def test_in_memory_backend_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    backend = InMemoryCacheBackend()
+    backend.set("a", 1, ttl=60)
+    
+    now[0] += 59
+    assert backend.get("a") == 1
+    now[0] += 2
+    assert backend.get("a") is None
+    assert len(backend) == 0
+
+
+def test_conditional_get_until_a_write(client, statements, make_restaurant, enabled_cache):
+    restaurant_id = make_restaurant(wines=1, sales_per_wine=1)
+    url = f"{API}/analytics/dashboard/{restaurant_id}"
+    
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert len(enabled_cache.entries) == 1
+    
+    with statements:
+        repeat = client.get(url, headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.headers["etag"] == etag
+    assert statements.count == 0
+    
+    client.post(f"{API}/wines/", json={
+        "restaurant_id": str(restaurant_id), "name": "Another", "wine_type": "red",
+        "price": "30.00", "inventory_count": 1,
+    }).raise_for_status()
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["total_wines"] == 2
+
+
+def test_conditional_get_with_the_cache_off(client, make_restaurant):
+    assert not analytics_cache.enabled
+    restaurant_id = make_restaurant(wines=1, sales_per_wine=1)
+    url = f"{API}/analytics/dashboard/{restaurant_id}"
+    
+    etag = client.get(url).headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    
+    client.put(f"{API}/restaurants/{restaurant_id}", json={"reorder_stock_threshold": 30}).raise_for_status()
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_group_conditional_get_only_resolves_members(client, statements, make_restaurant, enabled_cache):
+    restaurant_ids = [str(make_restaurant(wines=1)) for _ in range(2)]
+    url = f"{API}/analytics/group/dashboard"
+    params = {"restaurant_ids": restaurant_ids}
+    
+    etag = client.get(url, params=params).headers["etag"]
+    with statements:
+        response = client.get(url, params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    # The member lookup, not the report
+    assert statements.count == 1
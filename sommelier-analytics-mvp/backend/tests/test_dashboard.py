@@ -0,0 +1,36 @@
+"""
+Dashboard summary
+"""
+from uuid import uuid4
+
+from tests.conftest import API
+
+
+def test_single_round_trip(client, statements, make_restaurant):
+    for wines in (1, 25):
+        restaurant_id = make_restaurant(wines=wines, sales_per_wine=1)
+        with statements:
+            response = client.get(f"{API}/analytics/dashboard/{restaurant_id}")
+        assert response.status_code == 200
+        assert response.json()["total_wines"] == wines
+        assert statements.count == 1
+
+
+def test_per_restaurant_thresholds(client, make_restaurant):
+    # Every wine has 23 bottles left and has sold once
+    restaurant_id = make_restaurant(wines=3, sales_per_wine=1)
+    
+    summary = client.get(f"{API}/analytics/dashboard/{restaurant_id}").json()
+    assert summary["overstocked_wines"] == 3
+    assert summary["wines_needing_reorder"] == 0
+    
+    client.put(f"{API}/restaurants/{restaurant_id}", json={
+        "reorder_stock_threshold": 30, "overstock_stock_threshold": 30,
+    }).raise_for_status()
+    summary = client.get(f"{API}/analytics/dashboard/{restaurant_id}").json()
+    assert summary["overstocked_wines"] == 0
+    assert summary["wines_needing_reorder"] == 3
+
+
+def test_missing_restaurant(client):
+    assert client.get(f"{API}/analytics/dashboard/{uuid4()}").status_code == 404
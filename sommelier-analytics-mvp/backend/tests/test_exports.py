@@ -0,0 +1,23 @@
+"""
+Streaming exports
+"""
+from datetime import date, datetime
+import json
+
+from tests.conftest import API
+
+
+def test_sales_ndjson_export(client, make_restaurant):
+    restaurant_id = make_restaurant(wines=2, sales_per_wine=3)
+    
+    response = client.get(f"{API}/sales/export", params={"restaurant_id": str(restaurant_id), "format": "ndjson"})
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 6
+    assert rows[-1]["sale_date"] == date.today().isoformat()
+    assert rows[-1]["wine_name"].startswith("Wine ")
+    assert datetime.fromisoformat(rows[-1]["created_at"]).date() == date.today()
+    # Money is a string, as in the JSON API
+    assert rows[-1]["unit_price"] == "60.00"
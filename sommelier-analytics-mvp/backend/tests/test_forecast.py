@@ -0,0 +1,103 @@
+"""
+Reorder forecasting (pure numpy, no database)
+"""
+from datetime import date, timedelta
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.services import forecast
+from app.services.forecast import SalesMatrix, forecast_demand, forecast_reorders
+
+TODAY = date(2026, 10, 17)  # A Saturday
+
+
+def matrix(bottles, inventory) -> SalesMatrix:
+    """History of `bottles` (wines x days) ending yesterday"""
+    bottles = np.atleast_2d(np.asarray(bottles, dtype=np.float64))
+    wines, days = bottles.shape
+    return SalesMatrix(
+        wine_ids=[uuid4() for _ in range(wines)],
+        wine_names=[f"Wine {n}" for n in range(wines)],
+        inventory=np.asarray(inventory, dtype=np.float64),
+        bottles=bottles,
+        start=TODAY - timedelta(days=days),
+    )
+
+
+def weekdays(days: int) -> np.ndarray:
+    return (np.arange(days) + (TODAY - timedelta(days=days)).weekday()) % 7
+
+
+def test_no_sales_history():
+    [wine] = forecast_reorders(matrix(np.zeros((1, 56)), [10]), TODAY, lead_time_days=7, cover_days=14)
+    
+    assert wine["forecast_daily_sales"] == 0
+    assert wine["trend_per_week"] == 0
+    assert wine["days_until_stockout"] is None
+    assert wine["stockout_date"] is None
+    assert wine["reorder_date"] is None
+    assert wine["reorder_quantity"] == 0
+    assert wine["safety_stock"] == 0
+
+
+def test_out_of_stock_wine_reorders_today():
+    [wine] = forecast_reorders(matrix(np.full((1, 56), 2.0), [0]), TODAY, lead_time_days=7, cover_days=14)
+    
+    assert wine["days_until_stockout"] == 0
+    assert wine["stockout_date"] == TODAY
+    assert wine["reorder_date"] == TODAY
+    # Two weeks of cover, arriving with nothing left
+    assert wine["reorder_quantity"] == 28
+
+
+def test_weekday_pattern_is_reproduced():
+    # Closed on Mondays, six bottles on Saturdays, one on other days
+    days = 16 * 7
+    pattern = np.array([0, 1, 1, 1, 1, 6, 1], dtype=np.float64)
+    bottles = pattern[weekdays(days)][None, :]
+    
+    demand = forecast_demand(matrix(bottles, [100]), days_ahead=14).demand[0]
+    
+    expected = pattern[(np.arange(14) + TODAY.weekday()) % 7]
+    np.testing.assert_allclose(demand, expected, atol=1e-6)
+
+
+def test_trend_is_damped():
+    days = 84
+    bottles = (1 + 0.1 * np.arange(days))[None, :]
+    
+    result = forecast_demand(matrix(bottles, [1000]), days_ahead=200)
+    demand = result.demand[0]
+    
+    assert result.trend_per_week[0] == pytest.approx(0.7, rel=0.05)
+    # Same weekdays a week apart (the factor cancels): each week adds
+    # TREND_DAMPING^7 times what the week before added
+    weekly_gain = demand[7:] - demand[:-7]
+    assert (weekly_gain > 0).all()
+    np.testing.assert_allclose(weekly_gain[7:21] / weekly_gain[:14], forecast.TREND_DAMPING ** 7)
+    # So demand levels off instead of climbing: the last weeks are flat
+    np.testing.assert_allclose(demand[-7:], demand[-14:-7], rtol=1e-6)
+    assert demand[-7:].mean() < 2 * bottles[0, -7:].mean()
+
+
+def test_stockout_and_reorder_arithmetic():
+    # Two bottles a day without noise: no safety stock. 31 bottles last
+    # until 2 * 16 = 32 is reached on day 15, and must not run below 0
+    # before the order arrives: order on day 15 - 7 + 1 = 9, arriving on
+    # day 16 with nothing left, for 14 days x 2 bottles of cover.
+    slow = np.zeros(56)
+    result = forecast_reorders(
+        matrix([np.full(56, 2.0), slow], [31, 5]), TODAY, lead_time_days=7, cover_days=14
+    )
+    
+    wine, unsold = result
+    assert wine["forecast_daily_sales"] == 2.0
+    assert wine["safety_stock"] == 0
+    assert wine["days_until_stockout"] == 15
+    assert wine["stockout_date"] == TODAY + timedelta(days=15)
+    assert wine["reorder_date"] == TODAY + timedelta(days=9)
+    assert wine["reorder_quantity"] == 28
+    # Never reordered, so listed last
+    assert unsold["reorder_date"] is None
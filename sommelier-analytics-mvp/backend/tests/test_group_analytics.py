@@ -0,0 +1,100 @@
+"""
+Group (multi-location) analytics
+"""
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+
+from tests.conftest import API
+
+LOCATION_ONLY = ("restaurant_id", "restaurant_name")
+
+
+@pytest.fixture
+def group(client, make_restaurant):
+    """Three locations of one group with different wines and sales"""
+    group_id = uuid4()
+    restaurant_ids = [
+        make_restaurant(wines=3, sales_per_wine=2),
+        make_restaurant(wines=2, sales_per_wine=5),
+        make_restaurant(wines=1),
+    ]
+    for restaurant_id in restaurant_ids:
+        client.put(f"{API}/restaurants/{restaurant_id}", json={"group_id": str(group_id)}).raise_for_status()
+    return group_id, restaurant_ids
+
+
+def test_group_dashboard_adds_up_the_locations(client, group):
+    group_id, restaurant_ids = group
+    
+    summary = client.get(f"{API}/analytics/group/dashboard", params={"group_id": str(group_id)}).json()
+    singles = [client.get(f"{API}/analytics/dashboard/{restaurant_id}").json() for restaurant_id in restaurant_ids]
+    
+    locations = {location["restaurant_id"]: location for location in summary["locations"]}
+    assert set(locations) == {str(restaurant_id) for restaurant_id in restaurant_ids}
+    for restaurant_id, single in zip(restaurant_ids, singles):
+        location = locations[str(restaurant_id)]
+        assert {k: v for k, v in location.items() if k not in LOCATION_ONLY} == single
+    
+    totals = summary["totals"]
+    assert totals["restaurant_count"] == 3
+    for field in ("total_wines", "total_bottles_in_stock", "total_sales_last_30_days",
+                  "wines_needing_reorder", "overstocked_wines"):
+        assert totals[field] == sum(single[field] for single in singles)
+    # The location without sales has no profit figure; it adds nothing
+    for field in ("revenue_last_30_days", "profit_last_30_days"):
+        assert Decimal(totals[field]) == sum(Decimal(single[field] or 0) for single in singles)
+
+
+def test_group_top_bottom_matches_each_location(client, group):
+    group_id, restaurant_ids = group
+    params = {"limit": 2}
+    
+    ranked = client.get(f"{API}/analytics/group/top-bottom-wines",
+                        params={**params, "group_id": str(group_id)}).json()
+    singles = {
+        str(restaurant_id): client.get(f"{API}/analytics/top-bottom-wines/{restaurant_id}", params=params).json()
+        for restaurant_id in restaurant_ids
+    }
+    
+    assert {location["restaurant_id"] for location in ranked["locations"]} == set(singles)
+    for location in ranked["locations"]:
+        single = singles[location["restaurant_id"]]
+        assert location["top_sellers"] == single["top_sellers"]
+        assert location["slow_movers"] == single["slow_movers"]
+    
+    # Across the group: the best sellers of any location, with their own figures
+    metrics = {
+        wine["wine_id"]: wine
+        for single in singles.values() for wine in single["top_sellers"] + single["slow_movers"]
+    }
+    top = ranked["top_sellers"]
+    assert len(top) == 2
+    assert [wine["total_bottles_sold"] for wine in top] == [5, 5]
+    for wine in top:
+        assert {k: v for k, v in wine.items() if k != "restaurant_id"} == metrics[wine["wine_id"]]
+        assert wine["restaurant_id"] == str(restaurant_ids[1])
+
+
+def test_write_to_one_location_invalidates_the_group(client, group, make_restaurant, enabled_cache):
+    group_id, restaurant_ids = group
+    url = f"{API}/analytics/group/dashboard"
+    params = {"group_id": str(group_id)}
+    
+    response = client.get(url, params=params)
+    etag, wines = response.headers["etag"], response.json()["totals"]["total_wines"]
+    
+    # A restaurant outside the group leaves the cached result valid
+    client.post(f"{API}/wines/", json={
+        "restaurant_id": str(make_restaurant()), "name": "Elsewhere", "price": "30.00",
+    }).raise_for_status()
+    assert client.get(url, params=params, headers={"If-None-Match": etag}).status_code == 304
+    
+    client.post(f"{API}/wines/", json={
+        "restaurant_id": str(restaurant_ids[2]), "name": "New arrival", "price": "30.00",
+    }).raise_for_status()
+    response = client.get(url, params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["totals"]["total_wines"] == wines + 1
@@ -0,0 +1,109 @@
+"""
+Import job lifecycle: claiming, fencing, requeue and resume
+"""
+from datetime import datetime, timedelta
+import io
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import ImportJob, ImportJobStatus, ImportKind, Wine
+from app.services import import_jobs
+from tests.test_uploads import WINES_CSV
+
+
+@pytest.fixture
+def queue_job(make_restaurant, tmp_path, monkeypatch):
+    """
+    Queue a wines import for a new restaurant
+    
+    Jobs are backdated so they are claimed before anything else left in the
+    queue; the n-th job queued by a test is the n-th oldest.
+    """
+    monkeypatch.setattr(settings, "IMPORT_STORAGE_DIR", str(tmp_path))
+    queued = []
+    
+    def queue():
+        restaurant_id = make_restaurant()
+        with SessionLocal() as db:
+            job = import_jobs.create_job(db, restaurant_id, ImportKind.WINES, io.BytesIO(WINES_CSV.encode()))
+            job.created_at = datetime(2000, 1, 1) + timedelta(days=len(queued))
+            db.commit()
+            queued.append(job.id)
+            return job.id, restaurant_id
+    
+    return queue
+
+
+def load(job_id) -> ImportJob:
+    with SessionLocal() as db:
+        return db.get(ImportJob, job_id)
+
+
+def wine_count(restaurant_id) -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).select_from(Wine).where(Wine.restaurant_id == restaurant_id))
+
+
+def test_claim_skips_a_locked_job(queue_job):
+    first, _ = queue_job()
+    second, _ = queue_job()
+    
+    with SessionLocal() as holder, SessionLocal() as worker:
+        # Another worker is in the middle of claiming the oldest job
+        holder.execute(select(ImportJob).where(ImportJob.id == first).with_for_update())
+        
+        job = import_jobs.claim_next_job(worker)
+        assert job.id == second
+        assert job.status == ImportJobStatus.RUNNING.value
+        assert job.attempts == 1
+        holder.rollback()
+    
+    assert load(first).status == ImportJobStatus.QUEUED.value
+
+
+def test_worker_that_lost_its_job_writes_nothing(queue_job):
+    job_id, restaurant_id = queue_job()
+    
+    with SessionLocal() as db:
+        job = import_jobs.claim_next_job(db)
+        assert job.id == job_id
+        # Presumed dead: another worker re-claims the job in the meantime
+        with SessionLocal() as other:
+            other.execute(update(ImportJob).where(ImportJob.id == job_id).values(attempts=ImportJob.attempts + 1))
+            other.commit()
+        
+        import_jobs.run_job(db, job)
+    
+    job = load(job_id)
+    assert job.attempts == 2
+    assert job.status == ImportJobStatus.RUNNING.value
+    assert job.rows_processed == 0
+    assert wine_count(restaurant_id) == 0
+
+
+def test_stopped_job_is_requeued_and_resumes_after_the_last_batch(queue_job, monkeypatch):
+    monkeypatch.setattr(settings, "INGEST_BATCH_SIZE", 1)
+    job_id, restaurant_id = queue_job()
+    
+    with SessionLocal() as db:
+        import_jobs.run_job(db, import_jobs.claim_next_job(db), should_stop=lambda: True)
+    
+    job = load(job_id)
+    assert job.status == ImportJobStatus.QUEUED.value
+    assert job.rows_processed == 1
+    assert wine_count(restaurant_id) == 1
+    
+    with SessionLocal() as db:
+        job = import_jobs.claim_next_job(db)
+        assert job.id == job_id
+        import_jobs.run_job(db, job)
+    
+    job = load(job_id)
+    assert job.status == ImportJobStatus.SUCCEEDED.value
+    assert job.attempts == 2
+    assert (job.rows_processed, job.rows_loaded) == (2, 2)
+    # The first row was not loaded again
+    assert wine_count(restaurant_id) == 2
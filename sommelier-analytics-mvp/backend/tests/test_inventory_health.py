@@ -0,0 +1,29 @@
+"""
+Inventory health report
+"""
+from tests.conftest import API
+
+
+def test_statement_count_independent_of_wine_count(client, statements, make_restaurant):
+    counts = {}
+    for wines in (1, 25):
+        restaurant_id = make_restaurant(wines=wines, sales_per_wine=2)
+        with statements:
+            response = client.get(f"{API}/analytics/inventory-health/{restaurant_id}")
+        assert response.status_code == 200
+        assert len(response.json()) == wines
+        counts[wines] = statements.count
+    
+    assert counts[1] == counts[25]
+
+
+def test_velocity_window(client, make_restaurant):
+    # One bottle a day over the last 10 days (today included)
+    restaurant_id = make_restaurant(wines=1, sales_per_wine=10)
+    
+    response = client.get(f"{API}/analytics/inventory-health/{restaurant_id}", params={"velocity_days": 5})
+    
+    [wine] = response.json()
+    assert wine["avg_daily_sales"] == 1.2
+    assert wine["current_inventory"] == 24 - 10
+    assert wine["days_until_stockout"] == 11
@@ -0,0 +1,28 @@
+"""
+Per-request SQL statistics
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.core.database import engine
+from app.core.metrics import RequestStats, current_request
+
+
+def test_failed_statement_is_counted_and_leaves_nothing_behind(client):
+    stats = RequestStats(method="GET", scope={})
+    token = current_request.set(stats)
+    try:
+        with engine.connect() as conn:
+            with pytest.raises(DBAPIError):
+                conn.execute(text("SELECT 1 / 0"))
+            conn.rollback()
+            conn.execute(text("SELECT 1"))
+            leftover = conn.info.get("query_started")
+    finally:
+        current_request.reset(token)
+    
+    assert stats.statements == 2
+    assert stats.db_seconds > 0
+    # No per-connection bookkeeping to leak on the pooled connection
+    assert not leftover
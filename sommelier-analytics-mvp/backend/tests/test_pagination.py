@@ -0,0 +1,90 @@
+"""
+Keyset (cursor) pagination
+"""
+from datetime import date, datetime, timedelta
+from uuid import UUID, uuid4
+import base64
+
+import pytest
+
+from app.api.v1.sales import SALE_CURSOR_PARSERS
+from app.core.pagination import decode_cursor, encode_cursor
+from tests.conftest import API
+
+
+def all_pages(client, path: str, items: str, **params) -> list[dict]:
+    """Follow next_cursor from the first page to the last"""
+    rows, cursor = [], ""
+    while cursor is not None:
+        page = client.get(f"{API}/{path}/", params={**params, "cursor": cursor}).json()
+        rows.extend(page[items])
+        cursor = page["next_cursor"]
+    return rows
+
+
+def test_cursor_round_trip():
+    key = (date(2026, 10, 17), datetime(2026, 10, 17, 12, 30, 0, 123456), uuid4())
+    
+    assert decode_cursor("sales", encode_cursor("sales", key), SALE_CURSOR_PARSERS) == key
+
+
+def test_wine_pages_match_the_listing_and_break_ties_on_id(client, make_restaurant):
+    restaurant_id = make_restaurant(wines=3)
+    for _ in range(3):
+        client.post(f"{API}/wines/", json={
+            "restaurant_id": str(restaurant_id), "name": "Wine 0001", "price": "40.00",
+        }).raise_for_status()
+    
+    wines = all_pages(client, "wines", "wines", restaurant_id=str(restaurant_id), page_size=2)
+    listing = client.get(f"{API}/wines/", params={"restaurant_id": str(restaurant_id)}).json()["wines"]
+    
+    assert [wine["id"] for wine in wines] == [wine["id"] for wine in listing]
+    assert len({wine["id"] for wine in wines}) == 6
+    same_name = [UUID(wine["id"]) for wine in wines if wine["name"] == "Wine 0001"]
+    assert len(same_name) == 4
+    assert same_name == sorted(same_name)
+
+
+def test_sale_pages_run_newest_first(client, make_restaurant):
+    restaurant_id = make_restaurant(wines=2, sales_per_wine=3)
+    wine_id = client.get(f"{API}/wines/", params={"restaurant_id": str(restaurant_id)}).json()["wines"][0]["id"]
+    # Several sales on one day: ordered by created_at, then id
+    for _ in range(3):
+        client.post(f"{API}/sales/", json={
+            "restaurant_id": str(restaurant_id), "wine_id": wine_id,
+            "sale_date": (date.today() - timedelta(days=1)).isoformat(),
+            "quantity": 1, "unit_price": "60.00",
+        }).raise_for_status()
+    
+    sales = all_pages(client, "sales", "sales", restaurant_id=str(restaurant_id), page_size=2)
+    listing = client.get(f"{API}/sales/", params={"restaurant_id": str(restaurant_id)}).json()["sales"]
+    
+    assert len(sales) == 9
+    assert [sale["id"] for sale in sales] == [sale["id"] for sale in listing]
+    keys = [(sale["sale_date"], sale["created_at"], UUID(sale["id"])) for sale in sales]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_estimated_count_with_a_quoted_search(client, make_restaurant):
+    restaurant_id = make_restaurant(wines=2)
+    
+    page = client.get(f"{API}/wines/", params={
+        "restaurant_id": str(restaurant_id), "search": "O'Brien", "cursor": "", "count": "estimate",
+    }).json()
+    
+    assert page["total_estimated"] is True
+    assert isinstance(page["total"], int)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    base64.urlsafe_b64encode(b'{"kind": "wines"}').decode(),
+    encode_cursor("wines", ["Wine 0000"]),
+    encode_cursor("wines", ["Wine 0000", "not-a-uuid"]),
+    encode_cursor("sales", ["Wine 0000", str(uuid4())]),
+])
+def test_invalid_cursor_is_rejected(client, make_restaurant, cursor):
+    response = client.get(f"{API}/wines/", params={"restaurant_id": str(make_restaurant()), "cursor": cursor})
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,55 @@
+"""
+Monthly sales partitions
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.database import SessionLocal, engine
+from app.services import partitions
+from tests.conftest import API
+
+# Far enough out that no partition exists for it
+MONTH = date(2031, 6, 1)
+
+
+def test_create_partition_moves_rows_out_of_default(client, make_restaurant):
+    restaurant_id = make_restaurant(wines=1)
+    [wine] = client.get(f"{API}/wines/", params={"restaurant_id": str(restaurant_id)}).json()["wines"]
+    client.post(f"{API}/sales/", json={
+        "restaurant_id": str(restaurant_id), "wine_id": wine["id"],
+        "sale_date": MONTH.replace(day=15).isoformat(), "quantity": 1, "unit_price": "60.00",
+    }).raise_for_status()
+    
+    name = partitions.partition_name(MONTH)
+    with SessionLocal() as db:
+        try:
+            assert partitions.create_partition(db, MONTH) == name
+            assert MONTH in partitions.monthly_partitions(db)
+            moved = db.execute(text(f"SELECT count(*) FROM {name} WHERE restaurant_id = :id"), {"id": restaurant_id})
+            assert moved.scalar() == 1
+            left = db.execute(text(f"SELECT count(*) FROM {partitions.DEFAULT_PARTITION} WHERE restaurant_id = :id"),
+                              {"id": restaurant_id})
+            assert left.scalar() == 0
+            # The CHECK constraint that skipped the validation scan is gone
+            constraints = db.execute(text("SELECT conname FROM pg_constraint WHERE conrelid = CAST(:t AS regclass)"),
+                                     {"t": name}).scalars().all()
+            assert f"{name}_bounds" not in constraints
+        finally:
+            db.rollback()
+
+
+def test_maintenance_gives_up_on_a_held_lock(client, monkeypatch):
+    monkeypatch.setattr(partitions.settings, "SALES_PARTITION_LOCK_TIMEOUT_MS", 100)
+    monkeypatch.setattr(partitions.settings, "SALES_PARTITION_MONTHS_AHEAD", (MONTH.year - date.today().year) * 12)
+    # Someone holding sales_default, e.g. a long report without a date bound
+    with engine.connect() as holder:
+        holder.execute(text(f"LOCK TABLE {partitions.DEFAULT_PARTITION} IN ACCESS SHARE MODE"))
+        with SessionLocal() as db, pytest.raises(OperationalError) as error:
+            partitions.maintain(db)
+        holder.rollback()
+    assert error.value.orig.pgcode == partitions.LOCK_NOT_AVAILABLE
+    with SessionLocal() as db:
+        assert MONTH not in partitions.monthly_partitions(db)
@@ -0,0 +1,73 @@
+"""
+Read-your-writes routing between the primary and a read replica
+"""
+from uuid import uuid4
+import asyncio
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.database import ReplicaGuard, SessionLocal, WriteLog
+from tests.conftest import API
+
+
+def test_recent_write_keeps_reads_on_the_primary(client, make_restaurant):
+    written, sibling, untouched = make_restaurant(), make_restaurant(), make_restaurant()
+    group_id, other_group_id = uuid4(), uuid4()
+    for restaurant_id, group in ((written, group_id), (sibling, group_id), (untouched, other_group_id)):
+        client.put(f"{API}/restaurants/{restaurant_id}", json={"group_id": str(group)}).raise_for_status()
+    
+    async def run():
+        # The primary stands in for a replica with no lag
+        primary = create_async_engine(settings.async_database_url, poolclass=NullPool)
+        replica = create_async_engine(settings.async_database_url, poolclass=NullPool)
+        statements = []
+        event.listen(primary.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+        # Two workers, each with its own snapshot
+        writer = WriteLog(primary, window=35, refresh_interval=30)
+        reader = WriteLog(primary, window=35, refresh_interval=30)
+        guard = ReplicaGuard(replica, reader, max_lag=5, check_interval=30)
+        
+        async def reader_sees(restaurant_ids, group=None):
+            reader._refreshed_at = float("-inf")
+            assert await reader.refresh()
+            return reader.written_within(restaurant_ids, group, 30)
+        
+        try:
+            with SessionLocal() as db:
+                writer.record(db, written)
+                # The writing worker knows at once; nobody else before the commit
+                assert writer.written_within([written], None, 30)
+                assert not await reader_sees([written])
+                db.rollback()
+            # A write that rolled back never shows up
+            assert not await reader_sees([written])
+            
+            with SessionLocal() as db:
+                writer.record(db, written)
+                db.commit()
+            assert await reader_sees([written])
+            assert not await reader_sees([untouched])
+            assert await reader_sees([], group_id)
+            assert not await reader_sees([], other_group_id)
+            
+            statements.clear()
+            routes = [
+                await guard.route(*request)
+                for request in (([written], None), ([untouched], None), ([], group_id), ([], other_group_id))
+            ]
+            # Answered from the snapshot loaded above
+            assert statements == []
+            return routes
+        finally:
+            await primary.dispose()
+            await replica.dispose()
+    
+    assert asyncio.run(run()) == [
+        (False, "recent_write"),
+        (True, "fresh"),
+        (False, "recent_write"),
+        (True, "fresh"),
+    ]
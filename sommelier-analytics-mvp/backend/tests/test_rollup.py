@@ -0,0 +1,44 @@
+"""
+Daily sales rollup maintenance
+"""
+from datetime import date
+
+from sqlalchemy import event, select
+
+from app.core.database import SessionLocal, engine
+from app.models import DailyWineSales
+from tests.conftest import API
+
+
+def rollup_rows(restaurant_id) -> dict:
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(DailyWineSales.sale_date, DailyWineSales.bottles_sold, DailyWineSales.transaction_count)
+            .where(DailyWineSales.restaurant_id == restaurant_id)
+        ).all()
+    return {row.sale_date: (row.bottles_sold, row.transaction_count) for row in rows}
+
+
+def test_deleting_last_sale_of_a_day_removes_only_that_row(client, make_restaurant):
+    restaurant_id = make_restaurant(wines=1, sales_per_wine=2)
+    sales = client.get(f"{API}/sales/", params={"restaurant_id": str(restaurant_id)}).json()["sales"]
+    today = next(sale for sale in sales if sale["sale_date"] == date.today().isoformat())
+    
+    deletes = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("DELETE FROM daily_wine_sales"):
+            deletes.append(statement)
+    
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        assert client.delete(f"{API}/sales/{today['id']}").status_code == 204
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    
+    rows = rollup_rows(restaurant_id)
+    assert date.today() not in rows
+    assert list(rows.values()) == [(1, 1)]
+    # The cleanup is keyed by (restaurant, day, wine), not the whole restaurant
+    [delete] = deletes
+    assert "sale_date" in delete and "wine_id" in delete
@@ -0,0 +1,68 @@
+"""
+Slow query log
+"""
+import logging
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+from app.core.slow_queries import SlowQueryLog, is_read_only
+from app.models import ImportJob
+
+
+@pytest.mark.parametrize("statement, expected", [
+    ("SELECT * FROM wines WHERE updated_at > now()", True),
+    ("WITH w AS (SELECT id FROM wines) SELECT count(*) FROM w", True),
+    ("SELECT * FROM sales WHERE notes = 'update the list'", True),
+    ("SELECT * FROM import_jobs LIMIT 1 FOR UPDATE SKIP LOCKED", False),
+    ("SELECT * FROM wines FOR NO KEY UPDATE", False),
+    ("SELECT * FROM wines FOR SHARE", False),
+    ("SELECT * FROM wines FOR KEY SHARE NOWAIT", False),
+    ("WITH gone AS (DELETE FROM sales RETURNING *) SELECT count(*) FROM gone", False),
+    ("WITH w AS (UPDATE wines SET times_sold = 0 RETURNING id) SELECT * FROM w", False),
+    ("SELECT * INTO wines_copy FROM wines", False),
+    ("SELECT pg_try_advisory_xact_lock(1)", False),
+    ("SELECT nextval('import_jobs_id_seq')", False),
+    ("INSERT INTO sales DEFAULT VALUES", False),
+])
+def test_is_read_only(statement, expected):
+    assert is_read_only(statement) is expected
+
+
+def test_claim_query_is_not_explained():
+    claim = select(ImportJob).limit(1).with_for_update(skip_locked=True)
+    assert not is_read_only(str(claim.compile(dialect=postgresql.dialect())))
+
+
+def test_failed_statement_leaves_nothing_behind(client, caplog):
+    log = SlowQueryLog(threshold_ms=0.001, sample_rate=1, max_per_minute=100, explain=True, explain_sample_rate=1)
+    engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    log.watch(engine)
+    with caplog.at_level(logging.WARNING, "app.slow_queries"), engine.connect() as conn:
+        with pytest.raises(DBAPIError):
+            conn.execute(text("SELECT 1 / 0"))
+        conn.rollback()
+        assert not conn.info.get("slow_query_started")
+        conn.execute(text("SELECT id FROM import_jobs LIMIT 1 FOR UPDATE SKIP LOCKED"))
+        conn.execute(text("SELECT 1"))
+        conn.rollback()
+    locking, plain = [record.getMessage() for record in caplog.records]
+    assert '"plan"' not in locking
+    assert '"plan"' in plain
+
+
+def test_explain_in_autocommit_is_timed_out_and_restores_the_timeout(client, caplog):
+    log = SlowQueryLog(threshold_ms=0.001, sample_rate=1, max_per_minute=100, explain=True,
+                       explain_sample_rate=1, explain_timeout_ms=50)
+    engine = create_engine(settings.DATABASE_URL, poolclass=NullPool, isolation_level="AUTOCOMMIT")
+    log.watch(engine)
+    with caplog.at_level(logging.WARNING, "app.slow_queries"), engine.connect() as conn:
+        conn.exec_driver_sql("SET statement_timeout = '7s'")
+        conn.execute(text("SELECT pg_sleep(0.2)"))
+        assert conn.exec_driver_sql("SHOW statement_timeout").scalar() == "7s"
+    slept = next(record.getMessage() for record in caplog.records if "pg_sleep" in record.getMessage())
+    assert "statement timeout" in slept
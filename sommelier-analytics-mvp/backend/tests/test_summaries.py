@@ -0,0 +1,26 @@
+"""
+Precomputed analytics summaries
+"""
+from app.core.database import SessionLocal
+from app.services import summaries
+from tests.conftest import API
+
+
+def test_materialized_etag_follows_the_refresh(client, make_restaurant, enabled_cache):
+    restaurant_id = make_restaurant(wines=3, sales_per_wine=2)
+    url = f"{API}/analytics/top-bottom-wines/{restaurant_id}"
+    params = {"source": "materialized"}
+    
+    with SessionLocal() as db:
+        assert summaries.refresh_restaurant(db, restaurant_id)
+    first = client.get(url, params=params)
+    assert first.status_code == 200
+    assert client.get(url, params=params, headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    
+    # Nothing was written, but the summaries were rebuilt
+    with SessionLocal() as db:
+        assert summaries.refresh_restaurant(db, restaurant_id)
+    second = client.get(url, params=params, headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert second.headers["x-data-as-of"] != first.headers["x-data-as-of"]
+    assert second.json()["as_of"] == second.headers["x-data-as-of"]
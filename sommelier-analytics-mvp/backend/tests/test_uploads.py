@@ -0,0 +1,48 @@
+"""
+CSV bulk uploads and queued imports
+"""
+from datetime import date
+import inspect
+
+import pytest
+
+from app.api.v1 import imports, sales, wines
+from tests.conftest import API
+
+WINES_CSV = (
+    "name,producer,vintage,varietal,region,country,wine_type,body,price,cost,inventory_count\n"
+    "Upload Red,Producer,2019,Syrah,Rhone,France,red,full,55.00,18.00,12\n"
+    "Upload White,Producer,2021,Chablis,Burgundy,France,white,light,48.00,15.00,6\n"
+)
+
+
+@pytest.mark.parametrize("endpoint", [
+    sales.bulk_upload_sales, wines.bulk_upload_wines, imports.import_wines, imports.import_sales,
+])
+def test_handlers_on_the_blocking_session_run_in_the_threadpool(endpoint):
+    # An `async def` would run the sync Session on the event loop
+    assert not inspect.iscoroutinefunction(endpoint)
+
+
+def test_bulk_upload_wines_then_sales(client, make_restaurant):
+    restaurant_id = make_restaurant()
+    
+    response = client.post(f"{API}/wines/bulk-upload", params={"restaurant_id": str(restaurant_id)},
+                           files={"file": ("wines.csv", WINES_CSV, "text/csv")})
+    assert response.status_code == 201
+    assert response.json()["wines_created"] == 2
+    
+    sales_csv = (
+        "wine_name,sale_date,quantity,unit_price,unit_cost,server_name,table_number\n"
+        f"Upload Red,{date.today().isoformat()},2,55.00,18.00,Sam,4\n"
+    )
+    response = client.post(f"{API}/sales/bulk-upload", params={"restaurant_id": str(restaurant_id)},
+                           files={"file": ("sales.csv", sales_csv, "text/csv")})
+    assert response.status_code == 201
+    assert response.json()["sales_created"] == 1
+
+
+def test_upload_to_unknown_restaurant(client):
+    response = client.post(f"{API}/imports/wines", params={"restaurant_id": "00000000-0000-0000-0000-000000000000"},
+                           files={"file": ("wines.csv", WINES_CSV, "text/csv")})
+    assert response.status_code == 404
@@ -0,0 +1,26 @@
+"""
+Wine endpoints
+"""
+from tests.conftest import API
+
+
+def test_list_wines_filtered_by_type(client, make_restaurant):
+    restaurant_id = make_restaurant(wines=5, wine_types=("red", "white", "sparkling"))
+    
+    response = client.get(f"{API}/wines/", params={"restaurant_id": str(restaurant_id), "wine_type": "red"})
+    
+    assert response.status_code == 200
+    page = response.json()
+    assert [wine["name"] for wine in page["wines"]] == ["Wine 0000", "Wine 0003"]
+    assert {wine["wine_type"] for wine in page["wines"]} == {"red"}
+
+
+def test_wine_type_round_trip(client, make_restaurant):
+    [wine] = client.get(f"{API}/wines/", params={
+        "restaurant_id": str(make_restaurant(wines=1, wine_types=("rose",))),
+    }).json()["wines"]
+    assert wine["wine_type"] == "rose"
+    
+    response = client.put(f"{API}/wines/{wine['id']}", json={"wine_type": "dessert", "body": "full"})
+    assert response.status_code == 200
+    assert client.get(f"{API}/wines/{wine['id']}").json()["wine_type"] == "dessert"